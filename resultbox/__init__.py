@@ -12,7 +12,15 @@ from . import (
     utils,
     variable,
     dct,
+    row,
+    conditions,
+    query,
+    groupby,
+    export,
+    spill,
     box,
+    view,
+    writer,
     table,
     persist,
     plot,
@@ -20,7 +28,10 @@ from . import (
 )
 from .variable import Store, Variable, Aliases
 from .dct import Dict_Container, get_dict
-from .box import Box
+from .row import Row
+from .box import Box, ColumnBox, CombinedBox, SpillBox
+from .view import BoxView
+from .writer import Writer
 from .table import Tabulator, Table, tabulate, vector_table, to_csv
 from .persist import load, save
 from .plot import plot, vector_plot
@@ -11,34 +11,103 @@ and plots can be generated simply from the data within the Box.
 
 """
 
+import gc
 import hashlib
 import numpy as np
-from . import variable
+from contextlib import contextmanager
+from . import variable, export, spill
 from .utils import listify, dict_to_str, orient
 from .constants import IND, DEP, INDEP
+from .columns import Column, Columns, as_array
+from .index import (
+    KeyIndex,
+    ValueIndex,
+    PresenceIndex,
+    SortedIndex,
+    ColumnIndex,
+    DistinctIndex,
+    CombinationIndex,
+)
+from .query import Evaluator
+from .groupby import GroupBy, factorize
+from .conditions import Condition
+from .row import Row
 from . import settings
 from copy import deepcopy
 
+_PLAIN = (str, int, float, bool, type(None))
+
+
+def _encode(value):
+    """Return a (tag, hashable payload) pair for a value"""
+    if isinstance(value, np.ndarray):
+        if value.dtype == "O":
+            return (np.ndarray, (value.shape, tuple(_encode(v) for v in value.flat)))
+        buffer = np.ascontiguousarray(value).data
+        digest = hashlib.sha256(buffer).digest()
+        return (np.ndarray, (value.dtype.str, value.shape, digest))
+    elif isinstance(value, (bool, np.bool_)):
+        return (bool, bool(value))
+    elif isinstance(value, (int, np.integer)):
+        return (int, int(value))
+    elif isinstance(value, (float, np.floating)):
+        value = float(value)
+        return (float, "nan" if value != value else value)
+    elif isinstance(value, str):
+        return (str, str(value))
+    elif isinstance(value, (list, tuple)):
+        return (type(value), tuple(_encode(v) for v in value))
+    elif isinstance(value, dict):
+        return (dict, combine_key(value))
+    return (object, str(value))
+
+
+def combine_key(dct):
+    """Generate a hashable key from a dictionary of values
 
-def hashable(obj):
-    """Make an hashable representation of an object for hashlib"""
-    return bytes(str(obj), "utf-8")
+    Args:
+        dct (dict): The dictionary
 
+    Returns:
+        tuple: A flat tuple of (key, type tag, hashable value) triplets.
 
-def hash_dict(dct):
-    """Generate a hash from a dictionary"""
-    h = hashlib.md5()
+    Note:
+        Two dictionaries give equal keys if they have the same keys in the
+        same order and their values are of the same kind and are equal. Array
+        values are compared by dtype, shape and a hash of their buffer.
+    """
+    lst = []
+    for k, v in dct.items():
+        t = type(v)
+        if t in _PLAIN and v == v:
+            lst += (k, t, v)
+        else:
+            lst.append(k)
+            lst += _encode(v)
+    return tuple(lst)
 
-    def update(d):
-        for k, v in d.items():
-            h.update(hashable(k))
-            if isinstance(v, dict):
-                update(v)
-            else:
-                h.update(hashable(v))
 
-    update(dct)
-    return h.digest()
+def validate_shape(key, shape):
+    """Ensure the shape of a value suits its key
+
+    Args:
+        key (Variable): The key
+        shape (tuple): The shape of the value
+    """
+    if len(shape) > 1:
+        assert len(shape) == 2
+        if 1 not in shape:
+            assert isinstance(key, variable.Variable)
+            assert key.components is not None
+            assert len(key.components) in shape
+
+
+def _plain(dct):
+    """Return True if all the values in a dictionary are plain scalars"""
+    for v in dct.values():
+        if type(v) not in _PLAIN:
+            return False
+    return True
 
 
 def validate_row(row):
@@ -52,11 +121,7 @@ def validate_row(row):
             if v is None:
                 continue
             if np.ndim(v) > 1:
-                assert np.ndim(v) == 2
-                if 1 not in np.shape(v):
-                    assert isinstance(k, variable.Variable)
-                    assert k.components is not None
-                    assert len(k.components) in np.shape(v)
+                validate_shape(k, np.shape(v))
 
 
 def scalarise(dct):
@@ -68,21 +133,418 @@ def scalarise(dct):
                 dct[subkey][k] = v.item()
 
 
+def check_object(key, arr):
+    """Check an object array, converting it to floats if required
+
+    Args:
+        key (Variable): The key
+        arr (ndarray): An array
+
+    Returns:
+        ndarray: The array, which is converted to floats if it is an object
+        array and settings.FORCE_OBJECTS_TO_FLOATS is True.
+    """
+    if arr.dtype == "O":  # Object
+        if settings.NO_OBJECT_ARRAYS:
+            raise ValueError(
+                "Input for variable '"
+                + key
+                + "' is an object array."
+                + " Check each row is the same shape."
+            )
+        elif settings.FORCE_OBJECTS_TO_FLOATS:
+            return arr.astype(np.float64)
+    return arr
+
+
 def check_objects(row):
     subkeys = [INDEP, DEP]
     for subkey in subkeys:
         for k, v in row[subkey].items():
-            if isinstance(v, np.ndarray):
-                if v.dtype == "O":  # Object
-                    if settings.NO_OBJECT_ARRAYS:
-                        raise ValueError(
-                            "Input for variable '"
-                            + k
-                            + "' is an object array."
-                            + " Check each row is the same shape."
-                        )
-                    elif settings.FORCE_OBJECTS_TO_FLOATS:
-                        row[subkey][k] = v.astype(np.float64)
+            if isinstance(v, np.ndarray) and v.dtype == "O":
+                row[subkey][k] = check_object(k, v)
+
+
+def _check_value(key, v, shapes):
+    """Validate, check and scalarise one value, caching shape checks
+
+    Returns:
+        The value, which may have been converted.
+    """
+    if isinstance(v, np.ndarray):
+        shape = v.shape
+    elif isinstance(v, (list, tuple)):
+        shape = np.shape(v)
+    else:
+        return v
+    if len(shape) > 1:
+        ok = shapes.get((key, shape))
+        if ok is None:
+            try:
+                validate_shape(key, shape)
+                ok = True
+            except AssertionError:
+                ok = False
+            shapes[(key, shape)] = ok
+        if not ok:
+            raise ValueError("Shape " + str(shape) + " does not suit the variable.")
+    if isinstance(v, np.ndarray):
+        if v.dtype.kind == "O":
+            v = check_object(key, v)
+        if settings.CONVERT_SCALAR_ARRAYS and v.size == 1:
+            v = v.item()
+    return v
+
+
+def check_rows(rows):
+    """Validate many rows at once
+
+    This does the work of :func:`validate_row`, :func:`check_objects` and
+    :func:`scalarise` for a batch of rows. Shape checks are done once for
+    each variable and shape.
+
+    Args:
+        rows (list): A list of (position, row) tuples.
+
+    Returns:
+        tuple: A dictionary of fixed rows by position, for rows that had
+        values converted, and a list of (position, key, message) tuples
+        for invalid values.
+    """
+    shapes = {}
+    fixed = {}
+    errors = []
+    for i, row in rows:
+        new = None
+        for subkey in [INDEP, DEP]:
+            for k, v in row[subkey].items():
+                if type(v) in _PLAIN:
+                    continue
+                try:
+                    checked = _check_value(k, v, shapes)
+                except ValueError as e:
+                    errors.append((i, k, str(e)))
+                    continue
+                if checked is not v:
+                    new = {IND: row[IND], INDEP: row[INDEP], DEP: row[DEP]}
+                    new[subkey] = new[subkey].copy()
+                    new[subkey][k] = checked
+                    row = new
+        if new is not None:
+            fixed[i] = new
+    return fixed, errors
+
+
+def _as_column(key, values):
+    """Return an array with one entry per row from column input"""
+    if isinstance(values, np.ndarray):
+        arr = values
+    else:
+        try:
+            arr = np.asarray(values)
+        except ValueError:  # Ragged rows
+            arr = np.empty(len(values), dtype=object)
+            for i, v in enumerate(values):
+                arr[i] = v
+    if arr.ndim == 0:
+        raise ValueError("Input for variable '" + key + "' is not a column.")
+    return arr
+
+
+def _split_column(key, arr):
+    """Validate a column once and return an array with one value per row
+
+    Args:
+        key (Variable): The key
+        arr (ndarray): The column input, where the first axis is for rows.
+
+    Returns:
+        ndarray: A 1D array. Values that are arrays are held in an object
+        array.
+    """
+    n = len(arr)
+    if arr.ndim > 1:
+        validate_shape(key, arr.shape[1:])
+        arr = check_object(key, arr)
+        if settings.CONVERT_SCALAR_ARRAYS and np.prod(arr.shape[1:]) == 1:
+            return arr.reshape(n)
+        out = np.empty(n, dtype=object)
+        for i in range(n):
+            out[i] = arr[i]
+        return out
+    elif arr.dtype != "O":
+        return arr
+    out = np.empty(n, dtype=object)
+    for i, v in enumerate(arr):
+        if isinstance(v, np.ndarray):
+            validate_shape(key, v.shape)
+            v = check_object(key, v)
+            if settings.CONVERT_SCALAR_ARRAYS and v.size == 1:
+                v = v.item()
+        out[i] = v
+    return out
+
+
+def _values(col):
+    """Return a list of the values in a column"""
+    return col.tolist() if col.dtype != "O" else list(col)
+
+
+def _column_dicts(columns, n, masks=None):
+    """Return a list of dictionaries, one for each row of some columns
+
+    Args:
+        columns (dict): The columns
+        n (int): The number of rows
+        masks (dict): Optional boolean arrays for columns that do not have a
+        value in every row, which are True where there is a value.
+
+    Note:
+        The dictionaries are filled one column at a time, which is much
+        faster than building each one from a row of values.
+    """
+    masks = {} if masks is None else masks
+    out = [{} for i in range(n)]
+    for k, col in columns.items():
+        mask = masks.get(k)
+        if mask is None:
+            for d, v in zip(out, _values(col)):
+                d[k] = v
+        else:
+            ids = np.flatnonzero(mask)
+            for i, v in zip(ids.tolist(), _values(col[ids])):
+                out[i][k] = v
+    return out
+
+
+def _column_groups(columns, n, masks=None):
+    """Group rows by their values in some columns
+
+    Columns of numbers, booleans and strings are factorised with numpy, so
+    that :func:`combine_key` is only called once for each unique combination
+    of values.
+
+    Args:
+        columns (dict): The columns, as returned by :func:`_split_column`.
+        n (int): The number of rows
+        masks (dict): Optional masks of the rows with a value, for columns
+        that do not have a value in every row.
+
+    Returns:
+        tuple: A list of combine keys, one for each group, and an integer
+        array giving the group of each row.
+    """
+    masks = {} if masks is None else masks
+    code = np.zeros(n, dtype=np.int64)
+    size = 1
+    for k, col in columns.items():
+        if col.dtype.kind not in "biufcU":
+            keys = [combine_key(dct) for dct in _column_dicts(columns, n, masks)]
+            return keys, np.arange(n)
+        mask = masks.get(k)
+        if mask is None:
+            uniques, inverse = np.unique(col, return_inverse=True)
+        else:
+            # Rows without a value get a code of their own
+            uniques, present = np.unique(col[mask], return_inverse=True)
+            inverse = np.full(n, len(uniques), dtype=np.int64)
+            inverse[mask] = present.reshape(-1)
+            uniques = np.arange(len(uniques) + 1)
+        if size * len(uniques) >= 2**62:
+            # Renumber so the mixed-radix code stays within int64
+            used, code = np.unique(code, return_inverse=True)
+            size = len(used)
+        code = code * len(uniques) + inverse.reshape(-1)
+        size *= len(uniques)
+    _, first, inverse = np.unique(code, return_index=True, return_inverse=True)
+    firsts = {k: col[first] for k, col in columns.items()}
+    first_masks = {k: m[first] for k, m in masks.items() if k in columns}
+    dcts = _column_dicts(firsts, len(first), first_masks)
+    return [combine_key(dct) for dct in dcts], inverse.reshape(-1)
+
+
+def _as_masks(masks, n):
+    """Return validated boolean masks for columns with missing values"""
+    out = {}
+    for k, mask in ({} if masks is None else masks).items():
+        mask = np.asarray(mask, dtype=bool)
+        if mask.shape != (n,):
+            raise ValueError(
+                "The mask for '" + str(k) + "' must have one element per entry."
+            )
+        if not mask.all():
+            out[k] = mask
+    return out
+
+
+def _fill_missing(values, mask):
+    """Fill gaps in an object array so that operations on it do not fail"""
+    if values.dtype.kind != "O" or mask.all() or not mask.any():
+        return values
+    values = values.copy()
+    values[~mask] = values[np.argmax(mask) : np.argmax(mask) + 1]
+    return values
+
+
+_REAL = {int, float}
+
+
+def _last_in_group(values, mask, codes, n):
+    """Return the last value in each group, as dependent data is combined
+
+    Args:
+        values (ndarray): A 1D array of values
+        mask (ndarray): A boolean array that is True for rows with a value
+        codes (ndarray): The group of each row, from 0 to n - 1, or -1 for
+        rows that are not in a group.
+        n (int): The number of groups
+
+    Returns:
+        tuple: An array with the value of each group, from its last row with
+        a value, and a mask of the groups that have one.
+    """
+    ids = np.flatnonzero(mask & (codes >= 0))
+    groups = codes[ids]
+    last = len(ids) - 1 - np.unique(groups[::-1], return_index=True)[1]
+    out = np.zeros(n, dtype=values.dtype)
+    out[groups[last]] = values[ids[last]]
+    out_mask = np.zeros(n, dtype=bool)
+    out_mask[groups[last]] = True
+    return out, out_mask
+
+
+def _group_bounds(codes, n):
+    """Return the order that sorts rows by group, and where each group starts
+
+    Args:
+        codes (ndarray): The group of each row, from 0 to n - 1, or -1 for
+        rows that are not in a group.
+        n (int): The number of groups
+
+    Returns:
+        tuple: The sorting order, and an array of n + 1 bounds, so that the
+        rows in group g are order[bounds[g]:bounds[g + 1]].
+    """
+    order = np.argsort(codes, kind="stable")
+    return order, np.searchsorted(codes[order], np.arange(n + 1))
+
+
+def _typed(values, mask):
+    """Return an object column as a typed column where possible
+
+    Object columns hold numbers of different kinds (e.g. ints and floats)
+    so that each keeps its type. For vectorised use, they are converted to
+    the numeric kind that suits all of them.
+
+    Returns:
+        tuple: The values and a mask that excludes None values.
+    """
+    lst = values.tolist()
+    present = np.array([v is not None for v in lst], dtype=bool)
+    mask = mask & present
+    ids = np.flatnonzero(mask)
+    arr = as_array([lst[i] for i in ids.tolist()])
+    if arr.dtype.kind == "O":
+        return values, mask
+    out = np.zeros(len(values), dtype=arr.dtype)
+    out[ids] = arr
+    return out, mask
+
+
+_CHUNK = 4096
+
+
+def _chunk_dicts(columns, ids):
+    """Return dictionaries of the values in some rows of (values, mask) columns"""
+    values = {}
+    masks = {}
+    for k, (v, m) in columns.items():
+        values[k] = v[ids]
+        mask = m[ids]
+        if not mask.all():
+            masks[k] = mask
+    return _column_dicts(values, len(ids), masks)
+
+
+def _row_dict(index, indep, dep):
+    """Return a row dictionary"""
+    return {IND: index, INDEP: indep, DEP: dep}
+
+
+@contextmanager
+def _paused_gc():
+    """Pause garbage collection while building many containers"""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _entry_filter(dct, get, entries):
+    """Return a function that checks if an entry matches key-value pairs
+
+    Args:
+        dct (dict): The key-value pairs or conditions, as for
+        :meth:`Box.where`.
+        get (callable): A function that takes an entry and a key, and
+        returns the value of the key or None.
+        entries (callable): A function that returns a new iterator over the
+        entries being searched.
+
+    Returns:
+        callable: A function that returns True for matching entries.
+
+    Note:
+        Relative conditions, like nearest, are resolved among the entries
+        that meet all the other criteria, with one pass over the entries
+        for each of them.
+    """
+    plain = {k: v for k, v in dct.items() if not isinstance(v, Condition)}
+    absolute = {}
+    relative = {}
+    for k, v in dct.items():
+        if isinstance(v, Condition):
+            (relative if v.relative else absolute)[k] = v
+    resolved = {}
+
+    def match(d):
+        for k, v in plain.items():
+            if not v == get(d, k):
+                return False
+        for conditions in [absolute, resolved]:
+            for k, c in conditions.items():
+                if not c.match(get(d, k)):
+                    return False
+        return True
+
+    for k, c in relative.items():
+        resolved[k] = c.resolve([get(d, k) for d in entries() if match(d)])
+    return match
+
+
+def _restore(cls, rows, state):
+    """Recreate a pickled Box without going through the list methods"""
+    box = cls.__new__(cls)
+    list.extend(box, rows)
+    box.__setstate__(state)
+    return box
+
+
+def _invalidating(name):
+    """Wrap a list method so that it also invalidates the Box indexes"""
+    method = getattr(list, name)
+
+    def wrapped(self, *args, **kwargs):
+        out = method(self, *args, **kwargs)
+        self._invalidate()
+        return out
+
+    wrapped.__name__ = name
+    wrapped.__doc__ = method.__doc__
+    return wrapped
 
 
 class Box(list):
@@ -95,14 +557,247 @@ class Box(list):
 
     Args:
         lst (list): Optional data to initially populate the Box instance.
+        trusted (bool): If True, rows added with :meth:`add` are not
+        validated straight away. See :meth:`seal`.
+        compact (bool): If True, rows are stored as :class:`Row` objects
+        instead of dictionaries. Rows with the same independent values
+        share one dictionary of them. This cuts the memory that the Box adds
+        for each row by about 4x when many rows share their independent
+        values (e.g. a sweep over 100 points). The combined data still has
+        an entry for each distinct set of independent values, so when most
+        rows have their own, the saving is only about 1.3x.
+
+    Note:
+        The Box keeps indexes to speed up queries. They are updated when data
+        is added through the Box methods. Other changes to the list (e.g.
+        `append` or item assignment) cause them to be rebuilt when next
+        needed. Changing the contents of a row in place is not detected.
     """
 
-    def __init__(self, lst=None):
+    _REPR_ROWS = 5
+    _SUMMARY_KEYS = 20
+
+    def __init__(self, lst=None, trusted=False, compact=False):
+        self.trusted = trusted
+        self.compact = compact
+        self._unchecked = []
         self._combined = {}
+        self._combined_ids = {}
+        self._keys = []
+        self._indexes = {}
+        self._combined_indexes = {}
+        self._key_groups = set()
+        self._codes = Column("i")
+        self._version = 0
+        self._projections = {}
         if lst is not None:
-            super().__init__(lst)
-            for row in lst:
-                self._combine(row)
+            self._add_rows(list(lst))
+
+    append = _invalidating("append")
+    extend = _invalidating("extend")
+    insert = _invalidating("insert")
+    pop = _invalidating("pop")
+    remove = _invalidating("remove")
+    clear = _invalidating("clear")
+    sort = _invalidating("sort")
+    reverse = _invalidating("reverse")
+    __setitem__ = _invalidating("__setitem__")
+    __delitem__ = _invalidating("__delitem__")
+    __iadd__ = _invalidating("__iadd__")
+    __imul__ = _invalidating("__imul__")
+
+    def __reduce__(self):
+        return (_restore, (self.__class__, list(self), self.__getstate__()))
+
+    def __getstate__(self):
+        """Return the state to pickle, without the indexes and caches"""
+        state = self.__dict__.copy()
+        for name in ["_indexes", "_combined_indexes", "_projections"]:
+            state[name] = {}
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+    def _invalidate(self):
+        """Discard the row indexes after the rows have been changed"""
+        self._version += 1
+        self._indexes = {}
+        self._codes = None
+        if len(self._unchecked) > 0:
+            # Positions may have moved, so check everything
+            self._unchecked = list(range(len(self)))
+
+    def _rebuild(self):
+        """Rebuild the combined data and discard all indexes"""
+        self._version += 1
+        self._combined = {}
+        self._combined_ids = {}
+        self._keys = []
+        self._indexes = {}
+        self._combined_indexes = {}
+        self._codes = Column("i")
+        keys = [combine_key(row[INDEP]) for row in self]
+        positions = [self._combine(row, key) for row, key in zip(self, keys)]
+        if len(positions) > 0:
+            self._codes.set_many(0, positions)
+        if self.compact:
+            super().__setitem__(slice(None), self._compact_rows(self, keys))
+
+    def _row_codes(self):
+        """Return the position of each row within the combined data
+
+        Rows that were added without updating the combined data (e.g.
+        with `append`) have a position of -1.
+        """
+        if self._codes is None:
+            ids = self._combined_ids
+            codes = [ids.get(combine_key(row[INDEP]), -1) for row in self]
+            self._codes = Column("i")
+            self._codes.set_many(0, np.array(codes, dtype=np.int64))
+        return self._codes.values(len(self))[0]
+
+    def _combine_keys(self):
+        """Return a list of the combine keys, in combined order"""
+        return self._keys
+
+    def _compact_rows(self, rows, keys):
+        """Return Row objects that share the combined independent values"""
+        d = self._combined
+        return [Row(row[IND], d[key][INDEP], row[DEP]) for row, key in zip(rows, keys)]
+
+    def _row(self, i):
+        """Return the row at position i"""
+        return super().__getitem__(i)
+
+    def _replace_row(self, i, row):
+        """Replace a row without updating the combined data or indexes"""
+        super().__setitem__(i, row)
+
+    def _check(self):
+        """Validate any rows added in trusted mode before they are used"""
+        if len(self._unchecked) > 0:
+            self.seal()
+
+    def seal(self):
+        """Validate all rows that were added in trusted mode
+
+        The rows are checked in a single pass, as they would have been by
+        :meth:`add`. Size-1 arrays are converted to scalars and object arrays
+        are converted as set in the settings module. This is called
+        automatically before the Box is queried or saved.
+
+        Raises:
+            ValueError: If any rows are invalid. The message lists all the
+            invalid rows. Valid rows are still checked and kept. Invalid rows
+            stay unchecked, so later calls raise again until they are fixed
+            or removed.
+        """
+        unchecked = self._unchecked
+        if len(unchecked) == 0:
+            return
+        fixed, errors = check_rows([(i, self._row(i)) for i in unchecked])
+        self._unchecked = sorted(set(i for i, k, msg in errors))
+        if len(fixed) > 0:
+            for i, row in fixed.items():
+                self._replace_row(i, row)
+            self._rebuild()
+        if len(errors) > 0:
+            lines = [
+                "Row " + str(i) + ", '" + str(k) + "': " + msg for i, k, msg in errors
+            ]
+            raise ValueError(
+                str(len(errors)) + " invalid values in Box:\n" + "\n".join(lines)
+            )
+
+    def _store(self, rows):
+        """Store rows without invalidating the indexes"""
+        super().extend(rows)
+
+    def _add_rows(self, rows, keys=None):
+        """Store rows and update the combined data and indexes
+
+        Args:
+            rows (list): The rows to add.
+            keys (list): Optional combine keys for each row, if they have
+            already been calculated.
+
+        Returns:
+            list: The position of each row within the combined data.
+        """
+        self._version += 1
+        start = len(self)
+        if len(rows) == 1 and not self.compact:
+            self._store(rows)
+            positions = [self._combine(rows[0], None if keys is None else keys[0])]
+        elif self.compact:
+            if keys is None:
+                keys = [None] * len(rows)
+            keys = [
+                combine_key(row[INDEP]) if k is None else k
+                for row, k in zip(rows, keys)
+            ]
+            positions = [self._combine(row, key) for row, key in zip(rows, keys)]
+            rows = self._compact_rows(rows, keys)
+            self._store(rows)
+        else:
+            self._store(rows)
+            keys = [None] * len(rows) if keys is None else keys
+            positions = [self._combine(row, key) for row, key in zip(rows, keys)]
+        self._index_rows(start, rows, positions)
+        return positions
+
+    def _index_rows(self, start, rows, positions):
+        """Add new rows to the indexes and record their combined positions"""
+        for index in self._indexes.values():
+            for i, row in enumerate(rows, start):
+                index.add(i, row)
+        for index in self._combined_indexes.values():
+            for pos, row in zip(positions, rows):
+                index.add(pos, row)
+        if self._codes is None:
+            return
+        elif len(positions) == 1:
+            self._codes.set(start, positions[0])
+        elif len(positions) > 1:
+            self._codes.set_many(start, positions)
+
+    def _index(self, cls, *args):
+        """Return an index of the rows, building it if needed
+
+        Args:
+            cls (type): The index class
+            *args: Arguments for the index class. Indexes with different
+            arguments are kept separately.
+        """
+        self._check()
+        name = (cls,) + args if len(args) > 0 else cls
+        index = self._indexes.get(name)
+        if index is None:
+            index = cls(*args)
+            self._fill_index(index)
+            self._indexes[name] = index
+        return index
+
+    def _fill_index(self, index):
+        """Add all the rows to a new index"""
+        for i, row in enumerate(self):
+            index.add(i, row)
+
+    def _combined_index(self, cls):
+        """Return an index of the combined data, building it if needed"""
+        self._check()
+        index = self._combined_indexes.get(cls)
+        if index is None:
+            index = cls()
+            self._fill_combined_index(index)
+            self._combined_indexes[cls] = index
+        return index
+
+    def _fill_combined_index(self, index):
+        """Add all the combined data to a new index"""
+        for i, row in enumerate(self.combined()):
+            index.add(i, row)
 
     def add(
         self, indep, key=None, value=None, dep=None, keys=None, values=None, **kwargs
@@ -155,16 +850,30 @@ class Box(list):
             be strings, but it is recommended to use Variable instances.
             dep (dict): A dictionary of Variable-value pairs for dependent
             data.
+
+        Note:
+            If the Box is trusted, the row is not validated until the Box
+            is sealed.
         """
-        dfull = {IND: len(self), INDEP: indep.copy(), DEP: dep}
-        validate_row(dfull)
-        check_objects(dfull)
-        if settings.CONVERT_SCALAR_ARRAYS:
-            scalarise(dfull)
+        dfull = self._new_row(len(self), indep, dep)
+        if self.trusted:
+            self._unchecked.append(len(self))
         if settings.PRINT_UPDATES:
             print(self.show([dfull]))
-        self.append(dfull)
-        self._combine(dfull)
+        self._add_rows([dfull])
+
+    def _new_row(self, i, indep, dep):
+        """Return a new row, validated unless the Box is trusted"""
+        dfull = {IND: i, INDEP: indep.copy(), DEP: dep}
+        if _plain(indep) and _plain(dep):
+            # Plain scalars need no checks or conversion
+            return dfull
+        if not self.trusted:
+            validate_row(dfull)
+            check_objects(dfull)
+            if settings.CONVERT_SCALAR_ARRAYS:
+                scalarise(dfull)
+        return dfull
 
     def add_array(self, indep, keys, values):
         """Add an array of values
@@ -179,6 +888,174 @@ class Box(list):
         dep = {k: v for k, v in zip(keys, values)}
         self.add_dict(indep, dep)
 
+    def add_many(self, indep, dep=None, masks=None):
+        """Add many entries at once from columns of values
+
+        Args:
+            indep (dict): A dictionary of independent values. Each value is
+            an array-like with one element per entry.
+            dep (dict): A dictionary of dependent values. Each value is an
+            array-like with one element (or row, or 2D slice) per entry.
+            masks (dict): Optional boolean arrays for keys that some entries
+            do not have. Each is True for entries with a value for the key.
+
+        Note:
+            This is much faster than calling :meth:`add` for each entry. Each
+            column is validated once, and combine keys are only calculated
+            once for each unique set of independent values.
+        """
+        dep = {} if dep is None else dep
+        n = None
+        columns = []
+        for dct in [indep, dep]:
+            cols = {}
+            for k, values in dct.items():
+                arr = _as_column(k, values)
+                if n is not None and len(arr) != n:
+                    raise ValueError("All columns must have the same length.")
+                n = len(arr)
+                cols[k] = _split_column(k, arr)
+            columns.append(cols)
+        if n is None or n == 0:
+            return
+        masks = _as_masks(masks, n)
+        start = len(self)
+        keys, groups = _column_groups(columns[0], n, masks)
+        self._add_columns(columns[0], columns[1], n, keys, groups, masks)
+        if settings.PRINT_UPDATES:
+            print(self.show(self[start:]))
+
+    def _add_columns(self, indep, dep, n, keys, groups, masks=None):
+        """Add rows from validated columns
+
+        Args:
+            indep (dict): The independent columns
+            dep (dict): The dependent columns
+            n (int): The number of rows
+            keys (list): The combine key for each group of rows
+            groups (ndarray): The group of each row
+            masks (dict): Optional masks of the rows with a value, for
+            columns that do not have a value in every row.
+        """
+
+        start = len(self)
+        masks = {} if masks is None else masks
+        with _paused_gc():
+            self._version += 1
+            first = np.unique(groups, return_index=True)[1]
+            firsts = _column_dicts(
+                {k: c[first] for k, c in indep.items()},
+                len(first),
+                {k: m[first] for k, m in masks.items() if k in indep},
+            )
+            positions = self._combine_groups(firsts, dep, keys, groups, masks)
+            positions = positions[groups]
+            deps = _column_dicts(dep, n, masks)
+            if self.compact:
+                # Rows share the independent values of the combined data
+                d = self._combined
+                shared = [d[key][INDEP] for key in keys]
+                rows = [
+                    Row(i, shared[g], b)
+                    for i, g, b in zip(range(start, start + n), groups.tolist(), deps)
+                ]
+            else:
+                indeps = _column_dicts(indep, n, masks)
+                rows = [
+                    {IND: i, INDEP: a, DEP: b}
+                    for i, a, b in zip(range(start, start + n), indeps, deps)
+                ]
+            self._store(rows)
+            self._index_rows(start, rows, positions.tolist())
+
+    def _combine_groups(self, indeps, dep, keys, groups, masks):
+        """Merge groups of new rows into the combined data in one pass
+
+        Args:
+            indeps (list): The independent values of each group
+            dep (dict): The dependent columns of the rows
+            keys (list): The combine key of each group
+            groups (ndarray): The group of each row
+            masks (dict): Masks of the rows with a value, for columns that
+            do not have a value in every row.
+
+        Returns:
+            ndarray: The position of each group within the combined data.
+        """
+        n = len(keys)
+        merged = {}
+        merged_masks = {}
+        for k, col in dep.items():
+            mask = masks.get(k)
+            mask = np.ones(len(col), dtype=bool) if mask is None else mask
+            merged[k], merged_masks[k] = _last_in_group(col, mask, groups, n)
+        deps = _column_dicts(merged, n, merged_masks)
+        d = self._combined
+        ids = self._combined_ids
+        positions = np.empty(n, dtype=np.int64)
+        for g, (key, indep, dct) in enumerate(zip(keys, indeps, deps)):
+            pos = ids.get(key)
+            if pos is None:
+                pos = ids[key] = len(self._keys)
+                self._keys.append(key)
+                d[key] = {INDEP: indep, DEP: dct}
+            else:
+                d[key][DEP].update(dct)
+            positions[g] = pos
+        return positions
+
+    def extend_arrays(self, indep_keys, indep_values, dep_keys=None, dep_values=None):
+        """Add many entries at once from 2D arrays
+
+        Args:
+            indep_keys (list): The independent keys
+            indep_values (array-like): An N x k array of independent values
+            for N entries and k keys.
+            dep_keys (list): The dependent keys
+            dep_values (array-like): An N x m array of dependent values for N
+            entries and m keys.
+        """
+
+        def columns(keys, values):
+            if keys is None:
+                return {}
+            arr = np.asarray(values)
+            if arr.ndim == 1 and len(keys) == 1:
+                arr = arr[:, None]
+            if arr.ndim != 2 or arr.shape[1] != len(keys):
+                raise ValueError("Values must be an N x " + str(len(keys)) + " array.")
+            return {k: arr[:, j] for j, k in enumerate(keys)}
+
+        indep = columns(listify(indep_keys), indep_values)
+        dep = None if dep_keys is None else columns(listify(dep_keys), dep_values)
+        self.add_many(indep, dep)
+
+    def view(self):
+        """Return a view of all rows, which can be filtered without copying
+
+        Returns:
+            BoxView: A view of the Box. Its filters, such as
+            :meth:`BoxView.where`, return new views that can be chained.
+        """
+        from .view import BoxView
+
+        self._check()
+        return BoxView(self)
+
+    def writer(self, buffer_size=1000):
+        """Return a Writer to add entries to the Box from many threads
+
+        Args:
+            buffer_size (int): The number of entries each thread buffers
+            before they are added to the Box.
+
+        Returns:
+            Writer: The writer, which can be used as a context manager.
+        """
+        from .writer import Writer
+
+        return Writer(self, buffer_size)
+
     def filter(self, keys, lst=None, func="all"):
         """Return a generator for entries that all include the keys
 
@@ -191,8 +1068,8 @@ class Box(list):
         """
         f = all if func == "all" else any
 
-        if lst is None:
-            lst = self
+        if lst is None or lst is self:
+            return (self[i] for i in self.filter_ids(keys, func=func))
         if DEP in lst[0] and INDEP in lst[0]:
             filt_dep = True
         else:
@@ -206,6 +1083,26 @@ class Box(list):
 
         return filter(filt_func, lst)
 
+    def filter_ids(self, keys, func="all", combined=False):
+        """Return the ids of entries that include the keys
+
+        Args:
+            keys (list[Variable]): The keys that entries must include
+            func (str): 'all' if entries must include all the keys, or 'any'
+            if they must include at least one of them.
+            combined (bool): If True, return ids for the combined data
+            instead of the Box rows.
+
+        Returns:
+            ndarray: A sorted array of integer ids. They are positions
+            in the Box, or in the list returned by :meth:`combined`.
+        """
+        if combined:
+            index = self._combined_index(PresenceIndex)
+        else:
+            index = self._index(PresenceIndex)
+        return index.ids(listify(keys), func=func)
+
     def filtered(self, keys, lst=None, func="all"):
         """Return a list of entries that all include the keys
 
@@ -230,26 +1127,84 @@ class Box(list):
 
         Returns:
             list: A generator for the filtered entries
+
+        Note:
+            Values may be conditions from the :mod:`resultbox.conditions`
+            module, such as `between(10, 20)`, instead of exact values.
         """
         dct = {} if dct is None else dct
         m = dct.copy()
         m.update(kwargs)
-        if lst is None:
-            lst = self
+        if lst is None or lst is self:
+            return (self._row(i) for i in self._where_ids(m).tolist())
+        if len(lst) == 0:
+            return iter(lst)
         if DEP in lst[0] and INDEP in lst[0]:
             filt_dep = True
         else:
             filt_dep = False
 
-        def filt_func(d):
+        def get(d, k):
             if filt_dep:
-                return all(
-                    [v == d[INDEP].get(k, d[DEP].get(k, None)) for k, v in m.items()]
-                )
-            else:
-                return all([v == d.get(k, None) for k, v in m.items()])
+                return d[INDEP].get(k, d[DEP].get(k, None))
+            return d.get(k, None)
 
-        return filter(filt_func, lst)
+        return filter(_entry_filter(m, get, lambda: iter(lst)), lst)
+
+    def _where_ids(self, dct, ids=None):
+        """Return the ids of rows that contain key-value pairs
+
+        Args:
+            dct (dict): The key-value pairs or conditions, as for
+            :meth:`where`.
+            ids (ndarray): An optional sorted array of row ids to search
+            within. Relative conditions, like nearest, are resolved among
+            these rows.
+
+        Returns:
+            ndarray: A sorted array of the matching row ids.
+        """
+        plain = {k: v for k, v in dct.items() if not isinstance(v, Condition)}
+        conditions = {k: v for k, v in dct.items() if isinstance(v, Condition)}
+        found = None
+        if len(plain) > 0 or len(conditions) == 0:
+            found = self._index(ValueIndex).candidates(plain)
+        if found is None:
+            # Narrow down by a dependent number with its column of values
+            for k, v in plain.items():
+                if type(v) in _REAL:
+                    values, mask = self._raw_column(k)
+                    if values.dtype.kind in "biuf":
+                        found = np.flatnonzero(mask & (values == v))
+                        break
+        if ids is not None:
+            found = ids if found is None else np.intersect1d(found, ids)
+        exact = len(plain) == 0
+        index = self._index(SortedIndex) if len(conditions) > 0 else None
+        for k, c in conditions.items():
+            # Relative conditions can only be resolved over all the sorted
+            # values if nothing else narrows down the rows
+            alone = found is None and len(dct) == 1
+            if c.indexed and (alone or not c.relative):
+                c = c.resolve(index.sorted(k)[0])
+                new = index.ids(k, c)
+                found = new if found is None else np.intersect1d(found, new)
+            else:
+                exact = False
+        if found is None:
+            found = np.arange(len(self))
+        found = np.asarray(found, dtype=np.int64)
+        if exact:
+            # The indexes answered every condition exactly
+            return found
+        rows = [self._row(i) for i in found.tolist()]
+
+        def get(d, k):
+            return d[INDEP].get(k, d[DEP].get(k, None))
+
+        match = _entry_filter(dct, get, lambda: iter(rows))
+        keep = [match(d) for d in rows]
+        return found[np.array(keep, dtype=bool)] if len(rows) > 0 else found
 
     def where(self, dct=None, lst=None, **kwargs):
         """Return a list of entries that all contain key-value pairs
@@ -263,24 +1218,150 @@ class Box(list):
         """
         return [row for row in self.iwhere(dct, lst, **kwargs)]
 
+    def query(self, expr, **constants):
+        """Return a Box of the entries that match an expression
+
+        Args:
+            expr (str): An expression over variable names, using arithmetic,
+            comparisons, 'and', 'or' and 'not'. For example,
+            "load > 3 and speed / 2 < limit". Names that are not identifiers
+            can be quoted with backticks.
+            constants: Optional names for constant values used in the
+            expression.
+
+        Returns:
+            BoxView: A view of the matching entries, which does not copy
+            them. Use :meth:`BoxView.to_box` to make a new Box.
+
+        Note:
+            The expression is evaluated with numpy over columns of values,
+            which are cached, so queries are much faster than checking each
+            entry in Python. For each variable, the independent value is used
+            if there is one, otherwise the dependent value. Comparisons with
+            a missing value are False, and values that are not scalars (e.g.
+            arrays) count as missing.
+        """
+        from .view import BoxView
+
+        self._check()
+        mask = Evaluator(self._column, len(self), constants).mask(expr)
+        return BoxView(self, np.flatnonzero(mask))
+
+    def _column(self, key, dep_first=False):
+        """Return an array of values for a key and a mask of rows with one"""
+        values, mask = self._raw_column(key, dep_first)
+        return _fill_missing(values, mask), mask
+
+    def _raw_column(self, key, dep_first=False):
+        """Return the stored column for a key, without filling gaps"""
+        return self._index(ColumnIndex).values(key, dep_first)
+
+    def _row_indexes(self):
+        """Return an array of the index of each row"""
+        return self._index(ColumnIndex).indexes()
+
+    def _subset(self, ids):
+        """Return a new Box of the rows with the given ids"""
+        keys = self._combine_keys()
+        codes = self._row_codes()[ids].tolist()
+        out = self._empty()
+        with _paused_gc():
+            rows = [self._row(i) for i in ids]
+            out._add_rows(rows, [keys[c] if c >= 0 else None for c in codes])
+        return out
+
+    def _empty(self):
+        """Return a new empty Box of the same kind and settings"""
+        return self.__class__(trusted=self.trusted, compact=self.compact)
+
     def minimal(self):
         """A minimal list of data in the Box
 
         Returns:
             list: A list of dictionaries. Each dictionary combines
             independent and dependent entries.
+
+        Note:
+            The merged dictionaries are cached until the Box changes, and
+            copies of them are returned, so the results can be modified.
         """
-        combined = self._combined
-        out = []
-        for k, d in combined.items():
-            dct = d[INDEP].copy()
-            dct.update(d[DEP])
-            out.append(dct)
+
+        def build():
+            out = []
+            for d in self.combined():
+                dct = d[INDEP].copy()
+                dct.update(d[DEP])
+                out.append(dct)
+            return out
+
+        return [d.copy() for d in self._cached(None, build)]
+
+    def _cached(self, key, build):
+        """Return a cached projection, building it if the Box has changed
+
+        Args:
+            key: The key of the projection in the cache
+            build (callable): A function that returns the projection
+
+        Returns:
+            The cached projection. Projections from earlier versions of the
+            Box are dropped when a new one is built.
+        """
+        cached = self._projections.get(key)
+        if cached is None or cached[0] != self._version:
+            version = self._version
+            self._projections = {
+                k: v for k, v in self._projections.items() if v[0] == version
+            }
+            cached = self._projections[key] = (version, build())
+        return cached[1]
+
+    def projection(self, keys):
+        """Return arrays of the values of keys in the combined data
+
+        Args:
+            keys (list[Variable]): The keys
+
+        Returns:
+            dict: A dictionary of (values, mask) tuples, one for each key.
+            Each has an element for each entry in the combined data, and the
+            mask is True where the entry has a value.
+
+        Note:
+            The arrays are cached until the Box changes, so they should not
+            be modified.
+        """
+        self._check()
+        out = {}
+        for k in listify(keys):
+            out[k] = self._cached(("key", k), lambda: self._combined_column(k))
         return out
 
-    def exclusively(self, keys, lst=None):
-        """Return a list of dictionaries that only contain values for keys"""
-        minimal = self.minimal() if lst is None else lst
+    def exclusively(self, keys, lst=None, ids=None):
+        """Return a list of dictionaries that only contain values for keys
+
+        Args:
+            keys (list[Variable]): The keys
+            lst (list): An optional list of dictionaries to use. If None, the
+            combined data in the Box is used.
+            ids (ndarray): Optional positions of the entries in the combined
+            data to include, if lst is None.
+
+        Returns:
+            list: A list of dictionaries, with -999 for missing values.
+        """
+        if lst is None:
+            columns = self.projection(keys)
+            n = len(self._combine_keys())
+            ids = np.arange(n) if ids is None else np.asarray(ids, dtype=np.int64)
+            lists = []
+            for k in keys:
+                values, mask = columns[k]
+                vals = values[ids].tolist()
+                for i in np.flatnonzero(~mask[ids]).tolist():
+                    vals[i] = -999
+                lists.append(vals)
+            return [dict(zip(keys, vals)) for vals in zip(*lists)]
 
         def make_exclusive(d, keys):
             dct = {}
@@ -291,20 +1372,26 @@ class Box(list):
                     dct[k] = -999
             return dct
 
-        lst = []
-        for d in minimal:
+        out = []
+        for d in lst:
             dct = make_exclusive(d, keys)
             if len(dct) > 0:
-                lst.append(dct)
-        return lst
+                out.append(dct)
+        return out
 
-    def _combine(self, dct):
+    def _combine(self, dct, key=None):
         d = self._combined
         independent = dct[INDEP]
-        h = hash_dict(independent)
-        if h not in d:
-            d[h] = {INDEP: independent.copy(), DEP: {}}
-        d[h][DEP].update(dct[DEP])
+        h = combine_key(independent) if key is None else key
+        pos = self._combined_ids.get(h)
+        if pos is None:
+            pos = len(d)
+            self._combined_ids[h] = pos
+            self._keys.append(h)
+            d[h] = {INDEP: independent.copy(), DEP: dct[DEP].copy()}
+        else:
+            d[h][DEP].update(dct[DEP])
+        return pos
 
     def combined(self):
         """List Box data, merging rows with common independent values
@@ -312,18 +1399,97 @@ class Box(list):
         Returns:
             list: A list of the merged data in the Box.
         """
+        self._check()
         d = self._combined
         return [c for key, c in d.items()]
 
+    def _icombined(self, ids):
+        """Generate entries of the combined data by position"""
+        self._check()
+        d = self._combined
+        keys = self._keys
+        for i in ids:
+            yield d[keys[i]]
+
     def _merge(self, box_list):
         """Perform a merge operation"""
-        if isinstance(box_list, self.__class__):
+        if isinstance(box_list, Box):
             box_list = [box_list]
-        for box in box_list:
-            for row in box:
-                row[IND] = len(self)
-                self.append(row)
-                self._combine(row)
+        self.merge_shards(box_list)
+
+    def shard(self):
+        """Return the Box data as a payload for :meth:`merge_shards`
+
+        The payload only holds plain Python objects, so worker processes can
+        return it cheaply. It includes the combined data and the combine
+        keys, so they do not need to be recalculated when merging.
+
+        Returns:
+            dict: The payload.
+        """
+        self._check()
+        codes = self._row_codes()
+        return {
+            "rows": list(self),
+            "keys": self._combine_keys(),
+            "combined": self.combined(),
+            "groups": codes.copy() if np.all(codes >= 0) else None,
+        }
+
+    def merge_shards(self, shards):
+        """Merge many Box instances or shard payloads in one pass
+
+        Args:
+            shards (list): A list of Box instances, payloads from
+            :meth:`shard`, or lists of rows.
+
+        Note:
+            Merged rows get new indexes that follow on from those in this
+            Box. The shards are not changed. Their combined data is merged
+            by combine key, so rows are not hashed again.
+        """
+        with _paused_gc():
+            for shard in shards:
+                if not isinstance(shard, dict):
+                    shard = (
+                        shard.shard() if isinstance(shard, Box) else Box(shard).shard()
+                    )
+                start = len(self)
+                new = Row if self.compact else _row_dict
+                rows = [
+                    new(i, row[INDEP], row[DEP])
+                    for i, row in enumerate(shard["rows"], start)
+                ]
+                self._store(rows)
+                self._merge_shard(shard, rows)
+                for index in self._indexes.values():
+                    for i, row in enumerate(rows, start):
+                        index.add(i, row)
+        self._version += 1
+        self._combined_indexes = {}
+
+    def _merge_shard(self, shard, rows):
+        """Merge the combined data of a shard whose rows have been stored"""
+        d = self._combined
+        ids = self._combined_ids
+        lookup = []
+        for key, entry in zip(shard["keys"], shard["combined"]):
+            pos = ids.get(key)
+            if pos is None:
+                pos = ids[key] = len(d)
+                self._keys.append(key)
+                d[key] = {INDEP: entry[INDEP].copy(), DEP: entry[DEP].copy()}
+            else:
+                d[key][DEP].update(entry[DEP])
+            lookup.append(pos)
+        if len(rows) == 0 or self._codes is None:
+            return
+        start = len(self) - len(rows)
+        if shard["groups"] is None:
+            codes = [ids[combine_key(row[INDEP])] for row in rows]
+        else:
+            codes = np.array(lookup, dtype=np.int64)[shard["groups"]]
+        self._codes.set_many(start, codes)
 
     def merge(self, box, in_place=True):
         """Merge this Box with one or more other Box instances
@@ -364,72 +1530,212 @@ class Box(list):
             in a given index for the data from that index to be counted.
         """
         keys = listify(keys)
-        combined = self.combined() if combine else self
-        filtered = self.filtered(keys, lst=combined)
-        labels = "dict" if indep_keys is not None else labels
+        n = len(self._combine_keys()) if combine else len(self)
+        if n == 0:
+            raise ValueError("No rows in list")
+        width = len(keys)
+        if indep_keys is not None:
+            width += len(indep_keys)
+        elif labels is not None and labels is not False:
+            width += 1
+        out = [[] for i in range(width)]
+        for tup in self.ivectors(keys, dct, labels, combine, indep_keys):
+            for lst, v in zip(out, tup):
+                lst.append(v)
+        return tuple(out)
+
+    def ivectors(self, keys, dct=None, labels="str", combine=True, indep_keys=None):
+        """Generate the dependent data for each entry where all keys are present
+
+        Args:
+            keys (list[Variable]): The list of keys to return values for.
+            dct (dict): A dictionary of key-value pairs that must be
+            present in all entries.
+            labels (str): 'str' to return labels as strings, or 'dict' to
+            return labels as dictionaries of key-value pairs. Use None or
+            False to not return labels.
+            combine (bool): True (default) to combine box rows that have
+            the same set of independent variables
+            indep_keys (list): Optional. If given, labels are not returned.
+            Instead, the values of each independent key are returned after
+            those for keys.
+
+        Yields:
+            tuple: The value of each key for an entry, followed by its label
+            if labels is not False or None.
+
+        Note:
+            This is a lazy version of :meth:`vectors`. Entries are found from
+            the indexes and are only built as they are needed, so the
+            combined data and the output lists are not held in memory.
+        """
+        keys = listify(keys)
+        ids = self.filter_ids(keys, combined=combine)
+
+        def entries():
+            if combine:
+                return self._icombined(ids)
+            return (self._row(i) for i in ids)
+
+        rows = entries()
         if dct is not None:
-            filtered = self.where(dct, filtered)
-        out = {k: [] for k in keys}
-        label_list = []
-        for dct in filtered:
-            indep = dct[INDEP].copy()
-            keys_to_find = []
-            for k in keys:
-                if k in indep:
-                    out[k].append(indep.pop(k))
-                else:
-                    keys_to_find.append(k)
-            if labels == "str":
-                label = dict_to_str(indep, val_sep="=", key_sep=", ")
-            else:
-                label = indep
-            label_list.append(label)
-            dep = dct[DEP]
-            for k in keys_to_find:
-                out[k].append(dep[k])
-        lst_out = [out[k] for k in keys]
-        if labels is not None and labels is not False:
-            if indep_keys is None:
-                lst_out.append(label_list)
-            else:
-                for k in indep_keys:
-                    lst_out.append([d[k] for d in label_list])
-        return tuple(lst_out)
+            rows = self._ifilter(dct, entries)
+        for row in rows:
+            indep = row[INDEP].copy()
+            dep = row[DEP]
+            values = [indep.pop(k) if k in indep else dep[k] for k in keys]
+            if indep_keys is not None:
+                values += [indep[k] for k in indep_keys]
+            elif labels == "str":
+                values.append(dict_to_str(indep, val_sep="=", key_sep=", "))
+            elif labels is not None and labels is not False:
+                values.append(indep)
+            yield tuple(values)
+
+    def _ifilter(self, dct, entries):
+        """Lazily filter entries that contain key-value pairs
 
-    def grouped(self, keys, labels="dict", as_dicts=False):
-        """Return lists of values grouped by other independent variables"""
+        Args:
+            dct (dict): The key-value pairs, or conditions, as for
+            :meth:`where`.
+            entries (callable): A function that returns a new iterator over
+            the entries. Conditions such as 'nearest' take an extra pass.
+
+        Returns:
+            iterator: The filtered entries.
+        """
 
-        # TODO: This seems method unnecessarily complex
+        def get(d, k):
+            return d[INDEP].get(k, d[DEP].get(k, None))
 
+        return filter(_entry_filter(dct, get, entries), entries())
+
+    def grouped(self, keys, labels="dict", as_dicts=False):
+        """Return lists of values grouped by other independent variables
+
+        Note:
+            See :meth:`groupby` to aggregate numeric values by group.
+        """
         combined = self.combined()
-        filtered = self.filtered(keys, lst=combined)
-        out = {}
-        for dct in filtered:
-            d_labels = dct[INDEP].copy()
-            d = {}
-            keys_copy = keys.copy()
+        if len(combined) == 0:
+            raise ValueError("No rows in list")
+        values = {k: [] for k in keys}
+        remaining = []
+        for i in self.filter_ids(keys, combined=True):
+            dct = combined[i]
+            indep = dct[INDEP]
+            remaining.append({k: v for k, v in indep.items() if k not in values})
             for k in keys:
-                if k in d_labels:
-                    d[k] = d_labels.pop(k)
-                elif k in dct[DEP]:
-                    d[k] = dct[DEP][k]
-            hsh = hash_dict(d_labels)
-            if hsh not in out:
-                f_labels = dict_to_str(d_labels) if labels == "str" else d_labels
-                out[hsh] = {"labels": f_labels, "values": {k: [] for k in keys_copy}}
-            d_values = out[hsh]["values"]
-            for k in keys_copy:
-                d_values[k].append(d[k])
+                values[k].append(indep[k] if k in indep else dct[DEP][k])
+        if len(remaining) == 0:
+            return []
+        codes, _ = factorize(combine_key(d) for d in remaining)
+        out = []
+        for ids in np.split(
+            np.argsort(codes, kind="stable"), np.cumsum(np.bincount(codes))[:-1]
+        ):
+            d_labels = remaining[ids[0]]
+            f_labels = dict_to_str(d_labels) if labels == "str" else d_labels
+            d_values = {k: [values[k][i] for i in ids] for k in keys}
+            out.append({"labels": f_labels, "values": d_values})
         if as_dicts:
-            return list(out.values())
+            return out
         else:
             lst = []
-            for group in out.values():
+            for group in out:
                 row = [v for v in group["values"].values()]
                 row.append(group["labels"])
                 lst.append(row)
             return lst
 
+    def groupby(self, keys, combine=True):
+        """Group entries by the values of some keys
+
+        Args:
+            keys (list[Variable]): The keys to group by
+            combine (bool): True (default) to group the combined data,
+            or False to group the Box rows.
+
+        Returns:
+            GroupBy: The groups. Use its `agg` method to aggregate values,
+            e.g. `box.groupby('a').agg({'c': ['mean', 'max']})`.
+        """
+        self._check()
+        keys = listify(keys)
+        if combine:
+            return GroupBy(self._projected, len(self._combine_keys()), keys)
+        return GroupBy(self._column, len(self), keys)
+
+    def aggregate(self, values, by, funcs="mean", combine=True, as_dataframe=False):
+        """Aggregate values within groups, using numpy
+
+        Args:
+            values (list[Variable]): The keys of the values to aggregate
+            by (list[Variable]): The keys to group by
+            funcs (str): An aggregation function, or a list of them. They
+            can be 'count', 'sum', 'mean', 'min', 'max', 'std', 'var',
+            'first', 'last', 'median', or a percentile such as 'p90'.
+            combine (bool): True (default) to aggregate the combined data,
+            or False to aggregate the Box rows.
+            as_dataframe (bool): If True, return a pandas DataFrame indexed
+            by the group keys.
+
+        Returns:
+            dict: A dictionary of arrays, with one element per group. It has
+            an array of the labels for each key in by, followed by an array
+            for each aggregation. If funcs is a string, aggregations are
+            named by their key. Otherwise, they are named 'key_function'.
+
+        Note:
+            The values come from cached columns, and all groups are reduced
+            at once, so this is much faster than :func:`table.tabulate` for
+            scalar values. Entries without a value for every key in by are
+            left out.
+        """
+        groups = self.groupby(by, combine=combine)
+        out = groups.agg({k: funcs for k in listify(values)})
+        if as_dataframe:
+            import pandas as pd
+
+            return pd.DataFrame(out).set_index(listify(by))
+        return out
+
+    def _projected(self, key):
+        """Return the values and mask of a key in the combined data
+
+        None values are masked out, as for the Box rows, so that they do not
+        take part in aggregations.
+        """
+        values, mask = self.projection([key])[key]
+        if values.dtype.kind == "O":
+            values, mask = _typed(values, mask)
+            values = _fill_missing(values, mask)
+        return values, mask
+
+    def _combined_column(self, key):
+        """Return an array of values for a key in the combined data
+
+        Returns:
+            tuple: The values, one for each entry in the combined data, and a
+            mask of the entries that have a value. As for :meth:`minimal`,
+            dependent values take precedence over independent ones, and None
+            is a value.
+        """
+        ids = []
+        values = []
+        for i, d in enumerate(self._combined.values()):
+            dct = d[DEP] if key in d[DEP] else d[INDEP]
+            if key in dct:
+                ids.append(i)
+                values.append(dct[key])
+        arr = as_array(values, exact=True)
+        n = len(self._combined)
+        out = np.zeros(n, dtype=arr.dtype)
+        out[ids] = arr
+        mask = np.zeros(n, dtype=bool)
+        mask[ids] = True
+        return _fill_missing(out, mask), mask
+
     def find(self, key, lst=None):
         """Return a dictionary of values for the key, by index
 
@@ -440,6 +1746,8 @@ class Box(list):
         Returns:
             dict: A dictionary of values, where keys are the indexes.
         """
+        if lst is None:
+            self._check()
         lst = self if lst is None else lst
         out = {}
         for row in lst:
@@ -449,6 +1757,26 @@ class Box(list):
                 out[row[IND]] = row[INDEP][key]
         return out
 
+    def find_array(self, key):
+        """Return arrays of the indexes and values for a key
+
+        Args:
+            key (Variable): The key to find values for
+
+        Returns:
+            tuple: An array of the index of each row with a value for the key,
+            and an array of the values. The values have a numeric dtype if
+            they are all numbers.
+
+        Note:
+            This is like :meth:`find`, but the values come from a cached
+            column that is extended as data is added, so repeated calls do
+            not scan the rows. Values of None are left out.
+        """
+        values, mask = self._column(key, dep_first=True)
+        ids = np.flatnonzero(mask)
+        return self._row_indexes()[ids], values[ids]
+
     def unique(self, key, lst=None):
         """Return unique key values
 
@@ -458,11 +1786,48 @@ class Box(list):
 
         Returns:
             list: A list of unique values
+
+        Note:
+            The distinct values of each variable are kept up to date as data
+            is added, so this does not scan the rows unless lst is given.
         """
+        if lst is None:
+            index = self._index(DistinctIndex)
+            if index.hashable(key):
+                return index.unique(key)
         d = self.find(key, lst)
         vals = set(d.values())
         return sorted(list(vals))
 
+    def value_counts(self, key):
+        """Return the number of rows with each value of a key
+
+        Args:
+            key (Variable): The key
+
+        Returns:
+            dict: A dictionary of value: count pairs.
+        """
+        index = self._index(DistinctIndex)
+        if not index.hashable(key):
+            raise TypeError("Values for '" + str(key) + "' are not hashable.")
+        return dict(index.counts(key))
+
+    def declare_combinations(self, key_list):
+        """Keep the unique combinations of some keys up to date
+
+        Args:
+            key_list (list[Variable]): A list of variables
+
+        Note:
+            Once a group of keys is declared, :meth:`combinations` for those
+            keys is answered from an index that is updated as data is added,
+            instead of scanning the rows.
+        """
+        group = tuple(key_list)
+        self._key_groups.add(group)
+        self._index(CombinationIndex, group)
+
     def combinations(self, key_list, lst=None):
         """Return unique combinations of keys in the box
 
@@ -473,6 +1838,11 @@ class Box(list):
             list: A list of dictionaries, where each dictionary is a unique
             combination of the keys
         """
+        group = tuple(key_list)
+        if lst is None and group in self._key_groups:
+            index = self._index(CombinationIndex, group)
+            if index.hashable:
+                return [dict(zip(key_list, vals)) for vals in index.unique()]
         lst = self.filtered(key_list, lst)
         tups = [tuple([d[INDEP].get(k, d[DEP].get(k)) for k in key_list]) for d in lst]
         s = set(tups)
@@ -492,7 +1862,7 @@ class Box(list):
 
     def __getitem__(self, keys):
         """Allow easier access to data"""
-        if isinstance(keys, int):
+        if isinstance(keys, (int, np.integer)):
             return super().__getitem__(keys)
         elif isinstance(keys, list):
             return self.vectors(keys)
@@ -503,14 +1873,55 @@ class Box(list):
         elif isinstance(keys, slice):
             return super().__getitem__(keys)
 
-    def copy(self):
-        return Box(deepcopy(self))
+    def copy(self, deep=True):
+        """Return a copy of the Box
+
+        Args:
+            deep (bool): If True (default), copy all the values, including
+            arrays, so the copy is independent of this Box. If False, the
+            copy shares its values with this Box.
+
+        Returns:
+            Box: The copy.
+
+        Note:
+            A copy with deep=False is much faster. Each row gets a new
+            container, but shares its independent and dependent dictionaries
+            and their values. The Box methods replace rows rather than change
+            them in place, so adding or merging data into either Box does not
+            affect the other, and the combined data is cloned rather than
+            recalculated. However, changing a shared dictionary or array in
+            place changes it in both. The copy is of the same class and
+            settings, and rows that have not been checked yet (see
+            :meth:`seal`) are still unchecked.
+        """
+        if deep:
+            out = self._empty()
+            out._add_rows(deepcopy(list(self)))
+        else:
+            out = self._empty()
+            with _paused_gc():
+                out._store([row.copy() for row in self])
+                out._combined = {
+                    key: {INDEP: entry[INDEP], DEP: entry[DEP].copy()}
+                    for key, entry in self._combined.items()
+                }
+            out._combined_ids = self._combined_ids.copy()
+            out._keys = list(self._keys)
+            out._codes = None if self._codes is None else self._codes.copy()
+        out._key_groups = set(self._key_groups)
+        out._unchecked = list(self._unchecked)
+        return out
 
     def copy_shallow(self):
-        return Box(self)
+        """Return a copy of the Box that shares its values with this Box
 
-    def show(self, lst=None):
-        """Format box contents in a concise way"""
+        See :meth:`copy`, with deep=False.
+        """
+        return self.copy(deep=False)
+
+    def _format_rows(self, rows):
+        """Return the lines that format some rows for :meth:`show`"""
 
         def f(v):
             if np.size(v) == 1:
@@ -532,9 +1943,8 @@ class Box(list):
                     buffered.append(l[i].ljust(n))
             return buffered
 
-        lst = self if lst is None else lst
-        out = [IND.ljust(7) + INDEP.ljust(60) + DEP.ljust(60)]
-        for row in lst:
+        out = []
+        for row in rows:
             ind = [str(row[IND])]
             dep = [k + ": " + f(v) for k, v in row[DEP].items()]
             indep = [k + ": " + f(v) for k, v in row[INDEP].items()]
@@ -545,13 +1955,455 @@ class Box(list):
             for a, b, c in zip(ind, indep, dep):
                 out.append(a + b + c)
             out.append("")
+        return out
+
+    def show(self, lst=None, start=None, stop=None):
+        """Format box contents in a concise way
+
+        Args:
+            lst (list): An optional list of rows to show instead of the Box.
+            start (int): The position of the first row to show
+            stop (int): The position after the last row to show
+
+        Returns:
+            str: The formatted rows.
+
+        Note:
+            Only the rows from start to stop are formatted, so showing a page
+            of a large Box takes time in proportion to the page size.
+        """
+        if lst is None:
+            positions = range(*slice(start, stop).indices(len(self)))
+            rows = (self._row(i) for i in positions)
+        elif start is None and stop is None:
+            rows = lst
+        else:
+            rows = lst[start:stop]
+        out = [IND.ljust(7) + INDEP.ljust(60) + DEP.ljust(60)]
+        return "\n".join(out + self._format_rows(rows))
+
+    def pages(self, size=25):
+        """Generate the formatted box contents, one page at a time
+
+        Args:
+            size (int): The number of rows in each page
+
+        Yields:
+            str: The formatted rows of a page, as for :meth:`show`.
+        """
+        for start in range(0, len(self), size):
+            yield self.show(start=start, stop=start + size)
+
+    def summary(self):
+        """Return a short description of the Box and its keys
+
+        The description comes from the key registry, so it does not scan the
+        rows once the registry has been built.
+        """
+        n = len(self)
+        out = [
+            self.__class__.__name__
+            + " with "
+            + str(n)
+            + " rows ("
+            + str(len(self._keys))
+            + " combined)"
+        ]
+        if len(self._unchecked) > 0:
+            out.append(str(len(self._unchecked)) + " rows are not checked yet")
+            return "\n".join(out)
+        index = self._index(KeyIndex)
+        for name, independent in [(INDEP, True), (DEP, False)]:
+            keys = index.keys(dependent=not independent, independent=independent)
+            described = []
+            for k in sorted(keys, key=str)[: self._SUMMARY_KEYS]:
+                info = index.info(k)
+                if info["kind"] == "array":
+                    desc = "array " + str(info["shape"]) + " " + str(info["dtype"])
+                else:
+                    desc = str(
+                        info["kind"] if info["kind"] != "scalar" else info["dtype"]
+                    )
+                described.append(str(k) + " (" + desc + ")")
+            if len(keys) > self._SUMMARY_KEYS:
+                described.append("...")
+            out.append(name + ": " + ", ".join(described))
         return "\n".join(out)
 
     def __str__(self):
-        return self.show()
+        return repr(self)
 
     def __repr__(self):
-        return self.show()
+        n = len(self)
+        k = self._REPR_ROWS
+        if n <= 2 * k:
+            body = self.show(start=0, stop=n)
+        else:
+            lines = self._format_rows(self._row(i) for i in range(n - k, n))
+            omitted = "... " + str(n - 2 * k) + " more rows ..."
+            body = "\n".join([self.show(start=0, stop=k), omitted, ""] + lines)
+        return body + "\n" + self.summary()
+
+    def keys(self, dependent=True, independent=False):
+        """Return a set of the keys in the Box
+
+        Args:
+            dependent (bool): Include the dependent keys
+            independent (bool): Include the independent keys
+
+        Returns:
+            set: The keys present in the box
+
+        Note:
+            The keys are kept up to date as data is added, so this does not
+            scan the rows.
+        """
+        return self._index(KeyIndex).keys(dependent, independent)
+
+    def key_info(self, key):
+        """Return a summary of a key and its values
+
+        Args:
+            key (Variable): The key
+
+        Returns:
+            dict: The number of rows with the key as an 'independent' and as
+            a 'dependent' variable, the 'kind' of values ('scalar', 'array',
+            'mixed', or None if all values are None), their 'shape' (None if
+            it varies) and their numpy 'dtype'.
+        """
+        return self._index(KeyIndex).info(key)
+
+    def _key_names(self):
+        """Return a list of the keys in the order they were first added"""
+        return self._index(KeyIndex).names()
+
+    def _export_columns(self, keys, combine):
+        """Return the (values, mask) columns to export for some keys"""
+        self._check()
+        keys = self._key_names() if keys is None else listify(keys)
+        if combine:
+            return self.projection(keys)
+        out = {IND: (self._row_indexes(), np.ones(len(self), dtype=bool))}
+        for k in keys:
+            out[k] = self._raw_column(k)
+        return out
+
+    def to_numpy(self, keys=None, combine=False):
+        """Return the data as a dictionary of numpy arrays
+
+        Args:
+            keys (list[Variable]): The keys to export. If None, all keys are
+            exported.
+            combine (bool): If True, export the combined data. Otherwise
+            (default), export the rows, with the index of each row.
+
+        Returns:
+            dict: A dictionary of (values, mask) tuples, one for each key.
+            The mask is True where there is a value. Values that are arrays
+            of the same shape are stacked into one array.
+
+        Note:
+            The arrays are read-only, and typed columns share their buffers
+            with the Box, so export does not copy them. Rows added later do
+            not appear in exported arrays.
+        """
+        return export.to_numpy(self._export_columns(keys, combine))
+
+    def to_arrow(self, keys=None, combine=False):
+        """Return the data as a pyarrow Table
+
+        Args:
+            keys (list[Variable]): The keys to export. If None, all keys are
+            exported.
+            combine (bool): If True, export the combined data. Otherwise
+            (default), export the rows, with the index of each row.
+
+        Returns:
+            pyarrow.Table: A table with a column for each key, with nulls
+            for missing values. Values that are 1D arrays, including ragged
+            ones, become list arrays.
+
+        Note:
+            This requires pyarrow.
+        """
+        return export.to_arrow(self._export_columns(keys, combine))
+
+    def to_dataframe(self, keys=None, combine=False):
+        """Return the data as a pandas DataFrame
+
+        Args:
+            keys (list[Variable]): The keys to include. If None, all keys are
+            included.
+            combine (bool): If True, use the combined data. Otherwise
+            (default), use the rows, indexed by the index of each row.
+
+        Returns:
+            DataFrame: A DataFrame with a column for each key, named by the
+            key string. Integers and booleans with missing values use
+            nullable dtypes, and missing floats are NaN. Object columns are
+            only used for strings, arrays and other objects. The names of
+            the independent keys are listed in `df.attrs['independent']`.
+
+        Note:
+            This builds each column from the cached columns of the Box, so
+            it is much faster than `pd.DataFrame(box.minimal())`.
+        """
+        columns = self._export_columns(keys, combine)
+        index = None
+        if not combine:
+            index = columns.pop(IND)[0]
+        independent = self.keys(dependent=False, independent=True)
+        df = export.to_dataframe(columns, index, independent)
+        if index is not None:
+            df.index.name = IND
+        return df
+
+    @classmethod
+    def from_dataframe(cls, df, independent=None, store=None):
+        """Create a new Box from a pandas DataFrame
+
+        Args:
+            df (DataFrame): The DataFrame, with a column for each key.
+            independent (list): The names of the independent columns. If
+            None, the names recorded by :meth:`to_dataframe` are used.
+            store (Store): An optional Store. Columns named by the key of one
+            of its Variables are added under that Variable.
+
+        Returns:
+            Box: A new Box, with an entry for each row of the DataFrame.
+            Missing values (None, NaN or NA) are left out of the entries.
+
+        Note:
+            The DataFrame index is not kept. Columns are added at once with
+            :meth:`add_many`, so no dictionaries are made for each row.
+        """
+        indep, dep, masks = export.dataframe_columns(df, independent, store)
+        box = cls()
+        box.add_many(indep, dep, masks)
+        return box
+
+
+class ColumnBox(Box):
+    """A Box that stores its data in numpy columns
+
+    A ColumnBox has the same interface as a Box, but it does not keep a
+    dictionary for each row. Instead, independent and dependent values are
+    held in one typed numpy column per variable, with a presence mask. Only
+    values that cannot go in a typed column (e.g. arrays and strings) are
+    kept in object columns. Rows are recreated as dictionaries when they are
+    accessed.
+
+    Args:
+        lst (list): Optional data to initially populate the ColumnBox instance.
+
+    Note:
+        Rows cannot be modified in place. Recreated rows list their keys in
+        the order that each variable was first added to the box.
+
+        For scalar data, a ColumnBox uses about 5-8x less memory than a Box,
+        rather than an order of magnitude. Besides the columns, it keeps a
+        combine key for each distinct set of independent values, so the
+        saving is smallest when each row has its own. For example, with
+        100k rows of 2 independent and 20 dependent scalars, it uses 52 MB
+        instead of 351 MB with unique independent values, and 29 MB instead
+        of 242 MB when they take 1000 distinct values.
+    """
+
+    def __init__(self, lst=None, trusted=False):
+        super().__init__(trusted=trusted, compact=False)
+        self._ind = Column("i")
+        self._indep = Columns()
+        self._dep = Columns()
+        self._codes = Column("i")
+        self._groups = {}
+        if lst is not None:
+            self._add_rows(list(lst))
+
+    def _store(self, rows):
+        if len(rows) == 1:
+            row = rows[0]
+            self._ind.set(len(self), row[IND])
+            self._indep.append(row[INDEP])
+            self._dep.append(row[DEP])
+        elif len(rows) > 1:
+            self._ind.set_many(len(self), as_array([row[IND] for row in rows]))
+            self._indep.extend_rows([row[INDEP] for row in rows])
+            self._dep.extend_rows([row[DEP] for row in rows])
+
+    def append(self, row):
+        """Append a row
+
+        Args:
+            row (dict): A dictionary with index, independent and dependent
+            entries.
+        """
+        self._add_rows([row])
+
+    def extend(self, rows):
+        """Append rows"""
+        self._add_rows(list(rows))
+
+    def __iadd__(self, rows):
+        self.extend(rows)
+        return self
+
+    def _unsupported(self, *args, **kwargs):
+        raise TypeError("ColumnBox rows cannot be modified in place.")
+
+    insert = pop = remove = clear = sort = reverse = _unsupported
+    __setitem__ = __delitem__ = __imul__ = _unsupported
+
+    def _combine(self, dct, key=None):
+        h = combine_key(dct[INDEP]) if key is None else key
+        return self._group(h)
+
+    def _group(self, key):
+        """Return the code for a combine key, adding it if needed"""
+        code = self._groups.get(key)
+        if code is None:
+            code = self._groups[key] = len(self._keys)
+            self._keys.append(key)
+        return code
+
+    def _rebuild(self):
+        self._version += 1
+        self._groups = {}
+        self._keys = []
+        self._indexes = {}
+        self._combined_indexes = {}
+        self._codes.set_many(0, [self._combine(row) for row in self])
+
+    def _replace_row(self, i, row):
+        for cols, subkey in [(self._indep, INDEP), (self._dep, DEP)]:
+            for k, v in row[subkey].items():
+                cols._column(k, v).set(i, v)
+
+    def _merge_shard(self, shard, rows):
+        if len(rows) == 0:
+            return
+        start = len(self) - len(rows)
+        if shard["groups"] is None:
+            codes = [self._combine(row) for row in rows]
+        else:
+            lookup = [self._group(k) for k in shard["keys"]]
+            codes = np.array(lookup, dtype=np.int64)[shard["groups"]]
+        self._codes.set_many(start, codes)
+
+    def _empty(self):
+        return self.__class__(trusted=self.trusted)
+
+    def _raw_column(self, key, dep_first=False):
+        n = len(self)
+        found = []
+        order = [self._dep, self._indep] if dep_first else [self._indep, self._dep]
+        for cols in order:
+            if key in cols:
+                values, mask = cols.values(key)
+                if values.dtype.kind == "O":
+                    values, mask = _typed(values, mask)
+                found.append((values, mask))
+        if len(found) == 0:
+            return np.zeros(n), np.zeros(n, dtype=bool)
+        values, mask = found[0]
+        if len(found) == 2:
+            (values, mask), (other, other_mask) = found
+            if "O" in (values.dtype.kind, other.dtype.kind):
+                values, other = values.astype(object), other.astype(object)
+            values = np.where(mask, values, other)
+            mask = mask | other_mask
+        return values, mask
+
+    def _row_indexes(self):
+        return self._ind.values(len(self))[0]
+
+    def _fill_index(self, index):
+        if not hasattr(index, "add_columns"):
+            return super()._fill_index(index)
+        indep = {k: self._indep.values(k) for k in self._indep.keys()}
+        dep = {k: self._dep.values(k) for k in self._dep.keys()}
+        index.add_columns(0, indep, dep)
+
+    def _fill_combined_index(self, index):
+        if not hasattr(index, "add_columns"):
+            return super()._fill_combined_index(index)
+        index.add_columns(0, *self._cached("combined", self._combined_columns))
+
+    def _combined_columns(self):
+        """Return the columns of the combined data
+
+        Returns:
+            tuple: Dictionaries of (values, mask) tuples for the independent
+            and the dependent variables, with an element for each entry in
+            the combined data.
+        """
+        codes, _ = self._codes.values(len(self))
+        n = len(self._groups)
+        order, bounds = _group_bounds(codes, n)
+        # Rows with the same combine key have the same independent values
+        first = order[bounds[:-1]]
+        indep = {}
+        for k in self._indep.keys():
+            values, mask = self._indep.values(k)
+            indep[k] = (values[first], mask[first])
+        dep = {}
+        for k in self._dep.keys():
+            values, mask = self._dep.values(k)
+            dep[k] = _last_in_group(values, mask, codes, n)
+        return indep, dep
+
+    def _combined_column(self, key):
+        indep, dep = self._cached("combined", self._combined_columns)
+        found = [cols[key] for cols in (dep, indep) if key in cols]
+        if len(found) == 0:
+            n = len(self._groups)
+            return np.zeros(n), np.zeros(n, dtype=bool)
+        values, mask = found[0]
+        if len(found) == 2:
+            (values, mask), (other, other_mask) = found
+            if values.dtype != other.dtype:
+                values, other = values.astype(object), other.astype(object)
+            values = np.where(mask, values, other)
+            mask = mask | other_mask
+        return _fill_missing(values, mask), mask
+
+    def _row(self, i):
+        return {
+            IND: self._ind.get(i),
+            INDEP: self._indep.row(i),
+            DEP: self._dep.row(i),
+        }
+
+    def _add_columns(self, indep, dep, n, keys, groups, masks=None):
+        start = len(self)
+        self._ind.set_many(start, np.arange(start, start + n))
+        self._indep.extend(indep, n, masks)
+        self._dep.extend(dep, n, masks)
+        codes = [self._group(h) for h in keys]
+        self._codes.set_many(start, np.array(codes, dtype=np.int64)[groups])
+        self._version += 1
+        self._indexes = {}
+        self._combined_indexes = {}
+
+    def combined(self):
+        """List Box data, merging rows with common independent values
+
+        Returns:
+            list: A list of the merged data in the Box.
+        """
+        return list(self._icombined(range(len(self._groups))))
+
+    def _icombined(self, ids):
+        self._check()
+        indep, dep = self._cached("combined", self._combined_columns)
+        ids = np.asarray(ids, dtype=np.int64)
+        # Build the entries in chunks, from lists of values for each key
+        for start in range(0, len(ids), _CHUNK):
+            chunk = ids[start : start + _CHUNK]
+            indeps = _chunk_dicts(indep, chunk)
+            deps = _chunk_dicts(dep, chunk)
+            for d_indep, d_dep in zip(indeps, deps):
+                yield {INDEP: d_indep, DEP: d_dep}
 
     def keys(self, dependent=True, independent=False):
         """Return a set of the keys in the Box
@@ -563,10 +2415,396 @@ class Box(list):
         Returns:
             set: The keys present in the box
         """
+        self._check()
         out = set()
-        for row in self:
-            if independent:
-                out.update(row[INDEP].keys())
-            if dependent:
-                out.update(row[DEP].keys())
+        if independent:
+            out.update(self._indep.keys())
+        if dependent:
+            out.update(self._dep.keys())
         return out
+
+    def _key_names(self):
+        return list(dict.fromkeys([*self._indep.keys(), *self._dep.keys()]))
+
+    def __len__(self):
+        return self._indep.n
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._row(i)
+
+    def __reversed__(self):
+        for i in reversed(range(len(self))):
+            yield self._row(i)
+
+    def __contains__(self, row):
+        return any(r == row for r in self)
+
+    def __eq__(self, other):
+        if not isinstance(other, list):
+            return NotImplemented
+        return list(self) == list(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __getitem__(self, keys):
+        """Allow easier access to data"""
+        if isinstance(keys, (int, np.integer)):
+            n = len(self)
+            if not -n <= keys < n:
+                raise IndexError("ColumnBox index out of range")
+            return self._row(keys % n)
+        elif isinstance(keys, slice):
+            return [self._row(i) for i in range(*keys.indices(len(self)))]
+        return super().__getitem__(keys)
+
+    def __reduce__(self):
+        return (self.__class__, (), self.__getstate__())
+
+    def copy(self, deep=True):
+        if deep:
+            return deepcopy(self)
+        out = self._empty()
+        out._ind = self._ind.copy()
+        out._indep = self._indep.copy()
+        out._dep = self._dep.copy()
+        out._codes = self._codes.copy()
+        out._groups = self._groups.copy()
+        out._keys = list(self._keys)
+        out._key_groups = set(self._key_groups)
+        out._unchecked = list(self._unchecked)
+        return out
+
+    copy.__doc__ = Box.copy.__doc__
+
+    @property
+    def nbytes(self):
+        """The number of bytes used by the column buffers"""
+        cols = [self._ind, self._codes]
+        return sum(c.nbytes for c in cols) + self._indep.nbytes + self._dep.nbytes
+
+
+class CombinedBox(Box):
+    """A Box that only keeps the combined data
+
+    A CombinedBox has the same interface as a Box, but each entry that is
+    added is merged straight away into the entry with the same independent
+    values, instead of being kept as a separate row. So, the rows of a
+    CombinedBox are the combined data, and each value is only held once.
+
+    Args:
+        lst (list): Optional data to initially populate the CombinedBox.
+        provenance (bool): If True, record which combined entry each added
+        row was merged into. See :meth:`sources`.
+
+    Note:
+        Row indexes are the positions of the combined entries. Merging into
+        an existing entry updates the indexes for that entry only. Rows
+        cannot be modified in place.
+    """
+
+    def __init__(self, lst=None, provenance=False):
+        self.provenance = provenance
+        self._sources = Column("i")
+        self._added = 0
+        super().__init__(lst)
+
+    def append(self, row):
+        """Append a row, merging it into the combined data"""
+        self._add_rows([row])
+
+    def extend(self, rows):
+        """Append rows, merging them into the combined data"""
+        self._add_rows(list(rows))
+
+    def __iadd__(self, rows):
+        self.extend(rows)
+        return self
+
+    def _unsupported(self, *args, **kwargs):
+        raise TypeError("CombinedBox rows cannot be modified in place.")
+
+    insert = pop = remove = clear = sort = reverse = _unsupported
+    __setitem__ = __delitem__ = __imul__ = _unsupported
+
+    def _new_entry(self, key, indep, dep):
+        """Store a new combined entry and return its position
+
+        The row and the combined data share the independent and dependent
+        dictionaries, so values are only held once.
+        """
+        pos = self._combined_ids[key] = len(self._keys)
+        self._keys.append(key)
+        self._combined[key] = {INDEP: indep, DEP: dep}
+        list.append(self, _row_dict(pos, indep, dep))
+        return pos
+
+    def _add_rows(self, rows, keys=None):
+        self._version += 1
+        start = len(self)
+        keys = [None] * len(rows) if keys is None else keys
+        ids = self._combined_ids
+        d = self._combined
+        indexed = len(self._indexes) > 0 or len(self._combined_indexes) > 0
+        changed = {}
+        positions = []
+        with _paused_gc():
+            for row, key in zip(rows, keys):
+                h = combine_key(row[INDEP]) if key is None else key
+                pos = ids.get(h)
+                if pos is None:
+                    pos = self._new_entry(h, row[INDEP].copy(), row[DEP].copy())
+                else:
+                    dep = d[h][DEP]
+                    if indexed and pos < start and pos not in changed:
+                        # Keep the old values to remove from the indexes
+                        changed[pos] = dep.copy()
+                    dep.update(row[DEP])
+                positions.append(pos)
+        if self.provenance and len(positions) > 0:
+            self._sources.set_many(self._added, positions)
+        self._added += len(positions)
+        for pos, dep in changed.items():
+            entry = d[self._keys[pos]]
+            for index in self._indexes.values():
+                index.remove(pos, _row_dict(pos, entry[INDEP], dep))
+                index.add(pos, self._row(pos))
+            for index in self._combined_indexes.values():
+                index.remove(pos, {INDEP: entry[INDEP], DEP: dep})
+                index.add(pos, entry)
+        for index in self._indexes.values():
+            for i in range(start, len(self)):
+                index.add(i, self._row(i))
+        for index in self._combined_indexes.values():
+            for i in range(start, len(self)):
+                index.add(i, d[self._keys[i]])
+        return positions
+
+    def _add_columns(self, indep, dep, n, keys, groups, masks=None):
+        # Each row is merged in turn, so that provenance can be recorded
+        with _paused_gc():
+            indeps = _column_dicts(indep, n, masks)
+            deps = _column_dicts(dep, n, masks)
+            rows = [_row_dict(None, a, b) for a, b in zip(indeps, deps)]
+            self._add_rows(rows, [keys[g] for g in groups.tolist()])
+
+    def _row_codes(self):
+        return np.arange(len(self), dtype=np.int64)
+
+    def _empty(self):
+        return self.__class__(provenance=self.provenance)
+
+    def merge_shards(self, shards):
+        """Merge many Box instances or shard payloads in one pass
+
+        Args:
+            shards (list): A list of Box instances, payloads from
+            :meth:`shard`, or lists of rows.
+
+        Note:
+            The combined data of each shard is merged by combine key. If
+            provenance is recorded, the rows of each shard are merged
+            instead, so that each is recorded.
+        """
+        for shard in shards:
+            if not isinstance(shard, dict):
+                shard = shard.shard() if isinstance(shard, Box) else Box(shard).shard()
+            if self.provenance:
+                groups = shard["groups"]
+                keys = shard["keys"]
+                if groups is not None:
+                    keys = [keys[g] for g in groups.tolist()]
+                else:
+                    keys = None
+                self._add_rows(list(shard["rows"]), keys)
+            else:
+                self._add_rows(list(shard["combined"]), shard["keys"])
+
+    def sources(self, i=None):
+        """Return the rows that were merged into each combined entry
+
+        Args:
+            i (int): The position of an entry. If None, return the rows for
+            all entries.
+
+        Returns:
+            ndarray: The ids of the rows merged into entry i, in the order
+            they were added, where the first row added has an id of 0. If i
+            is None, a list of arrays with one for each entry is returned.
+
+        Raises:
+            ValueError: If provenance is not recorded.
+        """
+        if not self.provenance:
+            raise ValueError("Provenance is not recorded for this CombinedBox.")
+        codes = self._sources.values(self._added)[0]
+        if i is not None:
+            return np.flatnonzero(codes == i)
+        order, bounds = _group_bounds(codes, len(self))
+        return [order[bounds[g] : bounds[g + 1]] for g in range(len(self))]
+
+    def copy(self, deep=True):
+        """Return a copy of the CombinedBox
+
+        Args:
+            deep (bool): If True (default), copy all the values, including
+            arrays. Otherwise, the copy shares its values with this Box.
+
+        Returns:
+            CombinedBox: The copy.
+        """
+        self._check()
+        out = self._empty()
+        if deep:
+            out._add_rows(deepcopy(list(self)), list(self._keys))
+        else:
+            with _paused_gc():
+                for key, row in zip(self._keys, self):
+                    out._new_entry(key, row[INDEP], row[DEP].copy())
+        out._sources = self._sources.copy()
+        out._added = self._added
+        out._key_groups = set(self._key_groups)
+        return out
+
+
+class SpillBox(Box):
+    """A Box that moves array values to disk to stay within a memory budget
+
+    A SpillBox has the same interface as a Box. When the array values held
+    in memory exceed the budget, they are written to a scratch file and
+    replaced by memory-mapped views of it. The views are numpy arrays, so
+    queries, vectors, find, and saving work as before, and the operating
+    system reads the data back in when it is needed. Rows, scalar values
+    and indexes stay in memory.
+
+    Args:
+        lst (list): Optional data to initially populate the SpillBox.
+        budget (int): The number of bytes of array values to keep in memory.
+        directory (str): The directory for scratch files. If None, the
+        system temporary directory is used.
+
+    Note:
+        Only dependent values that are numeric arrays of at least
+        `_SPILL_BYTES` bytes are spilled. Spilled arrays are copy-on-write,
+        so changing them in place does not change the scratch file.
+    """
+
+    _SPILL_BYTES = 1024
+
+    def __init__(self, lst=None, budget=2**30, directory=None):
+        self.budget = budget
+        self.directory = directory
+        self._scratch = spill.Scratch(directory)
+        self._resident = []
+        self._resident_bytes = 0
+        super().__init__(lst)
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        del state["_scratch"]
+        state["_resident"] = []
+        state["_resident_bytes"] = 0
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        # Spilled arrays are unpickled into memory, so track them again
+        self._scratch = spill.Scratch(self.directory)
+        self._track(range(len(self)))
+
+    def _empty(self):
+        return self.__class__(budget=self.budget, directory=self.directory)
+
+    def _add_rows(self, rows, keys=None):
+        start = len(self)
+        positions = super()._add_rows(rows, keys)
+        self._track(range(start, len(self)))
+        return positions
+
+    def _track(self, ids):
+        """Record the array values of rows, and spill if over budget
+
+        Args:
+            ids (iterable): The positions of the rows
+        """
+        resident = self._resident
+        for i in ids:
+            for k, v in self._row(i)[DEP].items():
+                if spill.spillable(v) and v.nbytes >= self._SPILL_BYTES:
+                    resident.append((i, k, v))
+                    self._resident_bytes += v.nbytes
+        if self._resident_bytes > self.budget:
+            self.spill()
+
+    def _add_columns(self, indep, dep, n, keys, groups, masks=None):
+        start = len(self)
+        super()._add_columns(indep, dep, n, keys, groups, masks)
+        self._track(range(start, len(self)))
+
+    def merge_shards(self, shards):
+        start = len(self)
+        super().merge_shards(shards)
+        self._track(range(start, len(self)))
+
+    merge_shards.__doc__ = Box.merge_shards.__doc__
+
+    def copy(self, deep=True):
+        out = super().copy(deep)
+        if not deep:
+            # The copy shares the arrays that are still in memory
+            out._track(range(len(out)))
+        return out
+
+    copy.__doc__ = Box.copy.__doc__
+
+    def spill(self):
+        """Move the array values held in memory to the scratch file
+
+        Note:
+            Rows with spilled values get new dependent dictionaries, so
+            dictionaries shared with copies of the Box, or with the rows
+            that were added, are not changed. Cached columns of values are
+            discarded, so that they do not keep the arrays in memory.
+        """
+        n = len(self)
+        resident = [
+            (i, k, v)
+            for i, k, v in self._resident
+            if i < n and self._row(i)[DEP].get(k) is v
+        ]
+        self._resident = []
+        self._resident_bytes = 0
+        if len(resident) == 0:
+            return
+        views = self._scratch.write([v for i, k, v in resident])
+        replace = {}
+        rows = {}
+        for (i, k, v), view in zip(resident, views):
+            rows.setdefault(i, {})[k] = view
+            replace[id(v)] = view
+        for i, new in rows.items():
+            row = self._row(i)
+            dep = dict(row[DEP])
+            dep.update(new)
+            self._replace_row(i, _row_dict(row[IND], row[INDEP], dep))
+        # The combined data refers to the same arrays
+        for entry in self._combined.values():
+            dep = entry[DEP]
+            for k, v in dep.items():
+                view = replace.get(id(v))
+                if view is not None:
+                    dep[k] = view
+        self._indexes.pop(ColumnIndex, None)
+        self._combined_indexes.pop(ColumnIndex, None)
+        self._projections = {}
+
+    @property
+    def resident_bytes(self):
+        """The number of bytes of array values that are held in memory"""
+        return self._resident_bytes
+
+    @property
+    def spilled_bytes(self):
+        """The number of bytes of array values in the scratch file"""
+        return self._scratch.nbytes
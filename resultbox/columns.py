@@ -0,0 +1,357 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 09:12:40 2026
+
+@author: Reuben
+
+Columnar storage for Box data. Instead of keeping a dictionary for every row,
+each variable gets its own numpy column. Scalars are stored in typed columns
+(bool, int64, float64 or complex128) and anything else, such as strings and
+arrays, lives in an object column. A boolean mask records which rows have a
+value for the variable.
+
+"""
+
+import numpy as np
+
+_MIN_CAPACITY = 16
+
+DTYPES = {
+    "b": np.bool_,
+    "i": np.int64,
+    "f": np.float64,
+    "c": np.complex128,
+    "O": object,
+}
+
+
+def kind_of(value):
+    """Return the column kind that suits a value
+
+    Args:
+        value: Any value
+
+    Returns:
+        str: 'b' (bool), 'i' (integer), 'f' (float), 'c' (complex) or
+        'O' (object).
+    """
+    if isinstance(value, (bool, np.bool_)):
+        return "b"
+    elif isinstance(value, (int, np.integer)):
+        return "i"
+    elif isinstance(value, (float, np.floating)):
+        return "f"
+    elif isinstance(value, (complex, np.complexfloating)):
+        return "c"
+    return "O"
+
+
+def kind_of_dtype(dtype):
+    """Return the column kind that suits a numpy dtype"""
+    dtype = np.dtype(dtype)
+    kind = dtype.kind
+    if kind == "u":
+        return "i" if dtype.itemsize < 8 else "O"
+    elif kind in "bifc":
+        return kind
+    return "O"
+
+
+def promote(a, b, exact=False):
+    """Return the column kind that can hold values of two kinds
+
+    Args:
+        a (str): A column kind
+        b (str): Another column kind
+        exact (bool): If True, values of different numeric kinds are held
+        in an object column, so each keeps its type. Otherwise, the wider
+        numeric kind is used (e.g. int values become floats).
+    """
+    if a == b:
+        return a
+    numeric = "ifc"
+    if not exact and a in numeric and b in numeric:
+        return max(a, b, key=numeric.index)
+    return "O"
+
+
+def as_array(values, exact=False):
+    """Return a 1D array of values, with a typed dtype where possible
+
+    Args:
+        values (list): A list of values
+        exact (bool): If True, values of different numeric kinds are kept
+        in an object array. See :func:`promote`.
+
+    Returns:
+        ndarray: An array with the dtype of the column kind that suits all
+        the values.
+    """
+    samples = {type(v): v for v in values}
+    kind = None
+    for v in samples.values():
+        kind = kind_of(v) if kind is None else promote(kind, kind_of(v), exact)
+    if kind is not None and kind != "O":
+        try:
+            return np.array(values, dtype=DTYPES[kind])
+        except OverflowError:
+            pass
+    arr = np.empty(len(values), dtype=object)
+    for i, v in enumerate(values):
+        arr[i] = v
+    return arr
+
+
+def _allocate(kind, n):
+    if kind == "O":
+        return np.empty(n, dtype=object)
+    return np.zeros(n, dtype=DTYPES[kind])
+
+
+class Column:
+    """A growable numpy column with a presence mask
+
+    Args:
+        kind (str): The column kind. See :func:`kind_of`.
+        exact (bool): If True, the column becomes an object column when
+        values of different numeric kinds are set, so that values read back
+        have the type they were set with. See :func:`promote`.
+
+    Note:
+        The column grows by doubling its capacity, so appending is amortised
+        O(1). The column kind is promoted (e.g. int to float, or anything to
+        object) if an incompatible value is set. Copies share their buffers
+        until either column is written to.
+    """
+
+    def __init__(self, kind="O", exact=False):
+        self.kind = kind
+        self.exact = exact
+        self.data = _allocate(kind, _MIN_CAPACITY)
+        self.mask = np.zeros(_MIN_CAPACITY, dtype=bool)
+        self._shared = False
+
+    def copy(self):
+        """Return a copy that shares the buffers until one side changes"""
+        out = Column.__new__(Column)
+        out.kind = self.kind
+        out.exact = self.exact
+        out.data = self.data
+        out.mask = self.mask
+        out._shared = self._shared = True
+        return out
+
+    def _own(self):
+        """Copy the buffers before writing, if they are shared"""
+        if self._shared:
+            self.data = self.data.copy()
+            self.mask = self.mask.copy()
+            self._shared = False
+
+    def reserve(self, n):
+        """Ensure the column has capacity for at least n rows"""
+        capacity = len(self.mask)
+        if n <= capacity:
+            self._own()
+            return
+        new_capacity = max(n, 2 * capacity)
+        data = _allocate(self.kind, new_capacity)
+        data[:capacity] = self.data
+        mask = np.zeros(new_capacity, dtype=bool)
+        mask[:capacity] = self.mask
+        self.data = data
+        self.mask = mask
+        self._shared = False
+
+    def convert(self, kind):
+        """Change the column kind, converting existing values"""
+        if kind == self.kind:
+            return
+        self.data = self.data.astype(DTYPES[kind])
+        self.kind = kind
+
+    def set(self, i, value):
+        """Set the value in row i"""
+        if i >= len(self.mask) or self._shared:
+            self.reserve(i + 1)
+        kind = kind_of(value)
+        if kind != self.kind:
+            self.convert(promote(self.kind, kind, self.exact))
+        try:
+            self.data[i] = value
+        except OverflowError:
+            self.convert("O")
+            self.data[i] = value
+        self.mask[i] = True
+
+    def set_many(self, start, values):
+        """Set values in consecutive rows
+
+        Args:
+            start (int): The first row
+            values (array-like): A 1D sequence of values, one per row.
+        """
+        values = np.asarray(values)
+        n = start + len(values)
+        self.reserve(n)
+        kind = promote(self.kind, kind_of_dtype(values.dtype), self.exact)
+        self.convert(kind)
+        try:
+            self.data[start:n] = values
+        except OverflowError:
+            self.convert("O")
+            self.data[start:n] = values
+        self.mask[start:n] = True
+
+    def put(self, ids, values):
+        """Set values in many rows
+
+        Args:
+            ids (ndarray): An ascending array of row numbers
+            values (ndarray): A 1D array of values, one for each row.
+        """
+        if len(ids) == 0:
+            return
+        self.reserve(int(ids[-1]) + 1)
+        kind = promote(self.kind, kind_of_dtype(values.dtype), self.exact)
+        self.convert(kind)
+        self.data[ids] = values
+        self.mask[ids] = True
+
+    def has(self, i):
+        """Return True if row i has a value"""
+        return i < len(self.mask) and self.mask[i]
+
+    def get(self, i):
+        """Return the value in row i
+
+        Raises:
+            KeyError: If row i has no value.
+        """
+        if not self.has(i):
+            raise KeyError(i)
+        value = self.data[i]
+        return value if self.kind == "O" else value.item()
+
+    def values(self, n):
+        """Return views of the data and mask for the first n rows"""
+        if n > len(self.mask):
+            self.reserve(n)
+        return self.data[:n], self.mask[:n]
+
+    @property
+    def nbytes(self):
+        """The number of bytes used by the column buffers"""
+        return self.data.nbytes + self.mask.nbytes
+
+
+class Columns:
+    """A set of columns that share a common number of rows
+
+    The columns are kept in the order in which the variables were first seen.
+    Variables with values of different numeric kinds (e.g. ints and floats)
+    get object columns, so each value keeps its type.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.columns = {}
+
+    def copy(self):
+        """Return a copy that shares the column buffers until one side changes"""
+        out = Columns()
+        out.n = self.n
+        out.columns = {k: col.copy() for k, col in self.columns.items()}
+        return out
+
+    def _column(self, key, value):
+        col = self.columns.get(key)
+        if col is None:
+            col = Column(kind_of(value), exact=True)
+            self.columns[key] = col
+        return col
+
+    def append(self, dct):
+        """Append a row
+
+        Args:
+            dct (dict): The key-value pairs for the row.
+
+        Returns:
+            int: The row number.
+        """
+        i = self.n
+        for k, v in dct.items():
+            self._column(k, v).set(i, v)
+        self.n = i + 1
+        return i
+
+    def extend(self, columns, n, masks=None):
+        """Append rows from columns of values
+
+        Args:
+            columns (dict): A dictionary of 1D arrays, each with n values.
+            n (int): The number of rows to append.
+            masks (dict): Optional boolean arrays for columns that do not
+            have a value in every row, which are True where there is a value.
+        """
+        start = self.n
+        masks = {} if masks is None else masks
+        for k, values in columns.items():
+            col = self.columns.get(k)
+            if col is None:
+                col = Column(kind_of_dtype(values.dtype), exact=True)
+                self.columns[k] = col
+            mask = masks.get(k)
+            if mask is None:
+                col.set_many(start, values)
+            else:
+                ids = np.flatnonzero(mask)
+                col.put(start + ids, values[ids])
+        self.n = start + n
+
+    def extend_rows(self, dcts):
+        """Append rows from a list of dictionaries
+
+        Args:
+            dcts (list): A dictionary of key-value pairs for each row.
+        """
+        start = self.n
+        found = {}
+        for i, dct in enumerate(dcts, start):
+            for k, v in dct.items():
+                lists = found.get(k)
+                if lists is None:
+                    lists = found[k] = ([], [])
+                lists[0].append(i)
+                lists[1].append(v)
+        for k, (ids, values) in found.items():
+            arr = as_array(values, exact=True)
+            col = self.columns.get(k)
+            if col is None:
+                col = Column(kind_of_dtype(arr.dtype), exact=True)
+                self.columns[k] = col
+            col.put(np.array(ids, dtype=np.int64), arr)
+        self.n = start + len(dcts)
+
+    def row(self, i):
+        """Return a dictionary of the values in row i"""
+        return {k: col.get(i) for k, col in self.columns.items() if col.has(i)}
+
+    def values(self, key):
+        """Return the data and mask arrays for a key"""
+        return self.columns[key].values(self.n)
+
+    def keys(self):
+        return self.columns.keys()
+
+    def __contains__(self, key):
+        return key in self.columns
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def nbytes(self):
+        """The number of bytes used by the column buffers"""
+        return sum(col.nbytes for col in self.columns.values())
@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 16:40:12 2026
+
+@author: Reuben
+
+Conditions let Box.where match values by comparison instead of equality.
+For example:
+
+    box.where(speed=between(10, 20), temperature=nearest(300))
+
+Conditions on numeric values are answered with binary searches over a
+sorted index of each variable, so they do not need to scan every row.
+Apart from isin, conditions never match values that are not real numbers
+(e.g. strings and arrays).
+
+"""
+
+import numpy as np
+
+
+def numeric(value):
+    """Return True if a value is a real number that can be compared"""
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return value == value  # Excludes NaN
+    return False
+
+
+class Condition:
+    """A condition that values must meet
+
+    Attributes:
+        indexed (bool): True if the condition can be answered from a sorted
+        index of numeric values.
+        relative (bool): True if whether a value matches depends on the
+        other values being queried.
+    """
+
+    indexed = True
+    relative = False
+
+    def match(self, value):
+        """Return True if a value meets the condition"""
+        raise NotImplementedError
+
+    def resolve(self, values):
+        """Return a condition that does not depend on the other values
+
+        Args:
+            values (iterable): All the values being queried.
+
+        Returns:
+            Condition: A condition that can be checked one value at a time.
+        """
+        return self
+
+    def select(self, values):
+        """Return the positions of sorted values that meet the condition
+
+        Args:
+            values (ndarray): A sorted 1D array of floats
+
+        Returns:
+            ndarray: An integer array of positions within values.
+        """
+        raise NotImplementedError
+
+
+class Range(Condition):
+    """Values within a range
+
+    Args:
+        lo (float): The lower bound, or None for no lower bound.
+        hi (float): The upper bound, or None for no upper bound.
+        lo_inclusive (bool): True if the lower bound is included.
+        hi_inclusive (bool): True if the upper bound is included.
+    """
+
+    def __init__(self, lo=None, hi=None, lo_inclusive=True, hi_inclusive=True):
+        self.lo = lo
+        self.hi = hi
+        self.lo_inclusive = lo_inclusive
+        self.hi_inclusive = hi_inclusive
+
+    def match(self, value):
+        if not numeric(value):
+            return False
+        if self.lo is not None:
+            if value < self.lo or (value == self.lo and not self.lo_inclusive):
+                return False
+        if self.hi is not None:
+            if value > self.hi or (value == self.hi and not self.hi_inclusive):
+                return False
+        return True
+
+    def bounds(self, values):
+        """Return the start and stop positions of the range in values"""
+        start, stop = 0, len(values)
+        if self.lo is not None:
+            side = "left" if self.lo_inclusive else "right"
+            start = np.searchsorted(values, self.lo, side=side)
+        if self.hi is not None:
+            side = "right" if self.hi_inclusive else "left"
+            stop = np.searchsorted(values, self.hi, side=side)
+        return start, max(start, stop)
+
+    def select(self, values):
+        start, stop = self.bounds(values)
+        return np.arange(start, stop)
+
+    def __repr__(self):
+        return "Range(" + repr(self.lo) + ", " + repr(self.hi) + ")"
+
+
+class IsIn(Condition):
+    """Values that equal one of several values
+
+    Args:
+        values (list): The values
+    """
+
+    def __init__(self, values):
+        self.values = list(values)
+        self.indexed = all(numeric(v) for v in self.values)
+
+    def match(self, value):
+        try:
+            return value in self.values
+        except ValueError:  # Arrays
+            return False
+
+    def select(self, values):
+        ranges = [Range(v, v).bounds(values) for v in self.values if numeric(v)]
+        if len(ranges) == 0:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(np.concatenate([np.arange(a, b) for a, b in ranges]))
+
+
+class NotEqual(Condition):
+    """Numeric values that do not equal a value"""
+
+    def __init__(self, value):
+        self.value = value
+
+    def match(self, value):
+        return numeric(value) and value != self.value
+
+    def select(self, values):
+        start, stop = Range(self.value, self.value).bounds(values)
+        return np.concatenate([np.arange(start), np.arange(stop, len(values))])
+
+
+class Nearest(Condition):
+    """Values that are closest to a value
+
+    All values that equal the closest value match. The condition must be
+    resolved against all the values being queried before use.
+    """
+
+    relative = True
+
+    def __init__(self, value):
+        self.value = value
+
+    def resolve(self, values):
+        if isinstance(values, np.ndarray):
+            # Sorted values, so only the neighbours need checking
+            i = np.searchsorted(values, self.value)
+            values = values[max(i - 1, 0) : i + 1]
+        best = None
+        for v in values:
+            if numeric(v) and (
+                best is None or abs(v - self.value) < abs(best - self.value)
+            ):
+                best = v
+        if best is None:
+            return IsIn([])
+        return Range(best, best)
+
+    def match(self, value):
+        raise TypeError("Resolve the nearest condition before matching values.")
+
+    def select(self, values):
+        return self.resolve(values).select(values)
+
+
+def between(lo, hi, inclusive=True):
+    """Match values between lo and hi"""
+    return Range(lo, hi, inclusive, inclusive)
+
+
+def gt(value):
+    """Match values greater than a value"""
+    return Range(lo=value, lo_inclusive=False)
+
+
+def ge(value):
+    """Match values greater than or equal to a value"""
+    return Range(lo=value)
+
+
+def lt(value):
+    """Match values less than a value"""
+    return Range(hi=value, hi_inclusive=False)
+
+
+def le(value):
+    """Match values less than or equal to a value"""
+    return Range(hi=value)
+
+
+def ne(value):
+    """Match numeric values that are not equal to a value"""
+    return NotEqual(value)
+
+
+def isin(values):
+    """Match values equal to any of the values"""
+    return IsIn(values)
+
+
+def near(value, tol=None, rtol=1e-9):
+    """Match values within a tolerance of a value
+
+    Args:
+        value (float): The value
+        tol (float): The absolute tolerance. If None, a relative tolerance
+        is used.
+        rtol (float): The relative tolerance, used if tol is None.
+    """
+    tol = abs(value) * rtol if tol is None else tol
+    return Range(value - tol, value + tol)
+
+
+def nearest(value):
+    """Match the values that are closest to a value"""
+    return Nearest(value)
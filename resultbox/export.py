@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 23:05:16 2026
+
+@author: Reuben
+
+Export Box data as columns. Each key is exported as a 1D array of values
+with a boolean validity mask, taken straight from the cached columns of the
+Box, so typed columns share their buffers instead of being copied. Columns
+of equally shaped numeric arrays are stacked into one 2D (or higher) array,
+and ragged 1D arrays become Arrow list arrays.
+
+DataFrames are built and read one column at a time in the same way. Integer
+and boolean columns with missing values use pandas' nullable dtypes, so only
+columns of strings, arrays and other objects become object columns.
+
+pyarrow is optional. It is only imported by :func:`to_arrow`.
+
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _read_only(arr):
+    """Return a read-only view of an array"""
+    out = arr.view()
+    out.flags.writeable = False
+    return out
+
+
+def _arrays(values, mask):
+    """Return the present values of an object column if they are all arrays
+
+    Returns:
+        list: A list of the present values as arrays, or None if any of them
+        is not an array or list of numbers.
+    """
+    items = []
+    for v in values[mask].tolist():
+        if not isinstance(v, (np.ndarray, list, tuple)):
+            return None
+        arr = np.asarray(v)
+        if arr.dtype.kind not in "biufc":
+            return None
+        items.append(arr)
+    return items
+
+
+def stack(values, mask):
+    """Return a column of equally shaped arrays as one array
+
+    Args:
+        values (ndarray): A 1D object array of values
+        mask (ndarray): A boolean array that is True where there is a value.
+
+    Returns:
+        ndarray: An array of shape (n, ...), with zeros where there is no
+        value, or None if the values are not all numeric arrays of the same
+        shape.
+    """
+    items = _arrays(values, mask)
+    if not items or len(set(a.shape for a in items)) > 1:
+        return None
+    dtype = np.result_type(*set(a.dtype for a in items))
+    out = np.zeros((len(values),) + items[0].shape, dtype=dtype)
+    out[mask] = items
+    return out
+
+
+def to_numpy(columns):
+    """Return columns as contiguous numpy arrays
+
+    Args:
+        columns (dict): A dictionary of (values, mask) tuples, one for each
+        key.
+
+    Returns:
+        dict: A dictionary of read-only (values, mask) tuples. Typed values
+        are views of the input arrays. Object columns of equally shaped
+        numeric arrays are stacked, so their values have a shape of
+        (n, ...). Other object columns are returned as they are.
+    """
+    out = {}
+    for k, (values, mask) in columns.items():
+        if values.dtype.kind == "O":
+            stacked = stack(values, mask)
+            if stacked is not None:
+                values = stacked
+        values = np.ascontiguousarray(values)
+        out[k] = (_read_only(values), _read_only(np.ascontiguousarray(mask)))
+    return out
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError("Exporting to Arrow requires pyarrow.") from e
+    return pyarrow
+
+
+def _list_array(pa, values, mask):
+    """Return an Arrow list array for a column of 1D numeric arrays, or None"""
+    items = _arrays(values, mask)
+    if items is None or any(a.ndim != 1 for a in items):
+        return None
+    lengths = np.zeros(len(values), dtype=np.int64)
+    lengths[mask] = [len(a) for a in items]
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    if len(items) > 0:
+        flat = np.concatenate(items)
+    else:
+        flat = np.zeros(0)
+    if offsets[-1] < 2**31:
+        cls, offsets = pa.ListArray, offsets.astype(np.int32)
+    else:
+        cls = pa.LargeListArray
+    return cls.from_arrays(pa.array(offsets), pa.array(flat), mask=pa.array(~mask))
+
+
+def arrow_array(values, mask):
+    """Return an Arrow array for a column
+
+    Args:
+        values (ndarray): A 1D array of values
+        mask (ndarray): A boolean array that is True where there is a value.
+
+    Returns:
+        pyarrow.Array: The array, with nulls where there is no value.
+        Numeric buffers are shared where pyarrow allows it. Object columns
+        of 1D numeric arrays become list arrays.
+    """
+    pa = _import_pyarrow()
+    nulls = None if mask.all() else ~mask
+    if values.dtype.kind != "O":
+        return pa.array(values, mask=nulls)
+    out = _list_array(pa, values, mask)
+    if out is not None:
+        return out
+    lst = [v.tolist() if isinstance(v, np.ndarray) else v for v in values.tolist()]
+    for i in np.flatnonzero(~mask).tolist():
+        lst[i] = None
+    return pa.array(lst)
+
+
+def to_arrow(columns):
+    """Return columns as a pyarrow Table
+
+    Args:
+        columns (dict): A dictionary of (values, mask) tuples, one for each
+        key.
+
+    Returns:
+        pyarrow.Table: A table with a column for each key.
+    """
+    pa = _import_pyarrow()
+    arrays = [arrow_array(values, mask) for values, mask in columns.values()]
+    return pa.Table.from_arrays(arrays, names=[str(k) for k in columns])
+
+
+def pandas_array(values, mask):
+    """Return a column as an array for a pandas DataFrame
+
+    Args:
+        values (ndarray): A 1D array of values
+        mask (ndarray): A boolean array that is True where there is a value.
+
+    Returns:
+        array-like: A numpy array, or a nullable pandas array for integers
+        and booleans with missing values. Missing floats are NaN and
+        missing objects are None.
+    """
+    kind = values.dtype.kind
+    if kind == "O":
+        values = values.copy()
+        values[~mask] = None
+        return values
+    elif mask.all():
+        return values
+    elif kind == "i":
+        return pd.arrays.IntegerArray(values.copy(), ~mask)
+    elif kind == "b":
+        return pd.arrays.BooleanArray(values.copy(), ~mask)
+    return np.where(mask, values, np.nan)
+
+
+def to_dataframe(columns, index=None, independent=None):
+    """Return columns as a pandas DataFrame
+
+    Args:
+        columns (dict): A dictionary of (values, mask) tuples, one for each
+        key.
+        index (ndarray): Optional values for the DataFrame index.
+        independent (list): The keys of independent variables, which are
+        recorded in the DataFrame's attrs.
+
+    Returns:
+        DataFrame: A DataFrame with a column for each key, named by the
+        string of the key.
+    """
+    data = {str(k): pandas_array(v, m) for k, (v, m) in columns.items()}
+    df = pd.DataFrame(data, index=index)
+    df.attrs["independent"] = [str(k) for k in columns if k in (independent or ())]
+    return df
+
+
+def from_series(series):
+    """Return the values of a pandas Series and a mask of the present ones
+
+    Returns:
+        tuple: A 1D numpy array of values and a boolean array that is True
+        where the value is not missing (None, NaN or NA).
+    """
+    mask = series.notna().to_numpy()
+    dtype = series.dtype
+    if hasattr(dtype, "numpy_dtype") and dtype.kind in "biuf":
+        # A nullable dtype, which converts to an object array by default
+        fill = False if dtype.kind == "b" else 0
+        return series.to_numpy(dtype=dtype.numpy_dtype, na_value=fill), mask
+    return series.to_numpy(), mask
+
+
+def _variable(store, name):
+    """Return the Variable for a column name, or the name if there is none"""
+    if store is not None:
+        try:
+            return store[name]
+        except KeyError:
+            pass
+    return name
+
+
+def dataframe_columns(df, independent=None, store=None):
+    """Return the columns of a DataFrame, split by independent and dependent
+
+    Args:
+        df (DataFrame): The DataFrame
+        independent (list): The names of the independent columns. If None,
+        the names recorded by :func:`to_dataframe` are used.
+        store (Store): An optional Store used to map column names to
+        Variables.
+
+    Returns:
+        tuple: Dictionaries of the independent columns and the dependent
+        columns, and a dictionary of masks for keys with missing values.
+    """
+    if independent is None:
+        independent = df.attrs.get("independent", [])
+    independent = set(str(k) for k in independent)
+    indep, dep, masks = {}, {}, {}
+    for name in df.columns:
+        key = _variable(store, name)
+        values, mask = from_series(df[name])
+        (indep if str(name) in independent else dep)[key] = values
+        if not mask.all():
+            masks[key] = mask
+    return indep, dep, masks
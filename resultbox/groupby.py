@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 19:20:03 2026
+
+@author: Reuben
+
+A group-by engine for Box data. The group keys are factorised once into
+integer group codes. Aggregations are then calculated for all groups at
+once with numpy (e.g. `np.bincount` and `np.minimum.reduceat`), instead of
+building Python lists for each group.
+
+"""
+
+import numpy as np
+
+
+def factorize(values):
+    """Return integer codes for a list of hashable values
+
+    Args:
+        values (iterable): The values
+
+    Returns:
+        tuple: An integer array with the code for each value, and a list
+        of the unique values in order of first appearance.
+    """
+    lookup = {}
+    codes = [lookup.setdefault(v, len(lookup)) for v in values]
+    return np.array(codes, dtype=np.int64), list(lookup)
+
+
+def _compact(code, size):
+    """Renumber codes below size to 0, 1, ..., in sorted order
+
+    Returns:
+        tuple: The new codes and the sorted unique old codes.
+    """
+    if size <= 4 * len(code) + 1024:
+        # A lookup table is O(n), rather than O(n log n) for sorting
+        present = np.zeros(size, dtype=bool)
+        present[code] = True
+        rank = np.cumsum(present) - 1
+        return rank[code], np.flatnonzero(present)
+    uniques, inverse = np.unique(code, return_inverse=True)
+    return inverse.reshape(-1), uniques
+
+
+def factorize_column(values):
+    """Return integer codes for an array of values
+
+    Returns:
+        tuple: The code of each value and an array of the unique values,
+        sorted where possible.
+    """
+    if values.dtype.kind in "iu" and len(values) > 0:
+        lo = values.min()
+        code, uniques = _compact(
+            (values - lo).astype(np.intp), int(values.max() - lo) + 1
+        )
+        return code, (uniques + lo).astype(values.dtype)
+    try:
+        uniques, inverse = np.unique(values, return_inverse=True)
+    except TypeError:  # Mixed objects that cannot be sorted
+        inverse, lst = factorize(values)
+        uniques = np.empty(len(lst), dtype=object)
+        uniques[:] = lst
+    return inverse.reshape(-1), uniques
+
+
+def factorize_columns(columns, n):
+    """Return group codes for rows from columns of values
+
+    Args:
+        columns (list): A list of (values, mask) tuples, one for each key.
+        n (int): The number of rows
+
+    Returns:
+        tuple: An integer array with the group of each row (or -1 if the
+        row does not have a value for every key), and a list with an array
+        of the key values of each group for each key. Groups are in sorted
+        order of their key values, where they can be sorted.
+    """
+    valid = np.ones(n, dtype=bool)
+    for values, mask in columns:
+        valid &= mask
+    ids = np.flatnonzero(valid)
+    code = np.zeros(len(ids), dtype=np.int64)
+    size = 1
+    factors = []
+    for values, mask in columns:
+        inverse, uniques = factorize_column(values[ids])
+        if size * len(uniques) >= 2**62:
+            # Renumber so the mixed-radix code stays within int64
+            code, _ = _compact(code, size)
+            size = int(code.max()) + 1 if len(code) > 0 else 1
+            factors = None
+        code = code * len(uniques) + inverse
+        size *= len(uniques)
+        if factors is not None:
+            factors.append(uniques)
+    code, groups = _compact(code, size)
+    codes = np.full(n, -1, dtype=np.int64)
+    codes[ids] = code
+    if factors is None:
+        # The labels cannot be decoded, so use the first row in each group
+        first = ids[np.unique(code, return_index=True)[1]]
+        return codes, [values[first] for values, mask in columns]
+    labels = []
+    for uniques in reversed(factors):
+        labels.append(uniques[groups % len(uniques)])
+        groups = groups // len(uniques)
+    return codes, labels[::-1]
+
+
+class GroupBy:
+    """Rows grouped by the values of some keys
+
+    Args:
+        column (callable): A function that takes a key and returns a tuple
+        of a 1D array of values and a boolean mask of rows with a value.
+        n (int): The number of rows
+        keys (list): The keys to group by.
+
+    Note:
+        Rows that do not have a value for every key are left out.
+    """
+
+    FUNCTIONS = ["count", "sum", "mean", "min", "max", "std", "var", "first", "last"]
+    PERCENTILES = {"median": 50.0}
+
+    def __init__(self, column, n, keys):
+        self.column = column
+        self.n = n
+        self.keys = list(keys)
+        columns = [column(k) for k in self.keys]
+        self.codes, labels = factorize_columns(columns, n)
+        self.ngroups = len(labels[0]) if len(labels) > 0 else int(n > 0)
+        self._labels = dict(zip(self.keys, labels))
+
+    def labels(self, as_dicts=False):
+        """Return the key values for each group
+
+        Args:
+            as_dicts (bool): If True, return a list of dictionaries.
+            Otherwise, return a dictionary of arrays.
+        """
+        if as_dicts:
+            lists = [self._labels[k].tolist() for k in self.keys]
+            return [dict(zip(self.keys, vals)) for vals in zip(*lists)]
+        return dict(self._labels)
+
+    def size(self):
+        """Return an array of the number of rows in each group"""
+        return np.bincount(self.codes[self.codes >= 0], minlength=self.ngroups)
+
+    def _values(self, key):
+        """Return the group codes and values of rows with a value for key"""
+        values, mask = self.column(key)
+        ids = np.flatnonzero(mask & (self.codes >= 0))
+        return self.codes[ids], values[ids]
+
+    def aggregate(self, key, func):
+        """Aggregate the values of a key within each group
+
+        Args:
+            key (Variable): The key
+            func (str): One of 'count', 'sum', 'mean', 'min', 'max', 'std',
+            'var', 'first', 'last', 'median', or a percentile such as 'p90'.
+
+        Returns:
+            ndarray: An array with one value per group. Groups with no
+            values give NaN (or 0 for count and sum).
+
+        Note:
+            'std' and 'var' use ddof=0, and percentiles use linear
+            interpolation, like numpy.
+        """
+        q = self._percentile_of(func)
+        if func not in self.FUNCTIONS and q is None:
+            raise ValueError("Unknown aggregation: " + str(func))
+        codes, values = self._values(key)
+        g = self.ngroups
+        count = np.bincount(codes, minlength=g)
+        if func == "count":
+            return count
+        elif func in ["first", "last"]:
+            return self._first_last(codes, values, func)
+        values = self._numeric(key, values)
+        if q is not None:
+            return self._percentile(codes, values, q)
+        if func in ["min", "max"]:
+            return self._reduce(codes, values, func)
+        total = np.bincount(codes, weights=values, minlength=g)
+        if func == "sum":
+            return total
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = total / count
+            if func == "mean":
+                return mean
+            dev = np.bincount(codes, weights=(values - mean[codes]) ** 2, minlength=g)
+            var = dev / count
+        return var if func == "var" else np.sqrt(var)
+
+    def agg(self, spec):
+        """Aggregate values within each group
+
+        Args:
+            spec (dict): A dictionary of key: function pairs. Each function
+            is a string (see :meth:`aggregate`) or a list of strings.
+
+        Returns:
+            dict: A dictionary of arrays, one for each group key (giving
+            the labels) followed by one for each aggregation. Aggregations
+            are named by their key when a single function is given as a
+            string, or as 'key_function' when a list is given.
+        """
+        out = self.labels()
+        for key, funcs in spec.items():
+            if isinstance(funcs, str):
+                out[key] = self.aggregate(key, funcs)
+            else:
+                for func in funcs:
+                    out[str(key) + "_" + func] = self.aggregate(key, func)
+        return out
+
+    def _percentile_of(self, func):
+        """Return the percentile for a function name, or None"""
+        if func in self.PERCENTILES:
+            return self.PERCENTILES[func]
+        if isinstance(func, str) and func.startswith("p"):
+            try:
+                q = float(func[1:])
+            except ValueError:
+                return None
+            if 0 <= q <= 100:
+                return q
+        return None
+
+    def _percentile(self, codes, values, q):
+        out = np.full(self.ngroups, np.nan)
+        if len(codes) == 0:
+            return out
+        order = np.lexsort((values, codes))
+        sorted_codes = codes[order]
+        sorted_values = values[order].astype(np.float64)
+        starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+        counts = np.diff(np.r_[starts, len(order)])
+        pos = (counts - 1) * (q / 100.0)
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.minimum(lo + 1, counts - 1)
+        frac = pos - lo
+        a = sorted_values[starts + lo]
+        b = sorted_values[starts + hi]
+        out[sorted_codes[starts]] = a + (b - a) * frac
+        return out
+
+    def _numeric(self, key, values):
+        if values.dtype.kind not in "biuf":
+            try:
+                return values.astype(np.float64)
+            except (TypeError, ValueError):
+                raise ValueError("Values for '" + str(key) + "' are not numeric.")
+        return values
+
+    def _segments(self, codes):
+        """Return the order of values sorted by group, and segment starts"""
+        order = np.argsort(codes, kind="stable")
+        sorted_codes = codes[order]
+        starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+        return order, starts, sorted_codes[starts]
+
+    def _reduce(self, codes, values, func):
+        out = np.full(self.ngroups, np.nan)
+        if len(codes) == 0:
+            return out
+        order, starts, groups = self._segments(codes)
+        ufunc = np.minimum if func == "min" else np.maximum
+        out[groups] = ufunc.reduceat(values[order], starts)
+        return out
+
+    def _first_last(self, codes, values, func):
+        out = np.full(self.ngroups, None, dtype=object)
+        if len(codes) == 0:
+            return out
+        order, starts, groups = self._segments(codes)
+        if func == "last":
+            starts = np.r_[starts[1:], len(order)] - 1
+        out[groups] = values[order[starts]]
+        if values.dtype.kind != "O" and len(groups) == self.ngroups:
+            out = out.astype(values.dtype)
+        return out
@@ -0,0 +1,799 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:05:32 2026
+
+@author: Reuben
+
+Indexes that let a Box answer queries without scanning every row. Each index
+is updated as rows are added to the Box. A row that the Box changes is
+removed from each index as it was, and then added again. If the rows are
+changed some other way, the Box discards its indexes and rebuilds them when
+they are next needed.
+
+"""
+
+import numpy as np
+from .constants import IND, DEP, INDEP
+from .conditions import numeric
+from .columns import DTYPES, Column, as_array, kind_of, kind_of_dtype
+
+
+def _indexable(value):
+    """Return True if a value can be looked up in a hash index"""
+    if value is None:
+        return False
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return value == value  # Excludes NaN
+
+
+def _present(values, mask, start):
+    """Return the ids and values of the rows in a column that have a value"""
+    ids = np.flatnonzero(mask)
+    return ids + start, values[ids]
+
+
+def _merged(key, first, second):
+    """Return the values of a key from the first columns, or else the second
+
+    Args:
+        key (Variable): The key
+        first (dict): A dictionary of (values, mask) tuples
+        second (dict): A dictionary of (values, mask) tuples
+
+    Returns:
+        tuple: The values and mask, or None if neither has the key.
+    """
+    found = [cols[key] for cols in (first, second) if key in cols]
+    if len(found) == 0:
+        return None
+    values, mask = found[0]
+    if len(found) == 2:
+        other, other_mask = found[1]
+        if values.dtype != other.dtype:
+            values, other = values.astype(object), other.astype(object)
+        values = np.where(mask, values, other)
+        mask = mask | other_mask
+    return values, mask
+
+
+def _groups(values):
+    """Return the distinct typed values and the positions that hold each
+
+    Returns:
+        tuple: A list of the distinct values, and a list of arrays of
+        positions, one for each distinct value.
+    """
+    unique, inverse = np.unique(values, return_inverse=True)
+    order = np.argsort(inverse, kind="stable")
+    bounds = np.searchsorted(inverse[order], np.arange(len(unique) + 1))
+    parts = [order[bounds[j] : bounds[j + 1]] for j in range(len(unique))]
+    return unique.tolist(), parts
+
+
+class ValueIndex:
+    """Map independent variable values to the ids of rows that contain them
+
+    Row ids are the positions of the rows within the Box.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._unhashable = {}
+        self._dep_keys = set()
+
+    def add(self, i, row):
+        """Add a row to the index
+
+        Args:
+            i (int): The row id
+            row (dict): The row
+        """
+        for k, v in row[INDEP].items():
+            try:
+                self._values.setdefault(k, {}).setdefault(v, set()).add(i)
+            except TypeError:
+                self._unhashable.setdefault(k, set()).add(i)
+        self._dep_keys.update(row[DEP].keys())
+
+    def remove(self, i, row):
+        """Remove a row from the index, before it is changed
+
+        Args:
+            i (int): The row id
+            row (dict): The row, as it was when it was added.
+
+        Note:
+            Its dependent keys are still treated as dependent.
+        """
+        for k, v in row[INDEP].items():
+            try:
+                self._values.get(k, {}).get(v, set()).discard(i)
+            except TypeError:
+                self._unhashable.get(k, set()).discard(i)
+
+    def add_columns(self, start, indep, dep):
+        """Add rows from columns of values
+
+        Args:
+            start (int): The id of the first row
+            indep (dict): A dictionary of (values, mask) tuples for the
+            independent variables, with an element for each row.
+            dep (dict): A dictionary of (values, mask) tuples for the
+            dependent variables.
+        """
+        for k, (values, mask) in indep.items():
+            ids, values = _present(values, mask, start)
+            found = self._values.setdefault(k, {})
+            if values.dtype.kind != "O":
+                for v, pos in zip(*_groups(values)):
+                    found.setdefault(v, set()).update(ids[pos].tolist())
+                continue
+            for i, v in zip(ids.tolist(), values.tolist()):
+                try:
+                    found.setdefault(v, set()).add(i)
+                except TypeError:
+                    self._unhashable.setdefault(k, set()).add(i)
+        self._dep_keys.update(k for k, (_, mask) in dep.items() if mask.any())
+
+    def candidates(self, dct):
+        """Return the ids of rows that may contain all key-value pairs
+
+        Args:
+            dct (dict): The key-value pairs.
+
+        Returns:
+            list: A sorted list of candidate row ids, or None if none of the
+            key-value pairs can be answered by the index. Candidates must
+            still be checked against dct, as rows with values that cannot be
+            hashed are always included.
+        """
+        sets = []
+        for k, v in dct.items():
+            if k in self._dep_keys or not _indexable(v):
+                continue
+            found = self._values.get(k, {}).get(v, set())
+            other = self._unhashable.get(k)
+            sets.append(found | other if other else found)
+        if len(sets) == 0:
+            return None
+        sets.sort(key=len)
+        return sorted(sets[0].intersection(*sets[1:]))
+
+
+class PresenceIndex:
+    """Bitmaps that record which rows contain each key
+
+    Each key has a numpy boolean array with one element per row. Rows are
+    identified by their ids, which may be added in any order.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self._bits = {}
+
+    def _bitmap(self, key, i):
+        bits = self._bits.get(key)
+        if bits is None:
+            bits = np.zeros(max(16, 2 * (i + 1)), dtype=bool)
+            self._bits[key] = bits
+        elif i >= len(bits):
+            new = np.zeros(max(i + 1, 2 * len(bits)), dtype=bool)
+            new[: len(bits)] = bits
+            bits = new
+            self._bits[key] = bits
+        return bits
+
+    def add(self, i, row):
+        """Add a row to the index
+
+        Args:
+            i (int): The row id
+            row (dict): The row
+        """
+        for subkey in [INDEP, DEP]:
+            for k in row[subkey]:
+                self._bitmap(k, i)[i] = True
+        self.n = max(self.n, i + 1)
+
+    def remove(self, i, row):
+        """Remove a row from the index, before it is changed
+
+        See :meth:`ValueIndex.remove`.
+        """
+        for subkey in [INDEP, DEP]:
+            for k in row[subkey]:
+                bits = self._bits.get(k)
+                if bits is not None and i < len(bits):
+                    bits[i] = False
+
+    def add_columns(self, start, indep, dep):
+        """Add rows from columns of values
+
+        See :meth:`ValueIndex.add_columns`.
+        """
+        for columns in [indep, dep]:
+            for k, (values, mask) in columns.items():
+                end = start + len(mask)
+                if mask.any():
+                    self._bitmap(k, end - 1)[start:end] |= mask
+                self.n = max(self.n, end)
+
+    def present(self, key):
+        """Return a boolean array indicating which rows contain a key"""
+        bits = self._bits.get(key)
+        if bits is None:
+            return np.zeros(self.n, dtype=bool)
+        elif len(bits) < self.n:
+            return np.concatenate([bits, np.zeros(self.n - len(bits), dtype=bool)])
+        return bits[: self.n]
+
+    def mask(self, keys, func="all"):
+        """Return a boolean array of rows that contain the keys
+
+        Args:
+            keys (list): The keys
+            func (str): 'all' if all keys must be present, or 'any' if at least
+            one key must be present.
+
+        Returns:
+            ndarray: A boolean array with an element for each row.
+        """
+        if func == "all":
+            out = np.ones(self.n, dtype=bool)
+            for k in keys:
+                out &= self.present(k)
+        else:
+            out = np.zeros(self.n, dtype=bool)
+            for k in keys:
+                out |= self.present(k)
+        return out
+
+    def ids(self, keys, func="all"):
+        """Return a sorted array of ids of rows that contain the keys"""
+        return np.flatnonzero(self.mask(keys, func))
+
+
+_REAL = {int, float}
+
+
+class SortedIndex:
+    """Sorted numeric values of each variable, for comparison queries
+
+    For each key, the index keeps a sorted float array of the values and
+    an array of the corresponding row ids. The value for a key is the
+    independent value if there is one, otherwise the dependent value, as
+    for :meth:`Box.where`. New values are buffered and merged in when the
+    key is next queried, and removed rows are dropped at the same time.
+    """
+
+    def __init__(self):
+        self._sorted = {}
+        self._pending = {}
+        self._removed = {}
+
+    def add(self, i, row):
+        """Add a row to the index
+
+        Args:
+            i (int): The row id
+            row (dict): The row
+        """
+        indep = row[INDEP]
+        for k, v in indep.items():
+            if type(v) in _REAL or numeric(v):
+                self._pending_lists(k)[0].append(v)
+                self._pending[k][1].append(i)
+        for k, v in row[DEP].items():
+            if k not in indep and (type(v) in _REAL or numeric(v)):
+                self._pending_lists(k)[0].append(v)
+                self._pending[k][1].append(i)
+
+    def remove(self, i, row):
+        """Remove a row from the index, before it is changed
+
+        See :meth:`ValueIndex.remove`.
+        """
+        indep = row[INDEP]
+        for k, v in indep.items():
+            if type(v) in _REAL or numeric(v):
+                self._removed.setdefault(k, []).append((i, v))
+        for k, v in row[DEP].items():
+            if k not in indep and (type(v) in _REAL or numeric(v)):
+                self._removed.setdefault(k, []).append((i, v))
+
+    def add_columns(self, start, indep, dep):
+        """Add rows from columns of values
+
+        See :meth:`ValueIndex.add_columns`.
+        """
+        for k in dict.fromkeys([*indep, *dep]):
+            ids, values = _present(*_merged(k, indep, dep), start)
+            if values.dtype.kind == "O":
+                keep = [type(v) in _REAL or numeric(v) for v in values.tolist()]
+                keep = np.array(keep, dtype=bool)
+                ids, values = ids[keep], values[keep]
+            elif values.dtype.kind not in "biuf":
+                continue
+            if len(ids) > 0:
+                lists = self._pending_lists(k)
+                lists[0].extend(values.tolist())
+                lists[1].extend(ids.tolist())
+
+    def _pending_lists(self, key):
+        lists = self._pending.get(key)
+        if lists is None:
+            lists = self._pending[key] = ([], [])
+        return lists
+
+    def sorted(self, key):
+        """Return the sorted values and row ids for a key
+
+        Returns:
+            tuple: A float array of sorted values and an integer array of
+            the corresponding row ids.
+        """
+        values, ids = self._sorted.get(key, (np.zeros(0), np.zeros(0, dtype=int)))
+        pending = self._pending.pop(key, None)
+        if pending is not None:
+            new_values = np.array(pending[0], dtype=np.float64)
+            new_ids = np.array(pending[1], dtype=np.int64)
+            keep = ~np.isnan(new_values)
+            new_values, new_ids = new_values[keep], new_ids[keep]
+            order = np.argsort(new_values, kind="stable")
+            new_values, new_ids = new_values[order], new_ids[order]
+            pos = np.searchsorted(values, new_values, side="right")
+            values = np.insert(values, pos, new_values)
+            ids = np.insert(ids, pos, new_ids)
+            self._sorted[key] = (values, ids)
+        removed = self._removed.pop(key, None)
+        if removed is not None:
+            values, ids = self._drop(values, ids, removed)
+            self._sorted[key] = (values, ids)
+        return values, ids
+
+    @staticmethod
+    def _drop(values, ids, removed):
+        """Drop one entry for each removed (row id, value) pair"""
+        found = np.flatnonzero(np.isin(ids, [i for i, v in removed]))
+        positions = {}
+        for j, i in zip(found.tolist(), ids[found].tolist()):
+            positions.setdefault(i, []).append(j)
+        drop = []
+        for i, v in removed:
+            lst = positions.get(i, [])
+            for n, j in enumerate(lst):
+                if values[j] == v:
+                    drop.append(lst.pop(n))
+                    break
+        return np.delete(values, drop), np.delete(ids, drop)
+
+    def ids(self, key, condition):
+        """Return a sorted array of ids of rows that meet a condition
+
+        Args:
+            key (Variable): The key
+            condition (Condition): The condition
+
+        Returns:
+            ndarray: The sorted row ids.
+        """
+        values, ids = self.sorted(key)
+        condition = condition.resolve(values)
+        return np.sort(ids[condition.select(values)])
+
+
+class ColumnIndex:
+    """Columns of the values of each variable, for vectorised queries
+
+    The value for a key is the independent value if there is one, otherwise
+    the dependent value, as for :meth:`Box.where`. Columns are only built
+    for keys that are requested, and are extended with any new rows the
+    next time they are requested.
+    """
+
+    def __init__(self):
+        self._rows = []
+        self._columns = {}
+        self._stale = set()
+        self._indexes = Column("i")
+        self._indexes_n = 0
+
+    def add(self, i, row):
+        """Add a row to the index
+
+        Args:
+            i (int): The row id, which must be the next one, or the id of a
+            row that was removed.
+            row (dict): The row
+        """
+        if i < len(self._rows):
+            self._rows[i] = row
+        else:
+            self._rows.append(row)
+
+    def remove(self, i, row):
+        """Remove a row from the index, before it is changed
+
+        The values of the row are updated in the columns when they are next
+        requested.
+        """
+        self._stale.add(i)
+
+    def values(self, key, dep_first=False):
+        """Return the values for a key
+
+        Args:
+            key (Variable): The key
+            dep_first (bool): If True, prefer the dependent value over the
+            independent value, as for :meth:`Box.find`.
+
+        Returns:
+            tuple: A 1D array of values and a boolean array that is True
+            for rows that have a value.
+        """
+        name = (key, True) if dep_first else key
+        first, second = (DEP, INDEP) if dep_first else (INDEP, DEP)
+        if len(self._stale) > 0:
+            self._refresh()
+        col, n = self._columns.get(name, (None, 0))
+        rows = self._rows
+        if col is None or n < len(rows):
+            values = [row[first].get(key, row[second].get(key)) for row in rows[n:]]
+            ids = [i for i, v in enumerate(values, n) if v is not None]
+            if len(ids) < len(values):
+                values = [v for v in values if v is not None]
+            arr = as_array(values)
+            if col is None:
+                col = Column(kind_of_dtype(arr.dtype) if len(arr) > 0 else "f")
+            col.put(np.array(ids, dtype=np.int64), arr)
+            self._columns[name] = (col, len(rows))
+        return col.values(len(rows))
+
+    def _refresh(self):
+        """Update the values of stale rows in the columns"""
+        stale = sorted(self._stale)
+        self._stale = set()
+        for name, (col, n) in self._columns.items():
+            key, first, second = name, INDEP, DEP
+            if isinstance(name, tuple):
+                key, first, second = name[0], DEP, INDEP
+            for i in stale:
+                if i >= n:
+                    break
+                row = self._rows[i]
+                value = row[first].get(key, row[second].get(key))
+                if value is None:
+                    col.reserve(i + 1)
+                    col.mask[i] = False
+                else:
+                    col.set(i, value)
+
+    def indexes(self):
+        """Return an array of the index of each row"""
+        n = self._indexes_n
+        rows = self._rows
+        if n < len(rows):
+            self._indexes.set_many(n, [row[IND] for row in rows[n:]])
+            self._indexes_n = len(rows)
+        return self._indexes.values(len(rows))[0]
+
+
+class DistinctIndex:
+    """The distinct values of each variable, with the number of rows for each
+
+    The value for a key is the dependent value if there is one, otherwise
+    the independent value, as for :meth:`Box.find`.
+    """
+
+    def __init__(self):
+        self._counts = {}
+        self._sorted = {}
+        self._unhashable = set()
+
+    def add(self, i, row):
+        """Add a row to the index
+
+        Args:
+            i (int): The row id
+            row (dict): The row
+        """
+        dep = row[DEP]
+        for k, v in dep.items():
+            self._count(k, v)
+        for k, v in row[INDEP].items():
+            if k not in dep:
+                self._count(k, v)
+
+    def remove(self, i, row):
+        """Remove a row from the index, before it is changed
+
+        See :meth:`ValueIndex.remove`.
+        """
+        dep = row[DEP]
+        for k, v in dep.items():
+            self._count(k, v, -1)
+        for k, v in row[INDEP].items():
+            if k not in dep:
+                self._count(k, v, -1)
+
+    def add_columns(self, start, indep, dep):
+        """Add rows from columns of values
+
+        See :meth:`ValueIndex.add_columns`.
+        """
+        for k in dict.fromkeys([*dep, *indep]):
+            _, values = _present(*_merged(k, dep, indep), start)
+            if values.dtype.kind == "O":
+                for v in values.tolist():
+                    self._count(k, v)
+                continue
+            self._counts.setdefault(k, {})
+            nan = values != values
+            if nan.any():
+                # Each NaN is a distinct value, as it is for rows
+                for v in values[nan].tolist():
+                    self._count(k, v)
+                values = values[~nan]
+            unique, counts = np.unique(values, return_counts=True)
+            for v, n in zip(unique.tolist(), counts.tolist()):
+                self._count(k, v, n)
+
+    def _count(self, key, value, n=1):
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = self._counts[key] = {}
+        try:
+            found = counts.get(value)
+        except TypeError:
+            self._unhashable.add(key)
+            return
+        if found is None:
+            if n > 0:
+                counts[value] = n
+                self._sorted.pop(key, None)
+        elif found + n <= 0:
+            del counts[value]
+            self._sorted.pop(key, None)
+        else:
+            counts[value] = found + n
+
+    def hashable(self, key):
+        """Return True if all the values for a key could be indexed"""
+        return key not in self._unhashable
+
+    def counts(self, key):
+        """Return a dictionary of the number of rows with each value"""
+        return self._counts.get(key, {})
+
+    def unique(self, key):
+        """Return a sorted list of the distinct values for a key"""
+        out = self._sorted.get(key)
+        if out is None:
+            out = self._sorted[key] = sorted(self.counts(key))
+        return list(out)
+
+
+class CombinationIndex:
+    """The distinct combinations of values of a group of variables
+
+    Args:
+        keys (tuple): The keys in the group.
+
+    Note:
+        Only rows with a value for every key are counted. The value for a
+        key is the independent value if there is one, otherwise the
+        dependent value, as for :meth:`Box.combinations`.
+    """
+
+    def __init__(self, keys):
+        self.keys = tuple(keys)
+        self.hashable = True
+        self._counts = {}
+        self._sorted = None
+
+    def add(self, i, row):
+        """Add a row to the index
+
+        Args:
+            i (int): The row id
+            row (dict): The row
+        """
+        indep = row[INDEP]
+        dep = row[DEP]
+        try:
+            tup = tuple([indep[k] if k in indep else dep[k] for k in self.keys])
+        except KeyError:
+            return
+        try:
+            n = self._counts.get(tup)
+        except TypeError:
+            self.hashable = False
+            return
+        if n is None:
+            self._counts[tup] = 1
+            self._sorted = None
+        else:
+            self._counts[tup] = n + 1
+
+    def remove(self, i, row):
+        """Remove a row from the index, before it is changed
+
+        See :meth:`ValueIndex.remove`.
+        """
+        indep = row[INDEP]
+        dep = row[DEP]
+        try:
+            tup = tuple([indep[k] if k in indep else dep[k] for k in self.keys])
+            n = self._counts.get(tup)
+        except (KeyError, TypeError):
+            return
+        if n == 1:
+            del self._counts[tup]
+            self._sorted = None
+        elif n is not None:
+            self._counts[tup] = n - 1
+
+    def add_columns(self, start, indep, dep):
+        """Add rows from columns of values
+
+        See :meth:`ValueIndex.add_columns`.
+        """
+        columns = [_merged(k, indep, dep) for k in self.keys]
+        if any(c is None for c in columns):
+            return
+        mask = np.logical_and.reduce([m for _, m in columns])
+        ids = np.flatnonzero(mask)
+        lists = [values[ids].tolist() for values, _ in columns]
+        counts = self._counts
+        for tup in zip(*lists):
+            try:
+                n = counts.get(tup)
+            except TypeError:
+                self.hashable = False
+                return
+            if n is None:
+                counts[tup] = 1
+                self._sorted = None
+            else:
+                counts[tup] = n + 1
+
+    def counts(self):
+        """Return a dictionary of the number of rows with each combination"""
+        return self._counts
+
+    def unique(self):
+        """Return a sorted list of the distinct combinations, as tuples"""
+        if self._sorted is None:
+            self._sorted = sorted(self._counts)
+        return list(self._sorted)
+
+
+_SCALARS = {int, float, bool, complex, str}
+
+
+class KeyIndex:
+    """The keys in each row, with counts and a summary of their values
+
+    For each key, the index records the number of rows with it as an
+    independent and as a dependent variable, and whether its values are
+    scalars or arrays, with their shape and dtype.
+    """
+
+    def __init__(self):
+        self._counts = {INDEP: {}, DEP: {}}
+        self._info = {}
+
+    def add(self, i, row):
+        """Add a row to the index
+
+        Args:
+            i (int): The row id
+            row (dict): The row
+        """
+        info = self._info
+        for subkey in [INDEP, DEP]:
+            counts = self._counts[subkey]
+            for k, v in row[subkey].items():
+                counts[k] = counts.get(k, 0) + 1
+                t = type(v)
+                found = info.get(k)
+                if found is None or found[3] is not t or t not in _SCALARS:
+                    self._describe(k, v)
+
+    def remove(self, i, row):
+        """Remove a row from the index, before it is changed
+
+        See :meth:`ValueIndex.remove`. The summaries of the values are not
+        narrowed down again.
+        """
+        for subkey in [INDEP, DEP]:
+            counts = self._counts[subkey]
+            for k in row[subkey]:
+                n = counts.get(k, 0)
+                if n > 1:
+                    counts[k] = n - 1
+                else:
+                    counts.pop(k, None)
+
+    def add_columns(self, start, indep, dep):
+        """Add rows from columns of values
+
+        See :meth:`ValueIndex.add_columns`.
+        """
+        info = self._info
+        for subkey, columns in [(INDEP, indep), (DEP, dep)]:
+            counts = self._counts[subkey]
+            for k, (values, mask) in columns.items():
+                _, values = _present(values, mask, start)
+                if len(values) == 0:
+                    continue
+                counts[k] = counts.get(k, 0) + len(values)
+                if values.dtype.kind != "O":
+                    # All the values have the same type
+                    values = values[:1]
+                for v in values.tolist():
+                    t = type(v)
+                    found = info.get(k)
+                    if found is None or found[3] is not t or t not in _SCALARS:
+                        self._describe(k, v)
+
+    def _describe(self, key, value):
+        """Update the summary of the values of a key with a new value"""
+        if value is None:
+            return
+        elif isinstance(value, np.ndarray):
+            kind, shape, dtype = "array", value.shape, value.dtype
+        elif isinstance(value, (list, tuple)):
+            arr = np.asarray(value)
+            kind, shape, dtype = "array", arr.shape, arr.dtype
+        else:
+            kind, shape, dtype = "scalar", (), np.dtype(DTYPES[kind_of(value)])
+        found = self._info.get(key)
+        if found is not None:
+            if found[0] != kind:
+                kind = "mixed"
+            if found[1] != shape:
+                shape = None
+            if found[2] != dtype:
+                try:
+                    dtype = np.result_type(found[2], dtype)
+                except TypeError:
+                    dtype = np.dtype(object)
+        self._info[key] = [kind, shape, dtype, type(value)]
+
+    def keys(self, dependent=True, independent=False):
+        """Return a set of the keys"""
+        out = set()
+        if independent:
+            out.update(self._counts[INDEP])
+        if dependent:
+            out.update(self._counts[DEP])
+        return out
+
+    def names(self):
+        """Return a list of the keys, in the order they were first seen
+
+        Independent keys are listed before dependent keys.
+        """
+        return list(dict.fromkeys([*self._counts[INDEP], *self._counts[DEP]]))
+
+    def info(self, key):
+        """Return a summary of a key
+
+        Returns:
+            dict: The number of rows with the key as an 'independent' and as
+            a 'dependent' variable, the 'kind' of values ('scalar', 'array',
+            'mixed', or None if all values are None), their 'shape' (None if
+            it varies) and their numpy 'dtype'.
+        """
+        kind, shape, dtype, _ = self._info.get(key, [None, None, None, None])
+        return {
+            "independent": self._counts[INDEP].get(key, 0),
+            "dependent": self._counts[DEP].get(key, 0),
+            "kind": kind,
+            "shape": shape,
+            "dtype": dtype,
+        }
@@ -36,7 +36,7 @@ def deserialise_vars(lst):
 
 def make_pack(box):
     """Prepare a box for persistance by including Variable data"""
-    return {"data": list(box), "vars": serialise_vars(box)}
+    return {"data": [dict(row) for row in box], "vars": serialise_vars(box)}
 
 
 def unpack(pack):
@@ -127,6 +127,8 @@ class Manager:
             handler (str): Optional key specifying which handler to use
             kwargs: Other keyword arguments passed to the handler.
         """
+        if isinstance(box, Box):
+            box.seal()
         pack = make_pack(box)
         h = handler if handler is not None else None
         if h is None and self.specified is not None:
@@ -59,17 +59,18 @@ def vector_plot(
 
     """
     keys = [x_var, y_var]
-    x_list, y_list, labels = box.vectors(keys, dct=dct)
-    if len(labels) == 0:
-        warnings.warn("No data for plot of: " + str(keys))
     fig = plt.figure(fig_num)
-    for x, y, label in zip(x_list, y_list, labels):
+    count = 0
+    for x, y, label in box.ivectors(keys, dct=dct):
         if np.ndim(y) == 3:
             if y_ind is None:
                 raise ValueError("y_ind must be supplied for 2D arrays")
             # It's a list of 2D vectors, so try to select the right ones
             y = [vector[y_ind] for vector in utils.orient(y, len(x))]
         plt.plot(x, y, label=label, **kwargs)
+        count += 1
+    if count == 0:
+        warnings.warn("No data for plot of: " + str(keys))
     plt.xlabel(x_var)
     plt.ylabel(y_var)
     if legend:
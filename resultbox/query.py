@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 17:52:37 2026
+
+@author: Reuben
+
+Vectorised queries for Box instances. A query is a Python expression over
+variable names, such as:
+
+    "load > 3 and (speed * 2 < limit or not flag)"
+
+The expression is parsed once and evaluated with numpy over columns of
+values, instead of checking each row in Python. Names that are not valid
+identifiers can be quoted with backticks, e.g. "`wheel speed` > 3".
+
+"""
+
+import ast
+import re
+import operator
+import numpy as np
+
+BINARY = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+
+COMPARE = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+}
+
+FUNCTIONS = {
+    "abs": np.abs,
+    "sqrt": np.sqrt,
+    "exp": np.exp,
+    "log": np.log,
+    "log10": np.log10,
+    "sin": np.sin,
+    "cos": np.cos,
+    "tan": np.tan,
+}
+
+
+def parse(expr):
+    """Parse a query expression
+
+    Args:
+        expr (str): The expression
+
+    Returns:
+        tuple: The expression tree and a dictionary that maps placeholder
+        names to the names that were quoted with backticks.
+    """
+    quoted = {}
+
+    def replace(match):
+        name = "__quoted_" + str(len(quoted)) + "__"
+        quoted[name] = match.group(1)
+        return name
+
+    source = re.sub(r"`([^`]*)`", replace, expr)
+    try:
+        tree = ast.parse(source.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ValueError("Invalid query: " + expr) from e
+    return tree.body, quoted
+
+
+def names(expr):
+    """Return a list of the variable names used in an expression"""
+    tree, quoted = parse(expr)
+    out = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and node.id not in FUNCTIONS:
+            name = quoted.get(node.id, node.id)
+            if name not in out:
+                out.append(name)
+    return out
+
+
+def scalars(values, present):
+    """Treat cells of an object column that are not scalars as missing
+
+    Args:
+        values (ndarray): A 1D array of values
+        present (ndarray): A boolean array of the rows that have a value.
+
+    Returns:
+        tuple: The values, with other cells filled by a scalar value so that
+        they can be compared, and the mask of rows with a scalar value.
+    """
+    if not isinstance(values, np.ndarray) or values.dtype.kind != "O":
+        return values, present
+    lst = values.tolist()
+    scalar = np.array([np.ndim(v) == 0 for v in lst], dtype=bool)
+    if scalar.all():
+        return values, present
+    present = np.logical_and(present, scalar)
+    ids = np.flatnonzero(present)
+    fill = lst[ids[0]] if len(ids) > 0 else 0
+    values = values.copy()
+    for i in np.flatnonzero(~scalar).tolist():
+        values[i] = fill
+    return values, present
+
+
+class Evaluator:
+    """Evaluate a query expression over columns of values
+
+    Args:
+        column (callable): A function that takes a variable name and
+        returns a tuple of a 1D array of values and a boolean mask of the
+        rows that have a value.
+        n (int): The number of rows
+        constants (dict): Names that refer to constant values instead of
+        variables.
+
+    Note:
+        Missing values propagate through arithmetic, and comparisons with a
+        missing value are False (like comparisons with NaN). So, "not a > 1"
+        matches rows without a value for 'a'. Values that are not scalars,
+        such as arrays, are treated as missing.
+    """
+
+    def __init__(self, column, n, constants=None):
+        self.column = column
+        self.n = n
+        self.constants = {} if constants is None else constants
+
+    def mask(self, expr):
+        """Return a boolean array of the rows that match the expression"""
+        tree, self._quoted = parse(expr)
+        value, present = self._eval(tree)
+        out = np.logical_and(value, present)
+        if np.ndim(out) == 0:
+            out = np.full(self.n, bool(out))
+        return np.asarray(out, dtype=bool)
+
+    def _eval(self, node):
+        """Return a value and a mask of rows where the value is present"""
+        if isinstance(node, ast.Constant):
+            return node.value, True
+        elif isinstance(node, ast.Name):
+            return self._name(node.id)
+        elif isinstance(node, ast.BinOp) and type(node.op) in BINARY:
+            left, left_present = self._eval(node.left)
+            right, right_present = self._eval(node.right)
+            with np.errstate(all="ignore"):
+                value = BINARY[type(node.op)](left, right)
+            return value, np.logical_and(left_present, right_present)
+        elif isinstance(node, ast.UnaryOp):
+            operand, present = self._eval(node.operand)
+            if isinstance(node.op, ast.Not):
+                return np.logical_not(np.logical_and(operand, present)), True
+            elif isinstance(node.op, ast.USub):
+                return -operand, present
+            elif isinstance(node.op, ast.UAdd):
+                return operand, present
+        elif isinstance(node, ast.BoolOp):
+            values = [np.logical_and(*self._eval(v)) for v in node.values]
+            func = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            return func.reduce(np.broadcast_arrays(*values)), True
+        elif isinstance(node, ast.Compare):
+            return self._compare(node), True
+        elif isinstance(node, ast.Call):
+            return self._call(node)
+        raise ValueError("Unsupported query expression: " + ast.dump(node))
+
+    def _name(self, name):
+        if name in self.constants:
+            return self.constants[name], True
+        return scalars(*self.column(self._quoted.get(name, name)))
+
+    def _compare(self, node):
+        out = True
+        left, left_present = self._eval(node.left)
+        for op, comparator in zip(node.ops, node.comparators):
+            if type(op) not in COMPARE:
+                raise ValueError("Unsupported comparison: " + ast.dump(op))
+            right, right_present = self._eval(comparator)
+            result = COMPARE[type(op)](left, right)
+            out = np.logical_and(out, result)
+            out = np.logical_and(out, np.logical_and(left_present, right_present))
+            left, left_present = right, right_present
+        return out
+
+    def _call(self, node):
+        if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS:
+            raise ValueError("Unsupported function in query: " + ast.dump(node))
+        if len(node.args) != 1 or len(node.keywords) > 0:
+            raise ValueError("Query functions take a single argument.")
+        value, present = self._eval(node.args[0])
+        with np.errstate(all="ignore"):
+            return FUNCTIONS[node.func.id](value), present
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 15:31:09 2026
+
+@author: Reuben
+
+A compact row type for Box data. A Row holds the same three entries as a
+row dictionary, but in slots, so it is much smaller. Rows with the same
+independent values can share a single dictionary of them.
+
+"""
+
+from collections.abc import Mapping
+from .constants import IND, DEP, INDEP
+
+KEYS = (IND, INDEP, DEP)
+
+
+class Row(Mapping):
+    """A read-mostly mapping with index, independent and dependent entries
+
+    Args:
+        index (int): The index
+        independent (dict): The independent values. This may be shared with
+        other rows, so it should not be changed in place.
+        dependent (dict): The dependent values
+
+    Note:
+        A Row can be used like a row dictionary, e.g. `row['independent']`,
+        and compares equal to a dictionary with the same entries. Entries
+        can be replaced, but not added or removed.
+    """
+
+    __slots__ = ("index", "independent", "dependent")
+
+    def __init__(self, index, independent, dependent):
+        self.index = index
+        self.independent = independent
+        self.dependent = dependent
+
+    def __getitem__(self, key):
+        if key == INDEP:
+            return self.independent
+        elif key == DEP:
+            return self.dependent
+        elif key == IND:
+            return self.index
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in KEYS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in KEYS
+
+    def __iter__(self):
+        return iter(KEYS)
+
+    def __len__(self):
+        return 3
+
+    def __eq__(self, other):
+        if not isinstance(other, Mapping):
+            return NotImplemented
+        return len(other) == 3 and all(k in other and self[k] == other[k] for k in KEYS)
+
+    def __ne__(self, other):
+        eq = self.__eq__(other)
+        return eq if eq is NotImplemented else not eq
+
+    __hash__ = None
+
+    def __reduce__(self):
+        return (self.__class__, (self.index, self.independent, self.dependent))
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    def copy(self):
+        """Return a shallow copy"""
+        return Row(self.index, self.independent, self.dependent)
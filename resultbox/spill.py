@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 23:48:31 2026
+
+@author: Reuben
+
+Scratch storage for arrays that are moved out of memory. Arrays are written
+in batches to segment files, and each segment is memory-mapped once. The
+arrays are replaced by views of the mapped segment, which are still numpy
+arrays, so code that reads them does not need to change. The operating
+system reads their data back in when it is accessed, and can drop it from
+memory again when memory is short.
+
+"""
+
+import os
+import shutil
+import tempfile
+import weakref
+import numpy as np
+
+_ALIGN = 64
+
+
+def spillable(value):
+    """Return True if a value is an in-memory array that can be spilled"""
+    if not isinstance(value, np.ndarray) or value.dtype.hasobject:
+        return False
+    # Unpickled memmaps hold their data in memory, without a mapping
+    return getattr(value, "_mmap", None) is None
+
+
+class Scratch:
+    """A directory of memory-mapped segment files
+
+    Args:
+        directory (str): The directory in which to create the scratch
+        directory. If None, the system temporary directory is used.
+
+    Note:
+        The scratch directory is deleted when the Scratch is garbage
+        collected or closed. Views of a segment stay valid on systems that
+        allow mapped files to be deleted (e.g. Linux and macOS).
+    """
+
+    def __init__(self, directory=None):
+        self.path = tempfile.mkdtemp(prefix="resultbox-", dir=directory)
+        self.nbytes = 0
+        self._segments = 0
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self.path, True)
+
+    def write(self, arrays):
+        """Write arrays to a new segment and return memory-mapped views
+
+        Args:
+            arrays (list[ndarray]): Arrays without object dtypes
+
+        Returns:
+            list[ndarray]: A view of the segment for each array, with the
+            same shape and dtype. The views are copy-on-write, so changing
+            them does not change the file.
+        """
+        offsets = []
+        size = 0
+        for arr in arrays:
+            size = -(-size // _ALIGN) * _ALIGN
+            offsets.append(size)
+            size += arr.nbytes
+        if size == 0:
+            return [arr.copy() for arr in arrays]
+        fname = os.path.join(self.path, "segment" + str(self._segments) + ".bin")
+        self._segments += 1
+        with open(fname, "wb") as f:
+            for arr, offset in zip(arrays, offsets):
+                f.seek(offset)
+                f.write(np.ascontiguousarray(arr).reshape(-1).view(np.uint8))
+        segment = np.memmap(fname, dtype=np.uint8, mode="c", shape=(size,))
+        self.nbytes += size
+        return [
+            segment[offset : offset + arr.nbytes].view(arr.dtype).reshape(arr.shape)
+            for arr, offset in zip(arrays, offsets)
+        ]
+
+    def close(self):
+        """Delete the scratch directory"""
+        self._finalizer()
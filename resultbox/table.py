@@ -102,7 +102,8 @@ class Table:
 class Tabulator:
     def guess_index(self, box, values, columns=None):
         all_keys = self.all_keys(values, columns)
-        filtered = box.filtered(all_keys, box.combined())
+        combined = box.combined()
+        filtered = [combined[i] for i in box.filter_ids(all_keys, combined=True)]
         index = {}
         for row in filtered:
             keys = row[constants.INDEP].keys()
@@ -127,8 +128,14 @@ class Tabulator:
     def _prepare_data(self, box, base_keys, values, store=None):
         keys = self.all_keys(base_keys)
         values = self.all_keys(values)
-        minimal = box.minimal()
-        if store is not None:
+        if store is None:
+            ids = np.intersect1d(
+                box.filter_ids(values, combined=True),
+                box.filter_ids(keys, func="any", combined=True),
+            )
+            filtered = box.exclusively(keys, ids=ids)
+        else:
+            minimal = box.minimal()
             keys_to_expand = self.get_keys_to_expand(base_keys, store)
             minimal = variable.expand(minimal, store, specified=keys_to_expand)
             for k in keys_to_expand:
@@ -137,9 +144,9 @@ class Tabulator:
                 if k in values:
                     values.remove(k)
                     values.extend(store[k].subkeys)
-        filtered = box.filtered(values, minimal)
-        filtered = box.filtered(keys, filtered, func="any")
-        filtered = box.exclusively(keys, filtered)
+            filtered = box.filtered(values, minimal)
+            filtered = box.filtered(keys, filtered, func="any")
+            filtered = box.exclusively(keys, filtered)
         if len(filtered) == 0:
             raise ValueError("No records left in filtered results.")
         return filtered
@@ -289,21 +296,30 @@ class Tabulator:
         return arr2, labels2
 
     def _make_spanning_index(self, index_list, step=None, n=None):
-        if len(index_list) == 0:
-            return None
-        test = index_list[0]
+        """Return an index that spans all the index vectors
+
+        Args:
+            index_list (iterable): The index vectors. They are only iterated
+            over once, so this can be a generator.
+        """
+        first = None
+        test = None
         are_all_the_same = True
-        for index in index_list[1:]:
-            are_all_the_same = np.array_equal(test, index)
-            if not are_all_the_same:
-                break
+        minimum, maximum = np.inf, -np.inf
+        for index in index_list:
+            if first is None:
+                first = index
+            elif are_all_the_same:
+                are_all_the_same = np.array_equal(test, index)
             test = index
+            minimum = min(minimum, np.nanmin(index))
+            maximum = max(maximum, np.nanmax(index))
+        if first is None:
+            return None
         if are_all_the_same:
-            return index_list[0]
-        minimum = np.min([np.nanmin(index) for index in index_list])
-        maximum = np.max([np.nanmax(index) for index in index_list])
+            return first
         if n is None:
-            step = index_list[0][1] - index_list[0][0] if step is None else step
+            step = first[1] - first[0] if step is None else step
             ret = np.arange(minimum, maximum + step, step)
         else:
             ret = np.linspace(minimum, maximum, n)
@@ -343,16 +359,21 @@ class Tabulator:
         Note:
             Headings are automatically created.
         """
-        values_list, index_list, labels = box.vectors(
-            [values, index], labels="dict", combine=combine
-        )
-
-        labels = [{k: str(v) for k, v in label.items()} for label in labels]
-        interp_list = []
+        keys = [values, index]
+        if len(box) == 0:
+            raise ValueError("No rows in list")
         if index_vals is None:
+            # A first pass over the vectors finds the span of the index
+            index_list = (
+                ind_vec
+                for vec, ind_vec in box.ivectors(keys, labels=None, combine=combine)
+            )
             index_vals = self._make_spanning_index(index_list, step=step, n=n)
         index_vals = np.squeeze(index_vals)
-        for vec, ind_vec in zip(values_list, index_list):
+        labels = []
+        interp_list = []
+        for vec, ind_vec, label in box.ivectors(keys, labels="dict", combine=combine):
+            labels.append({k: str(v) for k, v in label.items()})
             v = np.squeeze(vec)
             ind_v = np.squeeze(ind_vec)
             interpolated = utils.interp(ind_v, v, index_vals, min_diff=min_diff)
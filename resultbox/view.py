@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 21:14:52 2026
+
+@author: Reuben
+
+Filtered views of a Box. A BoxView holds a reference to its parent Box and
+an array of the ids (positions) of its rows, so filtering does not copy
+rows. Filters on a view return new views, so they can be chained:
+
+    view = box.view().where(a=1).where(b=between(2, 4))
+
+"""
+
+import numpy as np
+from .constants import DEP, INDEP
+from .utils import listify
+from .box import Box, _group_bounds
+from .index import PresenceIndex
+from .query import Evaluator
+
+
+class BoxView:
+    """A view of some of the rows of a Box
+
+    Args:
+        box (Box): The parent Box
+        ids (ndarray): A sorted array of the ids of the rows in the parent.
+        If None, the view includes all rows.
+
+    Note:
+        The view refers to rows by their position in the parent, so it is
+        only valid while rows in the parent are not removed or reordered.
+        Rows added to the parent later are not included. Use
+        :meth:`to_box` to make an independent Box.
+    """
+
+    def __init__(self, box, ids=None):
+        self.box = box
+        if ids is None:
+            ids = np.arange(len(box))
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self._groups = None
+
+    def _view(self, ids):
+        return BoxView(self.box, ids)
+
+    def _row(self, i):
+        return self.box._row(self.ids[i])
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        row = self.box._row
+        for i in self.ids.tolist():
+            yield row(i)
+
+    def __getitem__(self, keys):
+        """Allow easier access to data"""
+        if isinstance(keys, (int, np.integer)):
+            return self.box._row(self.ids[keys])
+        elif isinstance(keys, slice):
+            return self._view(self.ids[keys])
+        elif isinstance(keys, list):
+            return self.vectors(keys)
+        elif isinstance(keys, str):
+            return self.find(keys)
+        elif isinstance(keys, tuple):
+            return self.item(keys[0], keys[1])
+        raise TypeError("Invalid key: " + repr(keys))
+
+    def __eq__(self, other):
+        if not isinstance(other, (list, BoxView)):
+            return NotImplemented
+        return list(self) == list(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return "<BoxView of " + str(len(self)) + " of " + str(len(self.box)) + " rows>"
+
+    def to_box(self):
+        """Return a new Box of the rows in the view"""
+        self.box._check()
+        return self.box._subset(self.ids)
+
+    def where(self, dct=None, **kwargs):
+        """Return a view of the rows that contain key-value pairs
+
+        Args:
+            dct (dict): The key-value pairs that each row must contain. The
+            values may be conditions, as for :meth:`Box.where`.
+
+        Returns:
+            BoxView: A view of the matching rows.
+
+        Note:
+            Relative conditions, like nearest, are resolved among the rows
+            in this view.
+        """
+        m = {} if dct is None else dct.copy()
+        m.update(kwargs)
+        return self._view(self.box._where_ids(m, self.ids))
+
+    def iwhere(self, dct=None, **kwargs):
+        """Return a generator for rows that contain key-value pairs"""
+        return iter(self.where(dct, **kwargs))
+
+    def query(self, expr, **constants):
+        """Return a view of the rows that match an expression
+
+        See :meth:`Box.query` for the expression syntax.
+        """
+        box = self.box
+        box._check()
+        mask = Evaluator(box._column, len(box), constants).mask(expr)
+        return self._view(self.ids[mask[self.ids]])
+
+    def filter_ids(self, keys, func="all", combined=False):
+        """Return the ids of entries that include the keys
+
+        Args:
+            keys (list[Variable]): The keys that entries must include
+            func (str): 'all' if entries must include all the keys, or 'any'
+            if they must include at least one of them.
+            combined (bool): If True, return ids for the combined data
+            instead of the rows.
+
+        Returns:
+            ndarray: A sorted array of positions in this view, or in the
+            list returned by :meth:`combined`.
+        """
+        keys = listify(keys)
+        index = self.box._index(PresenceIndex)
+        if not combined:
+            return np.flatnonzero(index.mask(keys, func)[self.ids])
+        groups, inverse = self._group_codes()
+        valid = inverse >= 0
+        out = np.full(len(groups), func == "all")
+        for k in keys:
+            hit = np.zeros(len(groups), dtype=bool)
+            hit[inverse[index.present(k)[self.ids] & valid]] = True
+            out = out & hit if func == "all" else out | hit
+        return np.flatnonzero(out)
+
+    def filter(self, keys, lst=None, func="all"):
+        """Return a generator for entries that all include the keys"""
+        if lst is None or lst is self:
+            return (self._row(i) for i in self.filter_ids(keys, func=func))
+        return Box.filter(self.box, keys, lst, func)
+
+    def filtered(self, keys, lst=None, func="all"):
+        """Return the entries that all include the keys
+
+        Returns:
+            BoxView: A view of the rows, or a list if lst is given.
+        """
+        if lst is None or lst is self:
+            return self._view(self.ids[self.filter_ids(keys, func=func)])
+        return Box.filtered(self.box, keys, lst, func)
+
+    def _group_codes(self):
+        """Return the combined data positions in the view, and of each row
+
+        Returns:
+            tuple: A sorted array of the positions within the parent's
+            combined data, and an array of the group of each row (or -1).
+        """
+        if self._groups is None:
+            codes = self.box._row_codes()[self.ids]
+            valid = codes >= 0
+            groups, inverse = np.unique(codes[valid], return_inverse=True)
+            out = np.full(len(codes), -1, dtype=np.int64)
+            out[valid] = inverse
+            self._groups = (groups, out)
+        return self._groups
+
+    def _combine_keys(self):
+        keys = self.box._combine_keys()
+        return [keys[g] for g in self._group_codes()[0]]
+
+    def _icombined(self, ids):
+        """Generate entries that merge the rows in each group"""
+        groups, inverse = self._group_codes()
+        order, bounds = _group_bounds(inverse, len(groups))
+        row = self.box._row
+        for g in ids:
+            rows = self.ids[order[bounds[g] : bounds[g + 1]]].tolist()
+            dep = {}
+            for i in rows:
+                dep.update(row(i)[DEP])
+            yield {INDEP: row(rows[0])[INDEP], DEP: dep}
+
+    def combined(self):
+        """List the view data, merging rows with common independent values
+
+        Returns:
+            list: A list of the merged data.
+        """
+        return list(self._icombined(range(len(self._group_codes()[0]))))
+
+    def find(self, key, lst=None):
+        """Return a dictionary of values for the key, by index"""
+        return Box.find(self.box, key, self if lst is None else lst)
+
+    def find_array(self, key):
+        """Return arrays of the indexes and values for a key
+
+        See :meth:`Box.find_array`.
+        """
+        values, mask = self.box._column(key, dep_first=True)
+        ids = self.ids[mask[self.ids]]
+        return self.box._row_indexes()[ids], values[ids]
+
+    def unique(self, key, lst=None):
+        """Return unique key values"""
+        return Box.unique(self.box, key, self if lst is None else lst)
+
+    def combinations(self, key_list, lst=None):
+        """Return unique combinations of keys"""
+        return Box.combinations(self.box, key_list, self if lst is None else lst)
+
+    def keys(self, dependent=True, independent=False):
+        """Return a set of the keys in the view"""
+        out = set()
+        for row in self:
+            if independent:
+                out.update(row[INDEP].keys())
+            if dependent:
+                out.update(row[DEP].keys())
+        return out
+
+    def minimal(self):
+        """A minimal list of data in the view
+
+        Returns:
+            list: A list of dictionaries. Each dictionary combines
+            independent and dependent entries.
+        """
+        out = []
+        for d in self.combined():
+            dct = d[INDEP].copy()
+            dct.update(d[DEP])
+            out.append(dct)
+        return out
+
+    def exclusively(self, keys, lst=None, ids=None):
+        """Return a list of dictionaries that only contain values for keys"""
+        if lst is None:
+            lst = self.minimal()
+            if ids is not None:
+                lst = [lst[i] for i in ids]
+        return Box.exclusively(self.box, keys, lst)
+
+    item = Box.item
+    vectors = Box.vectors
+    ivectors = Box.ivectors
+    _ifilter = Box._ifilter
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 14:20:51 2026
+
+@author: Reuben
+
+Concurrent ingest for Box instances. Worker threads add entries through a
+Writer, which keeps a buffer for each thread. Buffers are added to the Box
+in batches under a lock, and that is when the entries get their index. The
+Box itself is not thread safe, so it should only be changed through the
+Writer while the worker threads are running.
+
+"""
+
+import threading
+from .box import Box
+from .constants import IND
+
+
+class Writer:
+    """Add entries to a Box from many threads
+
+    Args:
+        box (Box): The Box to add entries to.
+        buffer_size (int): The number of entries each thread buffers before
+        they are added to the Box.
+
+    Note:
+        Entries are validated in the calling thread (unless the Box is
+        trusted). Each thread's entries keep their order, but entries from
+        different threads are interleaved in batches. Call :meth:`flush`, or
+        use the Writer as a context manager, to add the remaining entries.
+    """
+
+    def __init__(self, box, buffer_size=1000):
+        self.box = box
+        self.buffer_size = buffer_size
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._buffers = []
+
+    def _buffer(self):
+        """Return the buffer for the calling thread"""
+        try:
+            return self._local.buffer
+        except AttributeError:
+            buffer = []
+            self._local.buffer = buffer
+            with self._lock:
+                self._buffers.append(buffer)
+            return buffer
+
+    def _flush_buffer(self, buffer):
+        """Add the rows in a buffer to the Box. The lock must be held."""
+        rows = buffer[:]
+        del buffer[: len(rows)]
+        if len(rows) == 0:
+            return
+        box = self.box
+        start = len(box)
+        for i, row in enumerate(rows, start):
+            row[IND] = i
+        if box.trusted:
+            box._unchecked.extend(range(start, start + len(rows)))
+        box._add_rows(rows)
+
+    add = Box.add
+    add_value = Box.add_value
+    add_array = Box.add_array
+
+    def add_dict(self, indep, dep):
+        """Add a dictionary of dependent data
+
+        Args:
+            indep (dict): A dictionary of independent values.
+            dep (dict): A dictionary of Variable-value pairs for dependent
+            data.
+        """
+        buffer = self._buffer()
+        buffer.append(self.box._new_row(None, indep, dep))
+        if len(buffer) >= self.buffer_size:
+            with self._lock:
+                self._flush_buffer(buffer)
+
+    def flush(self):
+        """Add all buffered entries to the Box"""
+        with self._lock:
+            for buffer in self._buffers:
+                self._flush_buffer(buffer)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.flush()
@@ -5,9 +5,21 @@ Created on Sun Sep  1 20:13:44 2019
 @author: Reuben
 """
 
+import pickle
 import unittest
 
-from resultbox import Box, Variable
+import numpy as np
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+from resultbox import Box, BoxView, ColumnBox, CombinedBox, SpillBox, Store, Variable
+from resultbox import table
+from resultbox.box import combine_key
+from resultbox.row import Row
+from resultbox.conditions import between, gt, le, lt, ne, isin, near, nearest
 
 
 def get_dct():
@@ -64,6 +76,15 @@ def get_lst6():
     return lst
 
 
+def get_lst2_list():
+    lst = [
+        {"index": 0, "independent": {"a": 1, "c": [1, 2]}, "dependent": {"d": 1}},
+        {"index": 1, "independent": {"a": 1, "c": [1, 2]}, "dependent": {"d": 2}},
+        {"index": 2, "independent": {"a": 2, "c": [1, 2]}, "dependent": {"d": 3}},
+    ]
+    return lst
+
+
 class Test_Box(unittest.TestCase):
     def test_init(self):
         b = Box()
@@ -165,6 +186,18 @@ class Test_Box(unittest.TestCase):
         minimal = b.minimal()
         expected = [{"a": 1, "b": 2, "test": 7, "test2": 8}]
         self.assertEqual(minimal, expected)
+        minimal[0]["test"] = 0
+        self.assertEqual(b.minimal(), expected)
+        self.assertEqual(b.exclusively(["test"]), [{"test": 7}])
+
+    def test_projection_cache(self):
+        b = Box(get_lst4())
+        b.projection(["a", "c"])
+        b.minimal()
+        self.assertEqual(len(b._projections), 3)
+        b.add({"a": 5}, "c", 1)
+        b.projection(["c"])
+        self.assertEqual(list(b._projections), [("key", "c")])
 
     def test_combined(self):
         b = Box()
@@ -272,6 +305,17 @@ class Test_Box(unittest.TestCase):
         self.assertListEqual(expected_vec1, vec1)
         self.assertListEqual(expected_labels, labels)
 
+    def test_ivectors(self):
+        for cls in [Box, ColumnBox]:
+            b = cls(get_lst4())
+            gen = b.ivectors(["c"], dct={"a": 2})
+            self.assertTupleEqual(next(gen), (6, "a=2, b=1"))
+            self.assertListEqual(list(gen), [(7, "a=2, b=2")])
+            out = list(b.ivectors("c", dct={"b": nearest(1.8)}, labels=None))
+            self.assertListEqual(out, [(5,), (7,)])
+            out = list(b.ivectors(["c"], indep_keys=["a"], combine=False))
+            self.assertListEqual(out, [(4, 1), (5, 1), (6, 2), (7, 2)])
+
     def test_vectors_nonstr(self):
         b = Box(get_lst3())
         keys = ["d", "e"]
@@ -316,3 +360,899 @@ class Test_Box(unittest.TestCase):
             {"a": 2, "b": 2},
         ]
         self.assertListEqual(combinations, expected)
+
+
+class Test_ColumnBox(unittest.TestCase):
+    def test_add(self):
+        b = ColumnBox()
+        dct = get_dct()
+        b.add(dct, "test", 7)
+        self.assertEqual(len(b), 1)
+        expected = {
+            "index": 0,
+            "independent": {"a": 1, "b": 2},
+            "dependent": {"test": 7},
+        }
+        self.assertEqual(b[0], expected)
+
+    def test_init(self):
+        b = ColumnBox(get_lst3())
+        self.assertListEqual(b, get_lst3())
+        self.assertListEqual(b[1:3], get_lst3()[1:3])
+
+    def test_combined(self):
+        b = ColumnBox()
+        dct = get_dct()
+        b.add(dct, "test", 7)
+        b.add(dct, "test2", 8)
+        combined = b.combined()
+        expected = [
+            {"independent": {"a": 1, "b": 2}, "dependent": {"test": 7, "test2": 8}}
+        ]
+        self.assertEqual(combined, expected)
+
+    def test_combined_columns(self):
+        boxes = [Box(), ColumnBox()]
+        for b in boxes:
+            b.add({"a": 1}, {"c": 1, "d": "x"})
+            b.add({"a": 2.5}, {"c": 2.5})
+            b.add({"a": 1}, {"c": 3, "e": np.zeros(2)})
+            b.add({"a": 3, "b": 1}, {"d": "y"})
+        box, column_box = boxes
+        self.assertEqual(repr(column_box.combined()), repr(box.combined()))
+        for keys in [["c"], ["d"], ["c", "d"]]:
+            self.assertEqual(column_box.vectors(keys), box.vectors(keys))
+            self.assertListEqual(
+                column_box.filter_ids(keys, combined=True).tolist(),
+                box.filter_ids(keys, combined=True).tolist(),
+            )
+        for dct in [{"c": 3}, {"d": "y"}, {"a": 1}, {"c": 2.5, "a": 2.5}]:
+            found = [r["index"] for r in column_box.where(dct)]
+            self.assertListEqual(found, [r["index"] for r in box.where(dct)])
+        self.assertEqual(column_box.unique("c"), box.unique("c"))
+        # Ints stay ints alongside floats
+        self.assertIs(type(column_box[0]["independent"]["a"]), int)
+        self.assertIs(type(column_box[0]["dependent"]["c"]), int)
+        self.assertEqual(column_box.vectors("c")[1][0], "a=1")
+        self.assertEqual(column_box.find_array("c")[1].dtype, np.float64)
+
+    def test_vectors(self):
+        b = ColumnBox(get_lst3())
+        keys = ["d", "e"]
+        vec0, vec1, labels = b.vectors(keys)
+        self.assertListEqual([[12, 30], [13, 31]], vec0)
+        self.assertListEqual([[1, 2], [1, 2]], vec1)
+        self.assertListEqual(["a=1, b=1", "a=1, b=2"], labels)
+
+    def test_where(self):
+        b = ColumnBox(get_lst4())
+        expected = [
+            {"index": 2, "independent": {"a": 2, "b": 1}, "dependent": {"c": 6}},
+            {"index": 3, "independent": {"a": 2, "b": 2}, "dependent": {"c": 7}},
+        ]
+        self.assertListEqual(b.where(a=2), expected)
+
+    def test_merge(self):
+        b1 = ColumnBox()
+        b2 = Box()
+        dct = get_dct()
+        b1.add(dct, "test", 7)
+        b2.add(dct, "test2", 8)
+        b1.merge(b2)
+        expected = [
+            {"index": 0, "independent": {"a": 1, "b": 2}, "dependent": {"test": 7}},
+            {"index": 1, "independent": {"a": 1, "b": 2}, "dependent": {"test2": 8}},
+        ]
+        self.assertListEqual(b1, expected)
+        self.assertEqual(len(b1.combined()), 1)
+
+
+class Test_CombinedBox(unittest.TestCase):
+    def get_box(self, provenance=False):
+        b = CombinedBox(provenance=provenance)
+        b.add({"a": 1}, "c", 4)
+        b.add({"a": 2}, "c", 5)
+        b.add({"a": 1}, "d", 6)
+        return b
+
+    def test_add(self):
+        b = self.get_box()
+        self.assertEqual(len(b), 2)
+        self.assertDictEqual(
+            b[0], {"index": 0, "independent": {"a": 1}, "dependent": {"c": 4, "d": 6}}
+        )
+        self.assertListEqual(b.combined(), Box(list(b)).combined())
+        self.assertIs(b[0]["dependent"], b.combined()[0]["dependent"])
+        self.assertEqual(b.vectors(["c", "d"], labels=None), ([4], [6]))
+
+    def test_queries_after_merge(self):
+        b = self.get_box()
+        self.assertListEqual(b.where(c=4), [b[0]])
+        b.add({"a": 2}, "c", 7)
+        self.assertListEqual(b.where(c=4), [b[0]])
+        self.assertDictEqual(b.find("c"), {0: 4, 1: 7})
+        self.assertSetEqual(b.keys(), {"c", "d"})
+
+    def test_indexes_after_merge(self):
+        b = self.get_box()
+
+        def queries(b):
+            return [
+                [r["index"] for r in b.where(c=between(4, 6))],
+                [r["index"] for r in b.where(d=6)],
+                [r["index"] for r in b.where(c=nearest(8))],
+                b.unique("c"),
+                b.combinations(["a", "c"]),
+                b.find_array("c")[1].tolist(),
+                b.filter_ids(["d"], combined=True).tolist(),
+                b.key_info("d")["dependent"],
+            ]
+
+        queries(b)
+        indexes = dict(b._indexes)
+        b.add({"a": 2}, {"c": 8, "d": 6})
+        b.add({"a": 1}, "c", 5)
+        b.add({"a": 3}, "c", 1)
+        self.assertEqual(queries(b), queries(CombinedBox(list(b))))
+        for name, index in indexes.items():
+            self.assertIs(b._indexes[name], index)
+
+    def test_provenance(self):
+        b = self.get_box(provenance=True)
+        self.assertListEqual(b.sources(0).tolist(), [0, 2])
+        self.assertListEqual([s.tolist() for s in b.sources()], [[0, 2], [1]])
+        with self.assertRaises(ValueError):
+            self.get_box().sources()
+
+    def test_copy(self):
+        b = self.get_box(provenance=True)
+        new = b.copy()
+        new.add({"a": 1}, "e", 8)
+        self.assertNotIn("e", b[0]["dependent"])
+        self.assertListEqual(new.sources(0).tolist(), [0, 2, 3])
+        self.assertListEqual(b.sources(0).tolist(), [0, 2])
+        self.assertEqual(b.copy(deep=True), b)
+
+    def test_merge(self):
+        b = self.get_box(provenance=True)
+        other = Box()
+        other.add({"a": 2}, "d", 9)
+        other.add({"a": 3}, "c", 1)
+        b.merge(other)
+        self.assertEqual(len(b), 3)
+        self.assertDictEqual(b[1]["dependent"], {"c": 5, "d": 9})
+        self.assertListEqual(b.sources(1).tolist(), [1, 3])
+
+    def test_modify(self):
+        b = self.get_box()
+        with self.assertRaises(TypeError):
+            b.pop()
+
+
+class Test_SpillBox(unittest.TestCase):
+    def get_box(self):
+        b = SpillBox(budget=4000)
+        for i in range(5):
+            b.add({"a": i}, "v", np.full(200, float(i)))
+        b.add({"a": 0}, "c", 1.0)
+        return b
+
+    def test_spill(self):
+        b = self.get_box()
+        self.assertLessEqual(b.resident_bytes, 4000)
+        self.assertEqual(b.spilled_bytes, 3 * 1600)
+        self.assertIsInstance(b[0]["dependent"]["v"], np.memmap)
+        self.assertIsInstance(b.combined()[0]["dependent"]["v"], np.memmap)
+        self.assertEqual(type(b[4]["dependent"]["v"]), np.ndarray)
+
+    def test_read(self):
+        b = self.get_box()
+        v, labels = b.vectors(["v"])
+        self.assertListEqual([float(x[0]) for x in v], [0.0, 1.0, 2.0, 3.0, 4.0])
+        self.assertEqual(float(b.find("v")[1][10]), 1.0)
+        self.assertListEqual(b.where(a=2), [b[2]])
+        self.assertEqual(b.combined()[0]["dependent"]["c"], 1.0)
+
+    def test_spill_clears_columns(self):
+        b = self.get_box()
+        b.find_array("v")
+        b.spill()
+        ids, values = b.find_array("v")
+        self.assertIsInstance(values[4], np.memmap)
+
+    def test_copy(self):
+        b = self.get_box()
+        for deep in [False, True]:
+            c = b.copy(deep)
+            self.assertIs(type(c), SpillBox)
+            self.assertEqual(c.budget, 4000)
+            self.assertLessEqual(c.resident_bytes, 4000)
+        c = b.copy(deep=False)
+        self.assertEqual(c.resident_bytes, b.resident_bytes)
+        b.spill()
+        # Spilling replaces the dictionaries instead of changing shared ones
+        self.assertEqual(type(c[4]["dependent"]["v"]), np.ndarray)
+        self.assertIsInstance(b[4]["dependent"]["v"], np.memmap)
+        c.spill()
+        self.assertIsInstance(c[4]["dependent"]["v"], np.memmap)
+
+    def test_caller_rows(self):
+        rows = [{"index": 0, "independent": {"a": 1}, "dependent": {"v": np.ones(200)}}]
+        b = SpillBox(rows, budget=0)
+        self.assertIsInstance(b[0]["dependent"]["v"], np.memmap)
+        self.assertEqual(type(rows[0]["dependent"]["v"]), np.ndarray)
+
+    def test_merge(self):
+        b = self.get_box()
+        other = Box()
+        other.add({"a": 9}, "v", np.ones(300))
+        other.add({"a": 10}, "v", np.ones(300))
+        b.merge(other)
+        self.assertEqual(len(b), 8)
+        self.assertEqual(b.resident_bytes, 0)
+        self.assertEqual(type(other[0]["dependent"]["v"]), np.ndarray)
+
+
+class Test_Pickle(unittest.TestCase):
+    def fill(self, b):
+        for i in range(4):
+            b.add({"a": i % 2}, "c", float(i))
+            b.add({"a": i % 2}, "v", np.full(200, float(i)))
+        b.where(a=1)
+        return b
+
+    def check(self, b):
+        new = pickle.loads(pickle.dumps(b))
+        self.assertIs(type(new), type(b))
+        self.assertEqual(len(new), len(b))
+        self.assertDictEqual(new.find("c"), b.find("c"))
+        self.assertEqual(len(new.combined()), len(b.combined()))
+        self.assertListEqual(
+            [r["index"] for r in new.where(a=1)], [r["index"] for r in b.where(a=1)]
+        )
+        new.add({"a": 0}, "d", 1)
+        self.assertEqual(len(new.combined()), 2)
+        return new
+
+    def test_box(self):
+        self.check(self.fill(Box()))
+        new = self.check(self.fill(Box(compact=True)))
+        self.assertIs(new[0]["independent"], new.combined()[0]["independent"])
+
+    def test_combined_box(self):
+        new = self.check(self.fill(CombinedBox(provenance=True)))
+        self.assertIs(new[0]["dependent"], new.combined()[0]["dependent"])
+        self.assertListEqual(new.sources(0).tolist(), [0, 1, 4, 5, 8])
+
+    def test_spill_box(self):
+        b = self.fill(SpillBox(budget=4000))
+        self.assertGreater(b.spilled_bytes, 0)
+        new = self.check(b)
+        self.assertEqual(new.resident_bytes, 0)
+        self.assertEqual(new.spilled_bytes, 4 * 1600)
+        self.assertIsInstance(new[7]["dependent"]["v"], np.memmap)
+
+
+class Test_Box_Index(unittest.TestCase):
+    def test_where_after_append(self):
+        b = Box(get_lst4())
+        row = {"index": 4, "independent": {"a": 2, "b": 1}, "dependent": {"c": 8}}
+        b.append(row)
+        self.assertListEqual(b.where(a=2, b=1), [get_lst4()[2], row])
+
+    def test_where_dependent(self):
+        b = Box(get_lst4())
+        self.assertListEqual(b.where(a=2, c=7), [get_lst4()[3]])
+        self.assertListEqual(b.where(c=7), [get_lst4()[3]])
+
+    def test_where_unhashable(self):
+        b = Box(get_lst2_list())
+        self.assertListEqual(b.where(a=1, c=[1, 2]), get_lst2_list()[:2])
+        self.assertListEqual(b.where(a=3), [])
+
+    def test_filter_ids(self):
+        b = Box(get_lst5())
+        self.assertListEqual(b.filter_ids(["b", "e"]).tolist(), [0, 1])
+        self.assertListEqual(
+            b.filter_ids(["b", "d"], func="any").tolist(), [0, 1, 2, 3]
+        )
+        self.assertListEqual(b.filter_ids(["b", "d"]).tolist(), [])
+
+    def test_filter_ids_combined(self):
+        b = Box(get_lst3())
+        self.assertListEqual(b.filter_ids(["d", "e"], combined=True).tolist(), [0, 1])
+        self.assertListEqual(b.filter_ids(["d", "e"]).tolist(), [])
+
+    def test_unique_after_add(self):
+        for cls in [Box, ColumnBox]:
+            b = cls(get_lst6())
+            self.assertListEqual(b.unique("b"), [1, 2, 3])
+            b.add_dict({"a": 3}, {"b": 0})
+            self.assertListEqual(b.unique("a"), [1, 2, 3])
+            self.assertListEqual(b.unique("b"), [0, 1, 2, 3])
+            b.merge(cls(get_lst6()))
+            self.assertDictEqual(b.value_counts("a"), {1: 6, 2: 4, 3: 1})
+
+    def test_declared_combinations(self):
+        b = Box(get_lst4())
+        expected = b.combinations(["a", "c"])
+        b.declare_combinations(["a", "c"])
+        self.assertListEqual(b.combinations(["a", "c"]), expected)
+        b.add_dict({"a": 0}, {"c": 1})
+        self.assertDictEqual(b.combinations(["a", "c"])[0], {"a": 0, "c": 1})
+        b.append({"index": 9, "independent": {"a": -1}, "dependent": {"c": 1}})
+        self.assertDictEqual(b.combinations(["a", "c"])[0], {"a": -1, "c": 1})
+
+    def test_find_array(self):
+        for cls in [Box, ColumnBox]:
+            b = cls(get_lst4())
+            ids, values = b.find_array("c")
+            self.assertListEqual(ids.tolist(), [0, 1, 2, 3])
+            self.assertListEqual(values.tolist(), [4, 5, 6, 7])
+            b.add_dict({"a": 9}, {"c": 1.5})
+            ids, values = b.find_array("c")
+            self.assertListEqual(ids.tolist(), [0, 1, 2, 3, 4])
+            self.assertListEqual(values.tolist(), [4, 5, 6, 7, 1.5])
+            self.assertEqual(values.dtype, np.float64)
+            self.assertDictEqual(dict(zip(ids.tolist(), values.tolist())), b.find("c"))
+            ids, values = b.find_array("a")
+            self.assertListEqual(values.tolist(), [1, 1, 2, 2, 9])
+
+    def test_key_info(self):
+        for cls in [Box, ColumnBox]:
+            b = cls(get_lst4())
+            self.assertSetEqual(b.keys(), {"c"})
+            b.add_dict({"a": 3}, {"d": np.arange(4)})
+            self.assertSetEqual(b.keys(independent=True), {"a", "b", "c", "d"})
+            info = b.key_info("d")
+            self.assertEqual(info["dependent"], 1)
+            self.assertEqual(info["kind"], "array")
+            self.assertEqual(info["shape"], (4,))
+            self.assertEqual(b.key_info("a")["independent"], 5)
+
+    def test_copy_on_write(self):
+        for cls in [Box, ColumnBox]:
+            b = cls(get_lst4())
+            arr = np.arange(3)
+            b.add_dict({"a": 3}, {"d": arr})
+            c = b.copy(deep=False)
+            self.assertEqual(c, b)
+            self.assertEqual(c.combined(), b.combined())
+            c.add_dict({"a": 1, "b": 1}, {"c": 10})
+            b.add_dict({"a": 4}, {"c": 11})
+            self.assertEqual(len(b), 6)
+            self.assertEqual(len(c), 6)
+            self.assertDictEqual(b.find("c"), {0: 4, 1: 5, 2: 6, 3: 7, 5: 11})
+            self.assertEqual(c.combined()[0]["dependent"]["c"], 10)
+            self.assertEqual(b.combined()[0]["dependent"]["c"], 4)
+            if cls is Box:
+                self.assertIs(c.find("d")[4], arr)
+            d = b.copy()
+            self.assertIsNot(d.find("d")[4], arr)
+            d.find("d")[4][:] = 0
+            self.assertListEqual(arr.tolist(), [0, 1, 2])
+
+    def test_copy_shallow(self):
+        for cls in [Box, ColumnBox, CombinedBox]:
+            b = cls(get_lst4())
+            b.add_dict({"a": 3}, {"d": np.arange(3)})
+            c = b.copy_shallow()
+            self.assertIs(type(c), cls)
+            self.assertEqual(c, b)
+            self.assertIs(c.find("d")[4], b.find("d")[4])
+            c.add_dict({"a": 1, "b": 1}, {"c": 10})
+            self.assertEqual(b.combined()[0]["dependent"]["c"], 4)
+        b = Box(trusted=True, compact=True)
+        b.add({"a": 1}, "c", np.ones((3, 3)))
+        c = b.copy_shallow()
+        self.assertTrue(c.trusted)
+        self.assertTrue(c.compact)
+        with self.assertRaises(ValueError):
+            c.seal()
+
+    def test_bounded_repr(self):
+        for cls in [Box, ColumnBox]:
+            b = cls()
+            for i in range(100):
+                b.add_dict({"a": i}, {"c": float(i)})
+            text = repr(b)
+            self.assertIn("... 90 more rows ...", text)
+            self.assertIn("with 100 rows", text)
+            self.assertIn("c (float64)", text)
+            self.assertNotIn("a: 50", text)
+            self.assertEqual(str(b), text)
+            page = b.show(start=50, stop=52)
+            self.assertIn("a: 50", page)
+            self.assertIn("a: 51", page)
+            self.assertNotIn("a: 52", page)
+            pages = list(b.pages(30))
+            self.assertEqual(len(pages), 4)
+            self.assertIn("a: 99", pages[-1])
+
+    def test_projection(self):
+        for cls in [Box, ColumnBox]:
+            b = cls(get_lst4())
+            b.add_dict({"a": 3}, {"d": "x"})
+            values, mask = b.projection(["c"])["c"]
+            self.assertListEqual(values[mask].tolist(), [4, 5, 6, 7])
+            self.assertListEqual(mask.tolist(), [True] * 4 + [False])
+            self.assertIs(b.projection("c")["c"][0], values)
+            b.add_dict({"a": 1, "b": 1}, {"c": 10})
+            values, mask = b.projection(["c"])["c"]
+            self.assertEqual(values[0], 10)
+
+    def test_exclusively(self):
+        for cls in [Box, ColumnBox]:
+            b = cls(get_lst4())
+            b.add_dict({"a": 3}, {"d": "x"})
+            expected = b.exclusively(["a", "d"], b.minimal())
+            self.assertListEqual(b.exclusively(["a", "d"]), expected)
+            self.assertDictEqual(expected[0], {"a": 1, "d": -999})
+            self.assertListEqual(
+                b.exclusively(["a", "d"], ids=[4]), [{"a": 3, "d": "x"}]
+            )
+
+    def test_exclusively_none(self):
+        for cls in [Box, ColumnBox]:
+            b = cls()
+            b.add_dict({"a": 1, "b": 1}, {"c": 5.0})
+            b.add_dict({"a": 1, "b": 1}, {"c": None})
+            b.add_dict({"a": 1, "b": 2}, {"c": 3.0})
+            expected = b.exclusively(["b", "c"], b.minimal())
+            self.assertListEqual(b.exclusively(["b", "c"]), expected)
+            self.assertDictEqual(expected[0], {"b": 1, "c": None})
+            out = b.aggregate("c", "b", funcs="count")
+            self.assertListEqual(out["c"].tolist(), [0, 1])
+            df = table.tabulate(b, "c", index="a", columns="b")
+            self.assertNotIn(5.0, df.values.ravel().tolist())
+
+    def test_exclusively_dep_first(self):
+        for cls in [Box, ColumnBox]:
+            b = cls()
+            b.add_dict({"a": 1, "b": 1}, {"a": 7, "c": 2})
+            b.add_dict({"a": 2, "b": 1}, {"c": 3})
+            expected = b.exclusively(["a", "c"], b.minimal())
+            self.assertListEqual(expected, [{"a": 7, "c": 2}, {"a": 2, "c": 3}])
+            self.assertListEqual(b.exclusively(["a", "c"]), expected)
+            values, mask = b.to_numpy(["a"], combine=True)["a"]
+            self.assertListEqual(values.tolist(), [7, 2])
+
+
+class Test_Combine_Key(unittest.TestCase):
+    def test_scalars(self):
+        self.assertEqual(
+            combine_key({"a": 1, "b": 2.0}), combine_key({"a": 1, "b": 2.0})
+        )
+        self.assertEqual(combine_key({"a": np.int64(1)}), combine_key({"a": 1}))
+        self.assertNotEqual(combine_key({"a": 1}), combine_key({"a": 1.0}))
+        self.assertNotEqual(combine_key({"a": 1}), combine_key({"a": True}))
+        self.assertNotEqual(
+            combine_key({"a": 1, "b": 2}), combine_key({"b": 2, "a": 1})
+        )
+        self.assertEqual(combine_key({"a": np.nan}), combine_key({"a": np.nan}))
+
+    def test_arrays(self):
+        a = np.arange(3000.0)
+        self.assertEqual(combine_key({"a": a}), combine_key({"a": a.copy()}))
+        b = a.copy()
+        b[1500] = -1
+        self.assertNotEqual(combine_key({"a": a}), combine_key({"a": b}))
+        self.assertNotEqual(combine_key({"a": a}), combine_key({"a": a.astype(int)}))
+        self.assertEqual(combine_key({"a": [1, 2]}), combine_key({"a": [1, 2]}))
+
+    def test_combined_arrays(self):
+        b = Box()
+        b.add({"a": np.array([1, 2])}, "c", 1)
+        b.add({"a": np.array([1, 2])}, "d", 2)
+        b.add({"a": np.array([1, 3])}, "d", 3)
+        combined = b.combined()
+        self.assertEqual(len(combined), 2)
+        self.assertEqual(combined[0]["dependent"], {"c": 1, "d": 2})
+
+
+class Test_Add_Many(unittest.TestCase):
+    def expected(self, cls=Box):
+        b = cls()
+        for a, c, d in zip([1, 1, 2], [0.5, 0.5, 0.5], [4, 5, 6]):
+            b.add({"a": a, "c": c}, "d", d)
+        return b
+
+    def test_rows(self):
+        for cls in [Box, ColumnBox]:
+            b = cls()
+            b.add_many({"a": [1, 1, 2], "c": np.array([0.5] * 3)}, {"d": [4, 5, 6]})
+            self.assertListEqual(b, self.expected(cls))
+            self.assertEqual(len(b.combined()), 2)
+            self.assertListEqual(b.where(a=1), self.expected(cls)[:2])
+
+    def test_append_to_existing(self):
+        for cls in [Box, ColumnBox]:
+            b = cls()
+            b.add({"a": 1, "c": 0.5}, "d", 4)
+            b.add_many({"a": [1, 2], "c": [0.5, 0.5]}, {"d": [5, 6]})
+            self.assertListEqual(b, self.expected(cls))
+            self.assertEqual(len(b.combined()), 2)
+
+    def test_vector_rows(self):
+        b = Box()
+        b.add_many({"a": [1, 2]}, {"v": np.arange(6).reshape(2, 3)})
+        self.assertEqual(b[1]["dependent"]["v"].tolist(), [3, 4, 5])
+
+    def test_masks(self):
+        for cls in [Box, ColumnBox]:
+            b = cls()
+            b.add({"a": 1}, {"c": 0.5, "d": 4})
+            b.add({"a": 1}, {"d": 5})
+            b.add({}, {"c": 0.7, "d": 6})
+            new = cls()
+            masks = {"a": [True, True, False], "c": [True, False, True]}
+            new.add_many({"a": [1, 1, 0]}, {"c": [0.5, 0, 0.7], "d": [4, 5, 6]}, masks)
+            self.assertListEqual(new, b)
+            self.assertEqual(len(new.combined()), 2)
+
+    def test_combined_matches_add(self):
+        makers = [
+            Box,
+            lambda: Box(compact=True),
+            ColumnBox,
+            CombinedBox,
+            lambda: SpillBox(budget=0),
+        ]
+        a = [1, 2, 1, 1, 2, 3]
+        c = [0.5, 0.1, 0.2, 0.3, 0.4, 0.6]
+        d = [4, 5, 6, 7, 8, 9]
+        masks = {"c": [True, True, True, False, True, False]}
+        for make in makers:
+            b, expected = make(), make()
+            for box in [b, expected]:
+                box.add({"a": 2}, {"e": 1, "c": 9.0})
+            b.add_many({"a": a}, {"c": c, "d": d}, masks)
+            for i in range(len(a)):
+                dep = {"c": c[i], "d": d[i]} if masks["c"][i] else {"d": d[i]}
+                expected.add({"a": a[i]}, dep)
+            self.assertEqual(b.combined(), expected.combined())
+            self.assertEqual(list(b), list(expected))
+            self.assertEqual(b.find("c"), expected.find("c"))
+        b = Box(compact=True)
+        b.add_many({"a": a}, {"d": d})
+        self.assertIs(b[0]["independent"], b[2]["independent"])
+        self.assertIsNot(b[0]["dependent"], b.combined()[0]["dependent"])
+
+    def test_length_mismatch(self):
+        b = Box()
+        with self.assertRaises(ValueError):
+            b.add_many({"a": [1, 2]}, {"d": [1, 2, 3]})
+        self.assertEqual(len(b), 0)
+
+    def test_extend_arrays(self):
+        for cls in [Box, ColumnBox]:
+            b = cls()
+            indep = np.array([[1, 0.5], [1, 0.5], [2, 0.5]], dtype=object)
+            b.extend_arrays(["a", "c"], indep, ["d"], np.array([4, 5, 6]))
+            self.assertListEqual(b, self.expected(cls))
+            with self.assertRaises(ValueError):
+                b.extend_arrays(["a", "c"], np.ones((2, 3)))
+
+
+class Test_Trusted(unittest.TestCase):
+    def test_deferred(self):
+        for cls in [Box, ColumnBox]:
+            b = cls(trusted=True)
+            b.add({"a": 1}, "c", np.array([2.0]))
+            b.add({"a": 1}, "d", 3)
+            self.assertIsInstance(b[0]["dependent"]["c"], np.ndarray)
+            expected = [{"independent": {"a": 1}, "dependent": {"c": 2.0, "d": 3}}]
+            self.assertEqual(b.combined(), expected)
+            self.assertEqual(b[0]["dependent"]["c"], 2.0)
+            self.assertNotIsInstance(b[0]["dependent"]["c"], np.ndarray)
+
+    def test_errors(self):
+        b = Box(trusted=True)
+        b.add({"a": 1}, "c", np.ones((3, 3)))
+        b.add({"a": 2}, "c", 1.0)
+        b.add({"a": 3}, "c", np.ones((3, 4)))
+        with self.assertRaises(ValueError) as cm:
+            b.seal()
+        self.assertIn("Row 0", str(cm.exception))
+        self.assertIn("Row 2", str(cm.exception))
+        self.assertEqual(b[1]["dependent"]["c"], 1.0)
+        with self.assertRaises(ValueError) as cm:
+            b.seal()
+        self.assertIn("2 invalid values", str(cm.exception))
+        with self.assertRaises(ValueError):
+            b.where(a=2)
+        del b[2]
+        del b[0]
+        b.seal()
+        self.assertEqual(b.where(a=2)[0]["dependent"]["c"], 1.0)
+
+    def test_copy(self):
+        for cls in [Box, ColumnBox]:
+            b = cls(trusted=True)
+            b.add({"a": 1}, "c", np.ones((3, 3)))
+            b.add({"a": 2}, "c", 1.0)
+            for deep in [False, True]:
+                c = b.copy(deep)
+                self.assertTrue(c.trusted)
+                with self.assertRaises(ValueError):
+                    c.seal()
+        c = Box(compact=True, trusted=True).copy()
+        self.assertTrue(c.compact)
+        self.assertTrue(c.trusted)
+
+    def test_query_seals(self):
+        b = Box(trusted=True)
+        b.add({"a": 1}, "c", np.ones((3, 3)))
+        with self.assertRaises(ValueError):
+            b.where(a=1)
+
+
+class Test_Merge_Shards(unittest.TestCase):
+    def shards(self, cls=Box):
+        out = []
+        for s in range(3):
+            b = cls()
+            b.add({"a": 1}, "c" + str(s), s)
+            b.add({"a": s}, "d", s)
+            out.append(b)
+        return out
+
+    def test_merge(self):
+        for cls in [Box, ColumnBox]:
+            for source in [Box, ColumnBox]:
+                shards = self.shards(source)
+                payloads = [pickle.loads(pickle.dumps(b.shard())) for b in shards]
+                b = cls()
+                b.add({"a": 0}, "e", 1)
+                b.merge_shards(payloads)
+                self.assertListEqual([row["index"] for row in b], list(range(7)))
+                self.assertListEqual([row["index"] for row in shards[2]], [0, 1])
+                combined = b.combined()
+                self.assertEqual(len(combined), 3)
+                self.assertEqual(combined[1]["independent"], {"a": 1})
+                self.assertEqual(
+                    combined[1]["dependent"], {"c0": 0, "c1": 1, "d": 1, "c2": 2}
+                )
+                self.assertEqual(len(b.where(a=1)), 4)
+
+    def test_merge_boxes(self):
+        b = Box()
+        b.merge_shards(self.shards())
+        self.assertEqual(len(b), 6)
+        self.assertEqual(b[5]["index"], 5)
+
+
+class Test_Compact(unittest.TestCase):
+    def test_add(self):
+        b = Box(compact=True)
+        b.add({"a": 1}, "c", 1)
+        b.add({"a": 1}, "d", 2)
+        b.add({"a": 2}, "c", 3)
+        self.assertIsInstance(b[0], Row)
+        self.assertIs(b[0]["independent"], b[1]["independent"])
+        self.assertEqual(
+            b[1], {"index": 1, "independent": {"a": 1}, "dependent": {"d": 2}}
+        )
+        self.assertListEqual(b.where(a=1), b[:2])
+        self.assertEqual(len(b.combined()), 2)
+
+    def test_add_many(self):
+        b = Box(compact=True)
+        b.add_many({"a": [1, 1, 2]}, {"c": [1, 2, 3]})
+        self.assertIs(b[0]["independent"], b[1]["independent"])
+        self.assertEqual(b.vectors("c", labels=None), ([2, 3],))
+
+    def test_init(self):
+        b = Box(get_lst4(), compact=True)
+        self.assertListEqual(b, get_lst4())
+        self.assertEqual(b.copy(), get_lst4())
+        self.assertTrue(b.copy().compact)
+
+
+class Test_Conditions(unittest.TestCase):
+    def get_box(self, cls=Box):
+        b = cls()
+        b.add_many({"s": [5.0, 10.0, 15.0, 20.0, 25.0], "n": ["a", "b", "a", "b", "a"]})
+        b.add({"s": 12.0}, "t", 300.5)
+        b.add({"s": 12.0}, "t", 299.0)
+        b.add({"s": "x"}, "t", 310.0)
+        return b
+
+    def test_range(self):
+        for cls in [Box, ColumnBox]:
+            b = self.get_box(cls)
+            found = [r["index"] for r in b.where(s=between(10, 20))]
+            self.assertListEqual(found, [1, 2, 3, 5, 6])
+            found = [r["index"] for r in b.where(s=gt(10), n="a")]
+            self.assertListEqual(found, [2, 4])
+            self.assertListEqual([r["index"] for r in b.where(s=le(5))], [0])
+            self.assertListEqual([r["index"] for r in b.where(s=lt(5))], [])
+            self.assertListEqual(
+                [r["index"] for r in b.where(s=ne(12))], [0, 1, 2, 3, 4]
+            )
+
+    def test_isin_near(self):
+        b = self.get_box()
+        self.assertListEqual([r["index"] for r in b.where(s=isin([5, 25]))], [0, 4])
+        self.assertListEqual([r["index"] for r in b.where(n=isin(["b"]))], [1, 3])
+        self.assertListEqual([r["index"] for r in b.where(s=near(10.1, tol=0.2))], [1])
+        self.assertListEqual([r["index"] for r in b.where(t=nearest(300))], [5])
+        self.assertListEqual([r["index"] for r in b.where(s=nearest(13))], [5, 6])
+
+    def test_nearest_relative(self):
+        b = self.get_box()
+        found = b.where(s=nearest(16), n="b")
+        self.assertListEqual([r["index"] for r in found], [3])
+        found = b.where(t=nearest(300), lst=b[6:])
+        self.assertListEqual([r["index"] for r in found], [6])
+
+    def test_nearest_paths_agree(self):
+        for cls in [Box, ColumnBox]:
+            b = cls()
+            b.add({"a": 1}, "t", 100)
+            b.add({"a": 1}, "t", 200)
+            b.add({"a": 2}, "t", 300)
+            b.add({"a": 3}, {"t": 250, "g": "x"})
+            b.add({"a": 4}, {"t": 350, "g": "y"})
+            # g is dependent, so the value index cannot narrow the rows
+            for dct, t in [
+                ({"a": 1, "t": nearest(300)}, 200),
+                ({"g": "x", "t": nearest(300)}, 250),
+            ]:
+                found = [r["dependent"]["t"] for r in b.where(dct)]
+                self.assertListEqual(found, [t])
+                found = [r["dependent"]["t"] for r in b.where(dct, lst=list(b))]
+                self.assertListEqual(found, [t])
+                self.assertListEqual(b.vectors("t", dct=dct, labels=None)[0], [t])
+                lst = [v for v, in b.ivectors("t", dct=dct, labels=None)]
+                self.assertListEqual(lst, [t])
+
+    def test_after_add(self):
+        b = self.get_box()
+        b.where(s=between(10, 20))
+        b.add({"s": 11.0}, "t", 1)
+        found = [r["index"] for r in b.where(s=between(10, 20))]
+        self.assertListEqual(found, [1, 2, 3, 5, 6, 8])
+
+
+class Test_Query(unittest.TestCase):
+    def test_query(self):
+        for cls in [Box, ColumnBox]:
+            b = cls(get_lst4())
+            b.add({"a": 3, "b": 1}, "e", "x")
+            q = b.query("a == 2 and c > 6")
+            self.assertIsInstance(q, BoxView)
+            self.assertEqual(q, get_lst4()[3:])
+            self.assertEqual(q.to_box(), get_lst4()[3:])
+            self.assertEqual(len(q.combined()), 1)
+            q = b.query("a + b >= n or e == 'x'", n=3)
+            self.assertListEqual([r["index"] for r in q], [1, 2, 3, 4])
+
+    def test_arrays(self):
+        for cls in [Box, ColumnBox]:
+            b = cls(get_lst4())
+            b.add({"a": 3, "b": 1}, "c", np.arange(3))
+            b.add({"a": 3, "b": 2}, "d", np.arange(3))
+            q = b.query("c > 5 or not c < 100")
+            self.assertListEqual([r["index"] for r in q], [2, 3, 4, 5])
+            self.assertEqual(len(b.query("d > 0")), 0)
+            self.assertEqual(len(b.query("a == 3 and c == 1")), 0)
+
+    def test_incremental(self):
+        b = Box(get_lst4())
+        self.assertEqual(len(b.query("c > 5")), 2)
+        b.add({"a": 3, "b": 3}, "c", 9)
+        self.assertEqual(len(b.query("c > 5")), 3)
+        b.append({"index": 5, "independent": {"a": 4}, "dependent": {"c": 10}})
+        self.assertEqual(len(b.query("c > 5")), 4)
+
+
+class Test_GroupBy(unittest.TestCase):
+    def test_groupby(self):
+        for cls in [Box, ColumnBox]:
+            b = cls(get_lst6())
+            out = b.groupby("a", combine=False).agg({"b": ["mean", "count"]})
+            self.assertListEqual(out["a"].tolist(), [1, 2])
+            self.assertListEqual(out["b_mean"].tolist(), [2.0, 1.5])
+            self.assertListEqual(out["b_count"].tolist(), [3, 2])
+            out = b.groupby("a").agg({"b": "max"})
+            self.assertListEqual(out["b"].tolist(), [3, 2])
+
+    def test_groupby_combined(self):
+        b = Box(get_lst4())
+        b.add({"a": 1, "b": 1}, "c", 10)
+        out = b.groupby(["a"]).agg({"c": "sum"})
+        self.assertListEqual(out["c"].tolist(), [15, 13])
+
+    def test_aggregate(self):
+        for cls in [Box, ColumnBox]:
+            b = cls(get_lst6())
+            out = b.aggregate("b", "a", ["mean", "p50", "count"], combine=False)
+            self.assertListEqual(out["a"].tolist(), [1, 2])
+            self.assertListEqual(out["b_mean"].tolist(), [2.0, 1.5])
+            self.assertListEqual(out["b_p50"].tolist(), [2.0, 1.5])
+            self.assertListEqual(out["b_count"].tolist(), [3, 2])
+            df = b.aggregate("b", "a", "max", as_dataframe=True)
+            self.assertListEqual(df.index.tolist(), [1, 2])
+            self.assertListEqual(df["b"].tolist(), [3, 2])
+
+
+class Test_Export(unittest.TestCase):
+    def get_box(self, cls=Box):
+        b = cls()
+        b.add({"a": 1}, {"c": 2.0, "v": np.arange(3.0), "r": np.arange(2)})
+        b.add({"a": 2}, {"c": 3.0, "v": np.arange(3.0) + 1, "r": np.arange(4)})
+        b.add({"a": 2}, {"s": "x"})
+        return b
+
+    def test_to_numpy(self):
+        for cls in [Box, ColumnBox]:
+            out = self.get_box(cls).to_numpy()
+            self.assertListEqual(list(out), ["index", "a", "c", "v", "r", "s"])
+            values, mask = out["c"]
+            self.assertListEqual(values[mask].tolist(), [2.0, 3.0])
+            self.assertListEqual(mask.tolist(), [True, True, False])
+            self.assertFalse(values.flags.writeable)
+            values, mask = out["v"]
+            self.assertEqual(values.shape, (3, 3))
+            self.assertListEqual(values[1].tolist(), [1.0, 2.0, 3.0])
+            self.assertEqual(out["r"][0].dtype, object)
+
+    def test_to_numpy_shares_buffers(self):
+        b = self.get_box(ColumnBox)
+        values, mask = b.to_numpy(["c"])["c"]
+        self.assertTrue(np.shares_memory(values, b._dep.columns["c"].data))
+
+    def test_to_numpy_combined(self):
+        for cls in [Box, ColumnBox]:
+            out = self.get_box(cls).to_numpy(["a", "c", "s"], combine=True)
+            self.assertListEqual(out["a"][0].tolist(), [1, 2])
+            self.assertListEqual(out["c"][0].tolist(), [2.0, 3.0])
+            self.assertListEqual(out["s"][1].tolist(), [False, True])
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_to_arrow(self):
+        for cls in [Box, ColumnBox]:
+            table = self.get_box(cls).to_arrow()
+            self.assertEqual(table.num_rows, 3)
+            self.assertEqual(table.schema.field("c").type, pyarrow.float64())
+            self.assertEqual(
+                table.schema.field("r").type, pyarrow.list_(pyarrow.int64())
+            )
+            data = table.to_pydict()
+            self.assertListEqual(data["c"], [2.0, 3.0, None])
+            self.assertListEqual(data["r"], [[0, 1], [0, 1, 2, 3], None])
+            self.assertListEqual(data["s"], [None, None, "x"])
+
+    def test_to_dataframe(self):
+        for cls in [Box, ColumnBox]:
+            b = self.get_box(cls)
+            b.add({"a": 3}, {"i": 5, "flag": True})
+            df = b.to_dataframe()
+            self.assertListEqual(df.index.tolist(), [0, 1, 2, 3])
+            self.assertEqual(df.index.name, "index")
+            self.assertEqual(df["c"].dtype, np.float64)
+            self.assertEqual(str(df["i"].dtype), "Int64")
+            self.assertEqual(str(df["flag"].dtype), "boolean")
+            self.assertEqual(df["r"].dtype, object)
+            self.assertTrue(np.isnan(df["c"][2]))
+            self.assertListEqual(df.attrs["independent"], ["a"])
+
+    def test_dataframe_round_trip(self):
+        store = Store()
+        speed = store.new("speed", unit="m/s")
+        for cls in [Box, ColumnBox]:
+            b = self.get_box(cls)
+            b.add({"a": 3}, {speed: 2.5, "i": 5})
+            new = cls.from_dataframe(b.to_dataframe(), store=store)
+            self.assertIsInstance(new, cls)
+            self.assertEqual(len(new), len(b))
+            for row, expected in zip(new, b):
+                self.assertDictEqual(row["independent"], expected["independent"])
+                self.assertListEqual(
+                    sorted(row["dependent"]), sorted(expected["dependent"])
+                )
+            self.assertIsInstance(list(new[3]["dependent"])[0], Variable)
+            self.assertEqual(new[3]["dependent"]["i"], 5)
+            self.assertListEqual(new[1]["dependent"]["r"].tolist(), [0, 1, 2, 3])
+            self.assertEqual(len(new.combined()), len(b.combined()))
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:02:11 2026
+
+@author: Reuben
+"""
+
+import unittest
+import numpy as np
+
+from resultbox.columns import Column, Columns
+
+
+class Test_Column(unittest.TestCase):
+    def test_set_get(self):
+        c = Column("i")
+        c.set(0, 3)
+        c.set(40, 5)
+        self.assertEqual(c.get(0), 3)
+        self.assertEqual(c.get(40), 5)
+        self.assertFalse(c.has(1))
+        with self.assertRaises(KeyError):
+            c.get(1)
+
+    def test_promote(self):
+        c = Column("i")
+        c.set(0, 3)
+        c.set(1, 2.5)
+        self.assertEqual(c.kind, "f")
+        c.set(2, "a")
+        self.assertEqual(c.kind, "O")
+        self.assertEqual([c.get(i) for i in range(3)], [3, 2.5, "a"])
+
+    def test_promote_exact(self):
+        c = Column("i", exact=True)
+        c.set(0, 3)
+        c.set(1, 2.5)
+        self.assertEqual(c.kind, "O")
+        self.assertIs(type(c.get(0)), int)
+        c = Column("i", exact=True)
+        c.set_many(0, np.array([1, 2]))
+        c.set_many(2, np.array([2.5]))
+        self.assertEqual(c.kind, "O")
+        self.assertEqual([type(c.get(i)) for i in range(3)], [int, int, float])
+        self.assertTrue(c.copy().exact)
+
+    def test_set_many(self):
+        c = Column("i")
+        c.set(0, 1)
+        c.set_many(1, np.array([2.5, 3.5]))
+        self.assertEqual(c.kind, "f")
+        self.assertEqual([c.get(i) for i in range(3)], [1, 2.5, 3.5])
+
+    def test_copy(self):
+        c = Column("i")
+        c.set_many(0, np.array([1, 2]))
+        c2 = c.copy()
+        self.assertIs(c2.data, c.data)
+        c2.set(1, 5)
+        c.set(2, 3)
+        self.assertEqual([c.get(i) for i in range(3)], [1, 2, 3])
+        self.assertEqual([c2.get(i) for i in range(2)], [1, 5])
+        self.assertFalse(c2.has(2))
+
+
+class Test_Columns(unittest.TestCase):
+    def test_append(self):
+        cols = Columns()
+        cols.append({"a": 1, "b": np.array([1, 2])})
+        cols.append({"a": 2})
+        self.assertEqual(cols.n, 2)
+        self.assertEqual(cols.row(1), {"a": 2})
+        data, mask = cols.values("b")
+        self.assertListEqual(mask.tolist(), [True, False])
+        self.assertEqual(cols.columns["a"].kind, "i")
+        self.assertEqual(cols.columns["b"].kind, "O")
+
+    def test_extend(self):
+        cols = Columns()
+        cols.append({"a": 1})
+        cols.extend({"a": np.array([2, 3]), "b": np.array(["x", "y"])}, 2)
+        self.assertEqual(cols.n, 3)
+        self.assertEqual(cols.row(0), {"a": 1})
+        self.assertEqual(cols.row(2), {"a": 3, "b": "y"})
+
+    def test_extend_rows(self):
+        cols = Columns()
+        cols.append({"a": 1})
+        cols.extend_rows([{"a": 2, "b": np.array([1, 2])}, {"a": 3.5}, {"c": "x"}])
+        self.assertEqual(cols.n, 4)
+        # Ints and floats keep their types
+        self.assertEqual(cols.columns["a"].kind, "O")
+        self.assertIs(type(cols.row(0)["a"]), int)
+        self.assertEqual(cols.row(2), {"a": 3.5})
+        self.assertEqual(cols.row(3), {"c": "x"})
+        self.assertEqual(cols.row(1)["b"].tolist(), [1, 2])
+
+    def test_copy(self):
+        cols = Columns()
+        cols.append({"a": 1})
+        cols2 = cols.copy()
+        cols2.append({"a": 2, "b": 1})
+        self.assertEqual(cols.n, 1)
+        self.assertNotIn("b", cols)
+        self.assertEqual(cols.values("a")[0].tolist(), [1])
+        self.assertEqual(cols2.values("a")[0].tolist(), [1, 2])
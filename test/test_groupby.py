@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 19:58:14 2026
+
+@author: Reuben
+"""
+
+import unittest
+import numpy as np
+
+from resultbox.groupby import GroupBy, factorize, factorize_columns
+
+
+def get_columns():
+    ones = np.ones(6, dtype=bool)
+    columns = {
+        "g": (np.array(["b", "a", "b", "a", "b", "c"], dtype=object), ones),
+        "h": (np.array([1, 1, 1, 2, 2, 2]), ones),
+        "v": (np.array([1.0, 2.0, 3.0, 4.0, 5.0, 0.0]), ones.copy()),
+    }
+    columns["v"][1][5] = False
+    return columns.__getitem__
+
+
+class Test_Factorize(unittest.TestCase):
+    def test_factorize(self):
+        codes, uniques = factorize(["x", "y", "x"])
+        self.assertListEqual(codes.tolist(), [0, 1, 0])
+        self.assertListEqual(uniques, ["x", "y"])
+
+    def test_columns(self):
+        mask = np.array([True, True, False, True])
+        columns = [(np.array([2, 1, 1, 2]), mask), (np.array([0, 0, 0, 1]), mask)]
+        codes, labels = factorize_columns(columns, 4)
+        self.assertListEqual(codes.tolist(), [1, 0, -1, 2])
+        self.assertListEqual(labels[0].tolist(), [1, 2, 2])
+        self.assertListEqual(labels[1].tolist(), [0, 0, 1])
+
+
+class Test_GroupBy(unittest.TestCase):
+    def test_agg(self):
+        g = GroupBy(get_columns(), 6, ["g"])
+        out = g.agg({"v": ["sum", "mean", "min", "max", "count"]})
+        self.assertListEqual(out["g"].tolist(), ["a", "b", "c"])
+        self.assertListEqual(out["v_sum"].tolist(), [6.0, 9.0, 0.0])
+        self.assertListEqual(out["v_mean"].tolist()[:2], [3.0, 3.0])
+        self.assertTrue(np.isnan(out["v_mean"][2]))
+        self.assertListEqual(out["v_min"].tolist()[:2], [2.0, 1.0])
+        self.assertListEqual(out["v_max"].tolist()[:2], [4.0, 5.0])
+        self.assertListEqual(out["v_count"].tolist(), [2, 3, 0])
+        self.assertListEqual(g.size().tolist(), [2, 3, 1])
+
+    def test_std_first_last(self):
+        g = GroupBy(get_columns(), 6, ["g"])
+        self.assertAlmostEqual(g.aggregate("v", "std")[1], np.std([1.0, 3.0, 5.0]))
+        self.assertListEqual(g.aggregate("v", "first").tolist(), [2.0, 1.0, None])
+        self.assertListEqual(g.aggregate("h", "last").tolist(), [2, 2, 2])
+        with self.assertRaises(ValueError):
+            g.aggregate("v", "mode")
+
+    def test_percentiles(self):
+        g = GroupBy(get_columns(), 6, ["g"])
+        median = g.aggregate("v", "median")
+        self.assertListEqual(median[:2].tolist(), [3.0, 3.0])
+        self.assertTrue(np.isnan(median[2]))
+        self.assertListEqual(g.aggregate("v", "p25")[:2].tolist(), [2.5, 2.0])
+        self.assertListEqual(g.aggregate("v", "p100")[:2].tolist(), [4.0, 5.0])
+        with self.assertRaises(ValueError):
+            g.aggregate("v", "p101")
+
+    def test_two_keys(self):
+        g = GroupBy(get_columns(), 6, ["g", "h"])
+        self.assertEqual(g.ngroups, 5)
+        labels = g.labels(as_dicts=True)
+        self.assertEqual(labels[0], {"g": "a", "h": 1})
+        self.assertListEqual(g.agg({"v": "sum"})["v"].tolist(), [2, 4, 4, 5, 0])
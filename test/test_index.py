@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:40:18 2026
+
+@author: Reuben
+"""
+
+import unittest
+import numpy as np
+
+from resultbox.columns import Columns
+from resultbox.index import (
+    ValueIndex,
+    PresenceIndex,
+    SortedIndex,
+    DistinctIndex,
+    CombinationIndex,
+    KeyIndex,
+)
+
+
+def get_rows():
+    lst = [
+        {"index": 0, "independent": {"a": 1, "b": 1}, "dependent": {"c": 4}},
+        {"index": 1, "independent": {"a": 1, "b": 2}, "dependent": {"c": 5}},
+        {"index": 2, "independent": {"a": 2, "b": [1]}, "dependent": {"c": 6}},
+    ]
+    return lst
+
+
+class Test_ValueIndex(unittest.TestCase):
+    def test_candidates(self):
+        index = ValueIndex()
+        for i, row in enumerate(get_rows()):
+            index.add(i, row)
+        self.assertListEqual(index.candidates({"a": 1}), [0, 1])
+        self.assertListEqual(index.candidates({"a": 1, "b": 2}), [1])
+        self.assertListEqual(index.candidates({"b": 1}), [0, 2])
+        self.assertListEqual(index.candidates({"a": 3}), [])
+
+    def test_not_indexed(self):
+        index = ValueIndex()
+        for i, row in enumerate(get_rows()):
+            index.add(i, row)
+        self.assertIsNone(index.candidates({"c": 4}))
+        self.assertIsNone(index.candidates({"a": None}))
+        self.assertIsNone(index.candidates({"b": [1]}))
+
+
+class Test_PresenceIndex(unittest.TestCase):
+    def test_ids(self):
+        index = PresenceIndex()
+        for i, row in enumerate(get_rows()):
+            index.add(i, row)
+        index.add(3, {"independent": {"a": 3}, "dependent": {"e": 1}})
+        self.assertListEqual(index.ids(["a", "c"]).tolist(), [0, 1, 2])
+        self.assertListEqual(index.ids(["c", "e"], func="any").tolist(), [0, 1, 2, 3])
+        self.assertListEqual(index.ids(["e", "f"], func="all").tolist(), [])
+
+
+class Test_DistinctIndex(unittest.TestCase):
+    def test_unique(self):
+        index = DistinctIndex()
+        for i, row in enumerate(get_rows()):
+            index.add(i, row)
+        self.assertListEqual(index.unique("a"), [1, 2])
+        self.assertDictEqual(index.counts("a"), {1: 2, 2: 1})
+        self.assertFalse(index.hashable("b"))
+        index.add(3, {"independent": {"a": 0}, "dependent": {}})
+        self.assertListEqual(index.unique("a"), [0, 1, 2])
+        self.assertListEqual(index.unique("e"), [])
+
+
+class Test_CombinationIndex(unittest.TestCase):
+    def test_unique(self):
+        index = CombinationIndex(("a", "c"))
+        for i, row in enumerate(get_rows()):
+            index.add(i, row)
+        index.add(3, {"independent": {"a": 1}, "dependent": {"c": 4}})
+        index.add(4, {"independent": {"a": 1}, "dependent": {}})
+        self.assertListEqual(index.unique(), [(1, 4), (1, 5), (2, 6)])
+        self.assertEqual(index.counts()[(1, 4)], 2)
+        self.assertTrue(index.hashable)
+
+
+class Test_KeyIndex(unittest.TestCase):
+    def test_keys(self):
+        index = KeyIndex()
+        for i, row in enumerate(get_rows()):
+            index.add(i, row)
+        self.assertSetEqual(index.keys(), {"c"})
+        self.assertSetEqual(index.keys(independent=True), {"a", "b", "c"})
+
+    def test_info(self):
+        index = KeyIndex()
+        for i, row in enumerate(get_rows()):
+            index.add(i, row)
+        index.add(3, {"independent": {"a": 1.5}, "dependent": {"d": np.zeros(3)}})
+        info = index.info("a")
+        self.assertEqual(info["independent"], 4)
+        self.assertEqual(info["kind"], "scalar")
+        self.assertEqual(info["dtype"], np.float64)
+        self.assertEqual(index.info("b")["kind"], "mixed")
+        self.assertIsNone(index.info("b")["shape"])
+        info = index.info("d")
+        self.assertEqual(info["dependent"], 1)
+        self.assertEqual(info["kind"], "array")
+        self.assertEqual(info["shape"], (3,))
+        self.assertIsNone(index.info("e")["kind"])
+
+
+class Test_AddColumns(unittest.TestCase):
+    def get_indexes(self, cls, *args):
+        rows = get_rows() + [
+            {"index": 3, "independent": {"a": 2.5}, "dependent": {"d": "x"}},
+            {"index": 4, "independent": {"a": 1, "b": 1}, "dependent": {"c": 4}},
+        ]
+        by_row = cls(*args)
+        for i, row in enumerate(rows):
+            by_row.add(i, row)
+        indep, dep = Columns(), Columns()
+        indep.extend_rows([row["independent"] for row in rows])
+        dep.extend_rows([row["dependent"] for row in rows])
+        by_column = cls(*args)
+        by_column.add_columns(
+            0,
+            {k: indep.values(k) for k in indep.keys()},
+            {k: dep.values(k) for k in dep.keys()},
+        )
+        return by_row, by_column
+
+    def test_value_index(self):
+        by_row, by_column = self.get_indexes(ValueIndex)
+        for dct in [{"a": 1}, {"a": 2.5}, {"b": 1}, {"a": 1, "b": 2}, {"c": 4}]:
+            self.assertEqual(by_row.candidates(dct), by_column.candidates(dct))
+
+    def test_presence_index(self):
+        by_row, by_column = self.get_indexes(PresenceIndex)
+        for keys in [["a"], ["b", "c"], ["d"], ["e"]]:
+            self.assertListEqual(
+                by_row.ids(keys, "any").tolist(), by_column.ids(keys, "any").tolist()
+            )
+
+    def test_sorted_index(self):
+        by_row, by_column = self.get_indexes(SortedIndex)
+        for k in ["a", "c", "d"]:
+            for x, y in zip(by_row.sorted(k), by_column.sorted(k)):
+                self.assertListEqual(x.tolist(), y.tolist())
+
+    def test_distinct_index(self):
+        by_row, by_column = self.get_indexes(DistinctIndex)
+        for k in ["a", "c", "d"]:
+            self.assertDictEqual(by_row.counts(k), by_column.counts(k))
+        self.assertFalse(by_column.hashable("b"))
+
+    def test_distinct_nan(self):
+        index = DistinctIndex()
+        values = np.array([1.0, np.nan, 1.0, np.nan])
+        index.add_columns(0, {"a": (values, np.ones(4, dtype=bool))}, {})
+        counts = index.counts("a")
+        self.assertEqual(counts[1.0], 2)
+        self.assertEqual(len(counts), 3)
+
+    def test_combination_index(self):
+        by_row, by_column = self.get_indexes(CombinationIndex, ("a", "c"))
+        self.assertDictEqual(by_row.counts(), by_column.counts())
+
+    def test_key_index(self):
+        by_row, by_column = self.get_indexes(KeyIndex)
+        for k in ["a", "b", "c", "d"]:
+            self.assertDictEqual(by_row.info(k), by_column.info(k))
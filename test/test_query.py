@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 18:31:45 2026
+
+@author: Reuben
+"""
+
+import unittest
+import numpy as np
+
+from resultbox.query import Evaluator, names
+
+
+def get_columns():
+    columns = {
+        "a": (np.array([1.0, 2.0, 3.0, 4.0]), np.array([True, True, True, True])),
+        "b": (np.array([4, 3, 2, 1]), np.array([True, True, False, True])),
+        "wheel speed": (np.array([10, 20, 30, 40]), np.ones(4, dtype=bool)),
+    }
+    return columns.__getitem__
+
+
+class Test_Evaluator(unittest.TestCase):
+    def mask(self, expr, **constants):
+        return Evaluator(get_columns(), 4, constants).mask(expr).tolist()
+
+    def test_compare(self):
+        self.assertListEqual(self.mask("a > 2"), [False, False, True, True])
+        self.assertListEqual(self.mask("1 < a <= 3"), [False, True, True, False])
+        self.assertListEqual(self.mask("a * 2 == b + 1"), [False, True, False, False])
+
+    def test_logic(self):
+        self.assertListEqual(self.mask("a > 3 or b > 3"), [True, False, False, True])
+        self.assertListEqual(
+            self.mask("not a > 1 and b > 0"), [True, False, False, False]
+        )
+
+    def test_missing(self):
+        self.assertListEqual(self.mask("b > 0"), [True, True, False, True])
+        self.assertListEqual(self.mask("a > 3 or b > 3"), [True, False, False, True])
+        self.assertListEqual(self.mask("not b > 2"), [False, False, True, True])
+
+    def test_names(self):
+        self.assertListEqual(
+            self.mask("`wheel speed` > x", x=25), [False, False, True, True]
+        )
+        self.assertListEqual(self.mask("abs(a - 2) < 0.5"), [False, True, False, False])
+        self.assertSetEqual(
+            set(names("`wheel speed` > abs(a) + x")), {"wheel speed", "a", "x"}
+        )
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            self.mask("a >")
+        with self.assertRaises(ValueError):
+            self.mask("a.real > 1")
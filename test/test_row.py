@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 15:58:20 2026
+
+@author: Reuben
+"""
+
+import pickle
+import unittest
+
+from resultbox.row import Row
+
+
+class Test_Row(unittest.TestCase):
+    def test_access(self):
+        row = Row(2, {"a": 1}, {"b": 3})
+        self.assertEqual(row["index"], 2)
+        self.assertEqual(row["independent"], {"a": 1})
+        self.assertEqual(row["dependent"], {"b": 3})
+        self.assertIn("dependent", row)
+        self.assertNotIn("b", row)
+        with self.assertRaises(KeyError):
+            row["b"]
+        row["index"] = 5
+        self.assertEqual(row.index, 5)
+        with self.assertRaises(KeyError):
+            row["b"] = 1
+
+    def test_eq(self):
+        row = Row(0, {"a": 1}, {"b": 3})
+        dct = {"index": 0, "independent": {"a": 1}, "dependent": {"b": 3}}
+        self.assertEqual(row, dct)
+        self.assertEqual(dct, row)
+        self.assertEqual(dict(row), dct)
+        self.assertNotEqual(row, Row(1, {"a": 1}, {"b": 3}))
+
+    def test_pickle(self):
+        indep = {"a": 1}
+        rows = [Row(0, indep, {"b": 3}), Row(1, indep, {"b": 4})]
+        new = pickle.loads(pickle.dumps(rows))
+        self.assertEqual(new, rows)
+        self.assertIs(new[0]["independent"], new[1]["independent"])
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 23:58:06 2026
+
+@author: Reuben
+"""
+
+import os
+import unittest
+import numpy as np
+
+from resultbox.spill import Scratch, spillable
+
+
+class Test_Scratch(unittest.TestCase):
+    def test_write(self):
+        scratch = Scratch()
+        arrays = [np.arange(5.0), np.arange(6, dtype=np.int32).reshape(2, 3)]
+        views = scratch.write(arrays)
+        for arr, view in zip(arrays, views):
+            self.assertIsInstance(view, np.memmap)
+            self.assertEqual(view.dtype, arr.dtype)
+            self.assertTrue(np.array_equal(view, arr))
+        self.assertEqual(len(os.listdir(scratch.path)), 1)
+        scratch.close()
+        self.assertFalse(os.path.exists(scratch.path))
+
+    def test_copy_on_write(self):
+        scratch = Scratch()
+        view = scratch.write([np.zeros(4)])[0]
+        view[0] = 1.0
+        self.assertEqual(scratch.write([np.ones(1)])[0][0], 1.0)
+        self.assertEqual(view[0], 1.0)
+        scratch.close()
+
+    def test_spillable(self):
+        self.assertTrue(spillable(np.zeros(3)))
+        self.assertFalse(spillable(np.array([None, 1])))
+        self.assertFalse(spillable([1, 2]))
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 21:40:27 2026
+
+@author: Reuben
+"""
+
+import unittest
+import numpy as np
+
+from resultbox import Box, ColumnBox, BoxView, Tabulator
+from resultbox.conditions import gt, nearest
+
+
+def get_lst():
+    lst = [
+        {"index": 0, "independent": {"a": 1, "b": 1}, "dependent": {"c": 4}},
+        {"index": 1, "independent": {"a": 1, "b": 2}, "dependent": {"c": 5}},
+        {"index": 2, "independent": {"a": 2, "b": 1}, "dependent": {"c": 6}},
+        {"index": 3, "independent": {"a": 2, "b": 2}, "dependent": {"c": 7}},
+        {"index": 4, "independent": {"a": 2, "b": 2}, "dependent": {"d": 8}},
+    ]
+    return lst
+
+
+class Test_BoxView(unittest.TestCase):
+    def test_chained_where(self):
+        for cls in [Box, ColumnBox]:
+            b = cls(get_lst())
+            view = b.view().where(a=2)
+            self.assertIsInstance(view, BoxView)
+            self.assertListEqual(view.ids.tolist(), [2, 3, 4])
+            view = view.where(c=gt(6))
+            self.assertListEqual(view.ids.tolist(), [3])
+            self.assertEqual(view, [get_lst()[3]])
+
+    def test_nearest_within_view(self):
+        b = Box(get_lst())
+        view = b.view().where(a=1).where(c=nearest(10))
+        self.assertListEqual(view.ids.tolist(), [1])
+
+    def test_slice_and_query(self):
+        b = Box(get_lst())
+        view = b.view()[1:4]
+        self.assertIsInstance(view, BoxView)
+        self.assertEqual(len(view), 3)
+        self.assertEqual(view[0], get_lst()[1])
+        self.assertListEqual(view.query("c > 4 and b == 1").ids.tolist(), [2])
+
+    def test_find_unique(self):
+        b = Box(get_lst())
+        view = b.view().where(b=2)
+        self.assertDictEqual(view.find("c"), {1: 5, 3: 7})
+        self.assertDictEqual(view["c"], {1: 5, 3: 7})
+        self.assertListEqual(view.unique("a"), [1, 2])
+        ids, values = view.find_array("c")
+        self.assertListEqual(ids.tolist(), [1, 3])
+        self.assertListEqual(values.tolist(), [5, 7])
+
+    def test_combined_vectors(self):
+        for cls in [Box, ColumnBox]:
+            b = cls(get_lst())
+            view = b.view().where(a=2)
+            self.assertEqual(len(view.combined()), 2)
+            self.assertDictEqual(view.combined()[1]["dependent"], {"c": 7, "d": 8})
+            c, d, labels = view.vectors(["c", "d"])
+            self.assertListEqual(c, [7])
+            self.assertListEqual(d, [8])
+            self.assertListEqual(labels, ["a=2, b=2"])
+            self.assertListEqual(view.filtered("d").ids.tolist(), [4])
+
+    def test_tabulate(self):
+        b = Box(get_lst())
+        view = b.view().where(a=2)
+        df = Tabulator().tabulate(view, "c", index="b")
+        self.assertListEqual(df["c"].tolist(), [6, 7])
+
+    def test_to_box(self):
+        b = Box(get_lst())
+        new = b.view().where(a=1).to_box()
+        self.assertIsInstance(new, Box)
+        self.assertListEqual(new, get_lst()[:2])
+        self.assertTrue(np.array_equal(b.view().ids, np.arange(5)))
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 14:48:02 2026
+
+@author: Reuben
+"""
+
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from resultbox import Box, ColumnBox, Writer
+
+
+def work(writer, t, n=500):
+    for i in range(n):
+        writer.add({"a": i % 10}, "t" + str(t), i)
+
+
+class Test_Writer(unittest.TestCase):
+    def test_threads(self):
+        for cls in [Box, ColumnBox]:
+            b = cls()
+            with b.writer(buffer_size=37) as w:
+                with ThreadPoolExecutor(8) as pool:
+                    for t in range(8):
+                        pool.submit(work, w, t)
+            self.assertEqual(len(b), 4000)
+            self.assertListEqual([row["index"] for row in b], list(range(4000)))
+            combined = b.combined()
+            self.assertEqual(len(combined), 10)
+            self.assertEqual(len(combined[0]["dependent"]), 8)
+            self.assertEqual(len(b.where(a=3)), 400)
+
+    def test_buffered(self):
+        b = Box()
+        b.add({"a": 0}, "c", 1)
+        w = Writer(b, buffer_size=10)
+        w.add({"a": 1}, "c", np.array([2.0]))
+        self.assertEqual(len(b), 1)
+        w.flush()
+        self.assertEqual(len(b), 2)
+        self.assertEqual(b[1]["index"], 1)
+        self.assertEqual(b[1]["dependent"]["c"], 2.0)
+
+    def test_trusted(self):
+        b = Box(trusted=True)
+        with b.writer() as w:
+            w.add({"a": 1}, "c", np.ones((3, 3)))
+        with self.assertRaises(ValueError):
+            b.seal()